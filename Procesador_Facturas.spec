@@ -22,70 +22,22 @@ a = Analysis(
     datas=[
         (str(tkdnd_path), 'tkinterdnd2')
     ],
+    # El análisis de PyInstaller ya sigue los imports (también los diferidos dentro de
+    # funciones) y pyinstaller-hooks-contrib trae hooks para pdfplumber, pdfminer y
+    # pypdfium2: aquí va solo lo que no ve. Cada módulo extra agranda el ejecutable,
+    # que en modo onefile se descomprime entero en cada arranque.
     hiddenimports=[
-        # tkinterdnd2
+        # tkinterdnd2 carga su extensión Tcl en tiempo de ejecución
         'tkinterdnd2',
-        
-        # pdfplumber y pdfminer
-        'pdfplumber',
-        'pdfplumber.page',
-        'pdfplumber.pdf',
-        'pdfplumber.utils',
-        'pdfminer',
-        'pdfminer.pdfparser',
-        'pdfminer.pdfdocument',
-        'pdfminer.pdfpage',
-        'pdfminer.pdfinterp',
-        'pdfminer.converter',
-        'pdfminer.layout',
-        'pdfminer.high_level',
-        
-        # pywin32 - todos los módulos necesarios
-        'win32api',
-        'win32con',
+        # pywin32: clipboard.py importa win32clipboard recién al copiar
         'win32clipboard',
-        'win32gui',
         'pywintypes',
-        'pythoncom',
-        
-        # PIL/Pillow
-        'PIL',
-        'PIL.Image',
-        'PIL.ImageTk',
-        
-        # tkinter
-        'tkinter',
-        'tkinter.font',
-        'tkinter.colorchooser',
-        'tkinter.filedialog',
-        'tkinter.ttk',
-        'tkinter.messagebox',
-        'tkinter.scrolledtext',
-        
-        # Stdlib para vista previa HTML
-        'webbrowser',
-        'tempfile',
-        
-        # Otros
-        'queue',
-        'html.parser',
-        'platform',
-        're',
-        'os',
-        
-        # pypdfium2
-        'pypdfium2',
-        'pypdfium2._helpers',
-        'pypdfium2.raw',
-        
-        # cryptography (dependencia de pdfminer)
-        'cryptography',
-        'cffi',
     ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Dependencias de desarrollo que no usa la app
+    excludes=['pytest', 'PyInstaller', 'tkinterweb', 'tkhtmlview'],
     noarchive=False,
     optimize=0,
 )
@@ -1,15 +1,39 @@
+import timings
+# Informe de arranque: mide cada import de aquí en adelante (se muestra en "⏱ Tiempos")
+STARTUP = timings.StartupProfile()
+
+import multiprocessing
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from tkinter.scrolledtext import ScrolledText
 from tkinterdnd2 import DND_FILES, TkinterDnD
-import pdfplumber
-import re
+import importlib
 import os
 import platform
-import struct
-import win32clipboard
-import webbrowser
-import tempfile
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree.ElementTree import ParseError
+
+from archives import is_archive, iter_members, materialize
+from batches import ATTACHMENT_BUDGET, batch_size, file_sizes, format_size
+from cache import default_cache_path, extract_pdf_data_cached
+from clipboard import get_backend, html_payload
+from dte import is_xml, merge_pdf_and_xml, parse_dte
+from email_render import build_debtor_emails, build_email_document, build_preview_text
+from extractor import (
+    MemoryFile, create_pool, extract_pdf_data, format_fecha, invoice_key, is_no_text, normalize_amount, warm_pool,
+)
+from history import SentHistory, format_repeats, new_batch_id
+from ocr import create_ocr_pool, ocr_available, ocr_pdf_data_cached
+from watch import FolderWatcher
+
+STARTUP.imports_done()
 
 # --- Clase ScrollableFrame (Sin cambios) ---
 class ScrollableFrame(tk.Frame):
@@ -58,6 +82,56 @@ class ScrollableFrame(tk.Frame):
             elif event.num == 5:
                 self.canvas.yview_scroll(1, "units")
 
+# --- Tabla de resultados ---
+# Columnas en el mismo orden que la tabla del correo: (campo, título, ancho, alineación)
+TABLE_COLUMNS = (
+    ("fecha_emision", "Fecha Emisión", 85, "center"),
+    ("emisor_rut", "Rut Emisor", 95, "center"),
+    ("emisor_nombre", "Nombre Emisor", 180, "w"),
+    ("folio", "N° Factura", 75, "center"),
+    ("deudor_rut", "Rut Deudor", 95, "center"),
+    ("deudor_nombre", "Nombre Deudor", 180, "w"),
+    ("valor_bruto", "Valor Bruto", 95, "e"),
+)
+
+
+def _number_key(value):
+    """'32.567.147' -> 32567147; lo que no es número queda al principio"""
+    digits = value.replace(".", "")
+    return int(digits) if digits.isdigit() else -1
+
+
+def _date_key(value):
+    """'24/12/2025' -> (2025, 12, 24); lo que no es fecha DD/MM/YYYY ('S/I'...) queda al principio"""
+    parts = value.split("/")
+    if len(parts) == 3 and all(part.isdigit() for part in parts):
+        day, month, year = map(int, parts)
+        return (year, month, day)
+    return (-1, -1, -1)
+
+
+def sort_key(field, value):
+    """Clave de orden de una celda: montos y folios como números, fechas DD/MM/YYYY por año-mes-día.
+
+    Los valores sin número o sin fecha válida quedan juntos en un extremo
+    (las filas incompletas, para corregirlas en la tabla).
+    """
+    if field in ("valor_bruto", "folio"):
+        return (_number_key(value), "")
+    if field == "fecha_emision":
+        return (_date_key(value), "")
+    return (0, value.upper())
+
+
+def is_incomplete(data):
+    """La factura tiene campos sin extraer (se resaltan para corregirlos en la tabla)"""
+    return data.get("valor_bruto") == "0" or any(data.get(field) == "S/I" for field, *_ in TABLE_COLUMNS)
+
+
+WATCH_POLL_MS = 500  # Cada cuánto se revisa la carpeta vigilada
+ARCHIVE_POLL_MS = 50  # Cada cuánto se recogen los miembros de los ZIPs que se están leyendo
+
+
 # --- Clase Principal ---
 class NativeInvoiceApp(TkinterDnD.Tk):
     def __init__(self):
@@ -70,7 +144,44 @@ class NativeInvoiceApp(TkinterDnD.Tk):
         self.parsed_data = []
         self.file_widgets = {}
         self.current_html = ""  # Para guardar el HTML generado
+        self.debtor_emails = []  # Un correo por deudor: (rut normalizado, registros, html)
+        self.current_records = []  # Registros del correo seleccionado
         self.grid_columns = 5   # Columnas para tarjetas de archivos
+        self.file_status = {}   # Estado de extracción por archivo: ruta -> (texto, color)
+        self.executor = None    # Pool de procesos para extraer (se crea al primer uso)
+        self.extractions = {}        # Extracción memoizada por archivo: ruta -> future
+        self.future_pools = {}       # Pool que corre el future de cada archivo (para saber cuál se rompió)
+        self.finished_paths = set()  # Archivos cuya extracción ya terminó (estado final en la tarjeta)
+        self.polling = False         # Hay un ciclo de after() revisando los futures
+        self.email_pending = False   # Se pidió el correo y se espera a que terminen las extracciones
+        self.ocr_executor = None     # Pool aparte para OCR de PDFs escaneados (lento, pocos procesos)
+        self.ocr_paths = set()       # Archivos cuyo future actual es el del OCR
+        self.ocr_enabled = None      # Tesseract disponible (se revisa al primer PDF escaneado)
+        self.corrections = {}  # Correcciones manuales desde la tabla: ruta -> {campo: valor}
+        self.table_rows = {}   # Fila de la tabla por archivo: ruta -> (iid, datos mostrados)
+        self.sort_state = (None, False)  # (campo, descendente) del último orden aplicado
+        self.attachment_sizes = {}  # Tamaño de cada PDF del correo: ruta -> bytes
+        # Tiempos por etapa en un log junto a la caché; el pool (creado después) hereda la variable
+        os.environ.setdefault(timings.LOG_ENV, os.path.join(os.path.dirname(default_cache_path()), "tiempos.jsonl"))
+        self.timings_offset = timings.log_size()  # El panel resume solo lo de esta sesión
+        self.timings_window = None
+        self.clipboard_executor = None  # Hilo para copiar al portapapeles sin congelar la ventana
+        self.clipboard_backend = None   # Backend de clipboard.py (False = no hay en este equipo)
+        self.clipboard_payload = None   # (HTML, contenido ya codificado) de la última copia
+        self.watch_stop = None          # Evento para detener el hilo de la carpeta vigilada
+        self.watch_queue = queue.Queue()  # (evento de parada, PDF listo o error) que entrega ese hilo
+        self.watch_dir = ""
+        self.xml_records = {}  # Documentos leídos de XML DTE: clave en la cola -> registro
+        self.xml_sources = {}  # Clave en la cola -> archivo XML (un EnvioDTE trae varios documentos)
+        self.archive_members = {}   # Miembros de ZIP en memoria: 'archivo.zip::factura.pdf' -> MemoryFile
+        self.member_digests = set()  # Hashes de esos miembros (para saltar los repetidos)
+        self.archive_reads = {}      # ZIPs que se están leyendo en su hilo: ruta -> miembros agregados
+        self.archive_queue = queue.Queue()  # (ZIP, miembro leído, None al terminar o error) desde esos hilos
+        self.archive_polling = False  # Hay un ciclo de after() recogiendo esos miembros
+        self.attachment_dir = None   # Carpeta temporal donde se escriben los miembros al adjuntarlos
+        self.materialized = {}       # Miembro -> ruta ya escrita en attachment_dir
+        self.history = None          # Historial de facturas ya enviadas (False = no se pudo abrir)
+        self.history_batch = new_batch_id()  # Id del lote en curso en ese historial
 
         # --- GUI SETUP con GRID para control total del espacio ---
         # Configurar grid principal: 3 filas (header, content, footer)
@@ -85,7 +196,7 @@ class NativeInvoiceApp(TkinterDnD.Tk):
 
         self.lbl_instruction = tk.Label(
             header_frame, 
-            text="Arrastra tus Facturas (PDF) aquí", 
+            text="Arrastra tus Facturas (PDF, XML o ZIP) aquí", 
             font=("Segoe UI", 16, "bold"), bg="#f0f0f0"
         )
         self.lbl_instruction.pack(pady=(0, 8))
@@ -105,28 +216,67 @@ class NativeInvoiceApp(TkinterDnD.Tk):
         self.drop_zone.bind("<Button-1>", self.open_file_dialog)
 
         # Label con contador de documentos
-        self.lbl_files = tk.Label(header_frame, text="Documentos en cola: 0", 
+        files_bar = tk.Frame(header_frame, bg="#f0f0f0")
+        files_bar.pack(fill=tk.X, pady=(8, 0))
+        self.lbl_files = tk.Label(files_bar, text="Documentos en cola: 0", 
                                   font=("Segoe UI", 10, "bold"), bg="#f0f0f0", anchor="w")
-        self.lbl_files.pack(fill=tk.X, pady=(8, 0))
+        self.lbl_files.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        # Carpeta vigilada: los PDFs que dejan el escáner o el ERP entran solos a la cola
+        self.btn_watch = ttk.Button(files_bar, text="📂 Vigilar carpeta", command=self.toggle_watch)
+        self.btn_watch.pack(side=tk.RIGHT)
+
+        # Progreso de la extracción (solo visible mientras hay un lote en curso)
+        self.progress_frame = tk.Frame(header_frame, bg="#f0f0f0")
+        self.progress_bar = ttk.Progressbar(self.progress_frame, mode="determinate")
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.lbl_progress = tk.Label(self.progress_frame, text="", font=("Segoe UI", 9), bg="#f0f0f0")
+        self.lbl_progress.pack(side=tk.LEFT, padx=(8, 0))
+        self.btn_cancel = ttk.Button(self.progress_frame, text="Cancelar", command=self.cancel_extraction)
+        self.btn_cancel.pack(side=tk.LEFT, padx=(8, 0))
 
         # === CONTENT (row=1): Archivos y vista previa ===
         content_frame = tk.Frame(self, bg="#f0f0f0", padx=15)
         content_frame.grid(row=1, column=0, sticky="nsew")
         
-        # Dividir content en dos: archivos (arriba) y texto (abajo)
+        # Dividir content en dos: archivos (arriba) y tabla (abajo), con el selector de deudor al medio
         content_frame.grid_rowconfigure(0, weight=1, minsize=60)  # Archivos
-        content_frame.grid_rowconfigure(1, weight=2, minsize=80)  # Texto
+        content_frame.grid_rowconfigure(1, weight=0)              # Selector de correo por deudor
+        content_frame.grid_rowconfigure(2, weight=2, minsize=80)  # Tabla de facturas
         content_frame.grid_columnconfigure(0, weight=1)
 
         # Área de archivos cargados
         self.files_container = ScrollableFrame(content_frame)
         self.files_container.grid(row=0, column=0, sticky="nsew", pady=(0, 5))
         
-        # Vista previa del correo
-        self.text_area = ScrolledText(content_frame, wrap=tk.WORD, font=("Arial", 10))
-        self.text_area.grid(row=1, column=0, sticky="nsew", pady=(5, 0))
-        self.text_area.insert(tk.END, "Cargue archivos PDF y genere el correo...")
-        self.text_area.config(state=tk.DISABLED)
+        # Selector de correo: un correo por deudor cuando el lote es mixto
+        email_bar = tk.Frame(content_frame, bg="#f0f0f0")
+        email_bar.grid(row=1, column=0, sticky="ew")
+        tk.Label(email_bar, text="Correo para:", font=("Segoe UI", 9), bg="#f0f0f0").pack(side=tk.LEFT)
+        self.email_selector = ttk.Combobox(email_bar, state="readonly", font=("Segoe UI", 9))
+        self.email_selector.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(6, 0))
+        self.email_selector.bind("<<ComboboxSelected>>", lambda e: self.show_email(self.email_selector.current()))
+        ttk.Button(email_bar, text="⏱ Tiempos", command=self.show_timings).pack(side=tk.LEFT, padx=(6, 0))
+
+        # Tabla de facturas extraídas: Treeview solo dibuja las filas visibles, así que
+        # miles de filas no se notan; se llena a medida que termina cada extracción
+        table_frame = tk.Frame(content_frame)
+        table_frame.grid(row=2, column=0, sticky="nsew", pady=(5, 0))
+        table_frame.grid_rowconfigure(0, weight=1)
+        table_frame.grid_columnconfigure(0, weight=1)
+        self.table = ttk.Treeview(table_frame, columns=[c[0] for c in TABLE_COLUMNS], show="headings")
+        for field, title, width, anchor in TABLE_COLUMNS:
+            self.table.heading(field, text=title, command=lambda f=field: self.sort_table(f))
+            self.table.column(field, width=width, minwidth=50, anchor=anchor, stretch=True)
+        self.table.tag_configure("incompleto", background="#fff3cd")
+        y_scroll = ttk.Scrollbar(table_frame, orient="vertical", command=self.table.yview)
+        x_scroll = ttk.Scrollbar(table_frame, orient="horizontal", command=self.table.xview)
+        self.table.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
+        self.table.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+        x_scroll.grid(row=1, column=0, sticky="ew")
+        # Doble clic en una celda para corregirla (p. ej. un 'S/I')
+        self.table.bind("<Double-1>", self._edit_cell)
+        self.cell_editor = None
 
         # === FOOTER (row=2): Botones SIEMPRE VISIBLES ===
         footer_frame = tk.Frame(self, bg="#f0f0f0", padx=15, pady=10, height=90)
@@ -168,6 +318,59 @@ class NativeInvoiceApp(TkinterDnD.Tk):
 
         # Vincular evento de redimensionamiento
         self.bind("<Configure>", self._on_window_resize)
+        # Cerrar el pool de procesos junto con la ventana
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        # Al mostrarse la ventana: cerrar el informe de arranque y precargar el resto
+        STARTUP.mark("ventana")
+        self.bind("<Map>", self._on_first_map)
+
+    def _on_first_map(self, event):
+        if event.widget is not self:
+            return
+        self.unbind("<Map>")
+        self.update_idletasks()
+        STARTUP.mark("primer_dibujo")
+        STARTUP.log()
+        self.after(50, self._warm_up)
+
+    def _warm_up(self):
+        """Precarga en segundo plano lo que pagarían el primer archivo y la primera copia"""
+        start = time.perf_counter()
+        pool = None
+        if self.executor is None:
+            # Crear el pool no levanta procesos: eso lo hace warm_pool, en el hilo de abajo
+            self.executor = pool = create_pool(preload=True)
+        if self.clipboard_executor is None:
+            self.clipboard_executor = ThreadPoolExecutor(max_workers=1)
+
+        def job():
+            futures = []
+            if pool is not None:
+                # Workers levantados fuera del hilo de Tk, con pdfplumber/pypdfium2 ya importados
+                try:
+                    futures = warm_pool(pool)
+                except RuntimeError:
+                    pass  # El pool ya se apagó (ventana cerrada o worker muerto)
+            self._clipboard_backend()  # pywin32 y el formato 'HTML Format'
+            for module in ("tempfile", "webbrowser"):  # Los de la vista previa
+                importlib.import_module(module)
+            wait(futures)
+            timings.log_event("precarga", (time.perf_counter() - start) * 1000, workers=len(futures))
+
+        self.clipboard_executor.submit(job)
+
+    def _on_close(self):
+        """Cancela la extracción pendiente y libera el pool de procesos"""
+        self._stop_watch()
+        self.cancel_extraction()
+        for executor in (self.executor, self.ocr_executor, self.clipboard_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        if self.attachment_dir is not None:
+            shutil.rmtree(self.attachment_dir, ignore_errors=True)
+        if self.history:
+            self.history.close()
+        self.destroy()
 
     def _on_window_resize(self, event):
         """Ajusta elementos dinámicamente según el tamaño de ventana"""
@@ -212,6 +415,7 @@ class NativeInvoiceApp(TkinterDnD.Tk):
         if new_cols != self.grid_columns:
             self.grid_columns = new_cols
             if self.pdf_files:
+                # Solo reubicar las tarjetas existentes: no se destruye ni se recrea ningún widget
                 self.refresh_grid()
 
     # --- LOGICA VISUAL ---
@@ -242,30 +446,256 @@ class NativeInvoiceApp(TkinterDnD.Tk):
         tk.Label(card, text="📄", font=("Arial", 28), bg="white").pack(pady=(12, 3))
         display_name = filename if len(filename) < 20 else filename[:17] + "..."
         tk.Label(card, text=display_name, font=("Segoe UI", 8), bg="white", wraplength=120).pack()
+        # Estado de extracción del archivo (se conserva al reconstruir la grilla)
+        status_text, status_color = self.file_status.get(file_path, ("", "#999"))
+        card.lbl_status = tk.Label(card, text=status_text, fg=status_color, font=("Segoe UI", 8), bg="white")
+        card.lbl_status.pack()
         self.pdf_files.append(file_path)
         self.file_widgets[file_path] = card
         self._update_file_count()
 
+    def add_file(self, file_path):
+        """Agrega el archivo a la cola y empieza a extraerlo de inmediato en segundo plano"""
+        if is_archive(file_path):
+            self.add_archive(file_path)
+            return
+        if is_xml(file_path):
+            self.add_xml(file_path)
+            return
+        self.add_file_card(file_path)
+        self.queue_extraction(file_path)
+
+    def add_archive(self, archive_path):
+        """Agrega los PDFs y XML DTE de un ZIP: se leen en memoria, sin descomprimir al disco"""
+        if archive_path in self.archive_reads:
+            return
+        self.archive_reads[archive_path] = 0
+        # Descomprimir y calcular los hashes en un hilo: un ZIP grande no congela la ventana
+        threading.Thread(target=self._read_archive, daemon=True,
+                         args=(archive_path, set(self.member_digests), self.archive_queue)).start()
+        if not self.archive_polling:
+            self.archive_polling = True
+            self.after(ARCHIVE_POLL_MS, self._poll_archives)
+
+    def _read_archive(self, archive_path, seen, results):
+        # Corre en su hilo. Entrega por `results`: (zip, miembro) y al final (zip, None) o (zip, error)
+        try:
+            for member in iter_members(archive_path, seen):
+                results.put((archive_path, member))
+        except (OSError, zipfile.BadZipFile) as e:
+            results.put((archive_path, e))
+            return
+        results.put((archive_path, None))
+
+    def _poll_archives(self):
+        """Agrega a la cola los miembros que ya se leyeron de los ZIPs"""
+        while True:
+            try:
+                archive_path, item = self.archive_queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, MemoryFile):
+                if self._add_member(item):
+                    self.archive_reads[archive_path] += 1
+                continue
+            added = self.archive_reads.pop(archive_path)
+            if item is not None:
+                messagebox.showerror("Error", f"No se pudo abrir '{os.path.basename(archive_path)}':\n{str(item)}")
+            elif not added:
+                messagebox.showwarning("Aviso", f"'{os.path.basename(archive_path)}' no trae PDFs ni XML nuevos.")
+        if self.archive_reads:
+            self.after(ARCHIVE_POLL_MS, self._poll_archives)
+        else:
+            self.archive_polling = False
+
+    def _add_member(self, member):
+        """Agrega un miembro de ZIP a la cola; False si ya estaba (mismo nombre o mismo contenido)"""
+        if member.name in self.file_widgets or member.digest in self.member_digests:
+            return False
+        self.archive_members[member.name] = member
+        if is_xml(member.name):
+            if not self.add_xml(member.name):
+                del self.archive_members[member.name]
+                return False
+        else:
+            self.add_file_card(member.name)
+            self.queue_extraction(member.name)
+        # El hash queda registrado solo si el miembro entró a la cola (remove_file lo libera)
+        self.member_digests.add(member.digest)
+        return True
+
+    def add_xml(self, xml_path):
+        """Agrega los documentos de un XML DTE (suelto o EnvioDTE): se leen al tiro, sin PDF.
+
+        Devuelve False si no se agregó ningún documento.
+        """
+        try:
+            member = self.archive_members.get(xml_path)
+            records = parse_dte(member.open() if member else xml_path)
+        except (OSError, ParseError) as e:
+            messagebox.showerror("Error", f"No se pudo leer el XML '{os.path.basename(xml_path)}':\n{str(e)}")
+            return False
+        if not records:
+            messagebox.showwarning("Aviso", f"'{os.path.basename(xml_path)}' no contiene documentos DTE.")
+            return False
+        added = False
+        for i, data in enumerate(records, 1):
+            # Un EnvioDTE ocupa una entrada por documento: 'envio.xml#2'
+            key = xml_path if len(records) == 1 else f"{xml_path}#{i}"
+            if key in self.file_widgets:
+                continue
+            self.xml_records[key] = data
+            self.xml_sources[key] = xml_path
+            self.add_file_card(key)
+            self.queue_extraction(key)
+            added = True
+        return added
+
+    def source_path(self, file_path):
+        """Archivo real detrás de una entrada de la cola (un documento de XML apunta a su XML)"""
+        return self.xml_sources.get(file_path, file_path)
+
+    def attachment_paths(self, sources, members):
+        """Rutas en disco de los adjuntos: los miembros de ZIP se escriben recién aquí, una vez"""
+        pending = [member for key, member in members.items() if key not in self.materialized]
+        if pending:
+            if self.attachment_dir is None:
+                import tempfile
+                self.attachment_dir = tempfile.mkdtemp(prefix="facturas_adjuntos_")
+            for member, path in zip(pending, materialize(pending, self.attachment_dir)):
+                self.materialized[member.name] = path
+        return [self.materialized.get(source, source) for source in sources]
+
     def remove_file(self, file_path):
+        self._discard_extraction(file_path)
         if file_path in self.file_widgets:
             self.file_widgets[file_path].destroy()
             del self.file_widgets[file_path]
         if file_path in self.pdf_files:
+            index = self.pdf_files.index(file_path)
             self.pdf_files.remove(file_path)
-        self.refresh_grid()
+            # Solo se mueven las tarjetas que estaban después de la eliminada
+            self._configure_columns()
+            self._place_cards(index)
+        self.file_status.pop(file_path, None)
+        self.corrections.pop(file_path, None)
+        self.xml_records.pop(file_path, None)
+        self.xml_sources.pop(file_path, None)
+        member = self.archive_members.pop(file_path, None)
+        if member is not None:
+            # Se puede volver a agregar desde el mismo ZIP
+            self.member_digests.discard(member.digest)
+        self._remove_row(file_path)
         self._update_file_count()
 
     def refresh_grid(self):
-        current_files = list(self.pdf_files)
-        # Limpiar configuración de columnas anterior
-        for i in range(20):  # Limpiar hasta 20 columnas posibles
-            self.files_container.scrollable_frame.grid_columnconfigure(i, weight=0, uniform="")
-        for widget in self.files_container.scrollable_frame.winfo_children():
-            widget.destroy()
-        self.pdf_files = []
-        self.file_widgets = {}
-        for f in current_files:
-            self.add_file_card(f)
+        """Reubica todas las tarjetas según el número de columnas actual"""
+        self._configure_columns()
+        self._place_cards(0)
+
+    def _configure_columns(self):
+        """Expande solo las columnas ocupadas (con pocos archivos las tarjetas usan todo el ancho)"""
+        used = min(self.grid_columns, len(self.pdf_files))
+        frame = self.files_container.scrollable_frame
+        for i in range(20):  # Hasta 20 columnas posibles
+            if i < used:
+                frame.grid_columnconfigure(i, weight=1, uniform="cards")
+            else:
+                frame.grid_columnconfigure(i, weight=0, uniform="")
+
+    def _place_cards(self, start):
+        """Reposiciona las tarjetas desde el índice `start` (grid_configure, sin recrearlas)"""
+        for index in range(start, len(self.pdf_files)):
+            card = self.file_widgets.get(self.pdf_files[index])
+            if card is not None:
+                card.grid_configure(row=index // self.grid_columns, column=index % self.grid_columns)
+
+    def _set_file_status(self, file_path, text, color="#999"):
+        """Muestra el estado de extracción en la tarjeta del archivo"""
+        self.file_status[file_path] = (text, color)
+        card = self.file_widgets.get(file_path)
+        if card is not None:
+            card.lbl_status.config(text=text, fg=color)
+
+    # --- TABLA DE RESULTADOS ---
+    def _show_row(self, file_path, data):
+        """Inserta o actualiza la fila del archivo con sus datos (ya corregidos)"""
+        values = [data.get(field, "") for field, *_ in TABLE_COLUMNS]
+        tags = ("incompleto",) if is_incomplete(data) else ()
+        if file_path in self.table_rows:
+            iid = self.table_rows[file_path][0]
+            self.table.item(iid, values=values, tags=tags)
+        else:
+            iid = self.table.insert("", tk.END, values=values, tags=tags)
+        self.table_rows[file_path] = (iid, data)
+
+    def _remove_row(self, file_path):
+        row = self.table_rows.pop(file_path, None)
+        if row is not None:
+            self.table.delete(row[0])
+
+    def sort_table(self, field):
+        """Ordena por la columna; un segundo clic en la misma columna invierte el orden"""
+        last_field, descending = self.sort_state
+        descending = not descending if field == last_field else False
+        self.sort_state = (field, descending)
+        # Se ordena en Python con los datos guardados y solo se mueven los ítems (sin reinsertar)
+        rows = sorted(self.table_rows.values(), key=lambda row: sort_key(field, row[1].get(field, "")),
+                      reverse=descending)
+        for index, (iid, _) in enumerate(rows):
+            self.table.move(iid, "", index)
+        for name, title, *_ in TABLE_COLUMNS:
+            arrow = (" ▼" if descending else " ▲") if name == field else ""
+            self.table.heading(name, text=title + arrow)
+
+    def _edit_cell(self, event):
+        """Abre un Entry sobre la celda para corregir el valor extraído"""
+        if self.table.identify_region(event.x, event.y) != "cell":
+            return
+        iid = self.table.identify_row(event.y)
+        column = self.table.identify_column(event.x)  # '#1', '#2', ...
+        file_path = next((p for p, (i, _) in self.table_rows.items() if i == iid), None)
+        bbox = self.table.bbox(iid, column)
+        if file_path is None or not bbox:
+            return
+        field = TABLE_COLUMNS[int(column[1:]) - 1][0]
+        self._close_cell_editor()
+
+        x, y, width, height = bbox
+        self.cell_editor = entry = ttk.Entry(self.table)
+        entry.insert(0, self.table_rows[file_path][1].get(field, ""))
+        entry.select_range(0, tk.END)
+        entry.place(x=x, y=y, width=width, height=height)
+        entry.focus_set()
+        entry.bind("<Return>", lambda e: self._close_cell_editor(file_path, field))
+        entry.bind("<FocusOut>", lambda e: self._close_cell_editor(file_path, field))
+        entry.bind("<Escape>", lambda e: self._close_cell_editor())
+
+    def _close_cell_editor(self, file_path=None, field=None):
+        """Cierra el editor de celda; con archivo y campo guarda el valor escrito"""
+        entry, self.cell_editor = self.cell_editor, None
+        if entry is None:
+            return
+        value = entry.get().strip()
+        entry.destroy()
+        if file_path is not None and value:
+            self.correct_field(file_path, field, value)
+
+    def correct_field(self, file_path, field, value):
+        """Guarda una corrección manual; se aplica a la tabla y a los correos"""
+        if field == "fecha_emision":
+            value = format_fecha(value)
+        fixes = {field: value}
+        if field == "valor_bruto":
+            # El correo muestra valor_bruto, pero monto es el mismo dato
+            value = normalize_amount(value)
+            fixes = {"valor_bruto": value, "monto": value}
+        self.corrections.setdefault(file_path, {}).update(fixes)
+        if file_path in self.table_rows:
+            self._show_row(file_path, {**self.table_rows[file_path][1], **fixes})
+        if self.debtor_emails:
+            # El correo ya estaba armado: rehacerlo con el dato corregido
+            self._build_emails(self.email_selector.current())
 
     # --- LOGICA INTERACCION (Sin cambios) ---
     def on_drag_enter(self, event):
@@ -275,383 +705,517 @@ class NativeInvoiceApp(TkinterDnD.Tk):
         self.drop_zone.config(bg="#ffffff", text="⬇️\nSuéltalos aquí\n(o haz clic para seleccionar)")
 
     def open_file_dialog(self, event=None):
-        files = filedialog.askopenfilenames(filetypes=[("PDF Files", "*.pdf")])
+        files = filedialog.askopenfilenames(filetypes=[
+            ("Facturas (PDF, XML DTE o ZIP)", "*.pdf *.xml *.zip"), ("PDF Files", "*.pdf"), ("XML DTE", "*.xml"),
+            ("ZIP", "*.zip"),
+        ])
         if files:
             for f in files:
-                self.add_file_card(f)
+                self.add_file(f)
 
     def drop_files(self, event):
         self.on_drag_leave(None)
         if event.data:
             raw_files = self.tk.splitlist(event.data)
             for file_path in raw_files:
-                if file_path.lower().endswith('.pdf'):
-                    self.add_file_card(file_path)
+                if file_path.lower().endswith(('.pdf', '.xml', '.zip')):
+                    self.add_file(file_path)
+
+    # --- CARPETA VIGILADA (hilo con watch.FolderWatcher, sondeo con after) ---
+    def toggle_watch(self):
+        """Empieza a vigilar una carpeta, o deja de hacerlo si ya hay una"""
+        if self.watch_stop is not None:
+            self._stop_watch()
+            return
+        directory = filedialog.askdirectory(title="Carpeta a vigilar")
+        if not directory:
+            return
+        self.watch_stop = threading.Event()
+        self.watch_dir = directory
+        # El watcher se arma en el hilo: el recorrido inicial y los watches de inotify no congelan la ventana
+        threading.Thread(target=self._watch_loop, args=(directory, self.watch_stop), daemon=True).start()
+        self.btn_watch.config(text="⏹ Dejar de vigilar")
+        self._update_file_count()
+        self.after(WATCH_POLL_MS, self._poll_watch)
+
+    def _watch_loop(self, directory, stop):
+        # Corre en su hilo: recorrer una carpeta de red no congela la ventana.
+        # Solo se comunica por watch_queue: (evento de parada, ruta lista o error que la detuvo)
+        try:
+            # Solo los PDFs que lleguen desde ahora: la carpeta puede tener meses de historial
+            watcher = FolderWatcher([directory])
+        except OSError as e:
+            self.watch_queue.put((stop, e))
+            return
+        try:
+            while not stop.is_set():
+                for path in watcher.poll():
+                    self.watch_queue.put((stop, path))
+                stop.wait(WATCH_POLL_MS / 1000)
+        except OSError as e:
+            # Se desconectó la unidad de red o se borró la carpeta: la ventana deja de vigilar
+            self.watch_queue.put((stop, e))
+        finally:
+            watcher.close()
+
+    def _poll_watch(self):
+        """Pasa a la cola de extracción los PDFs que ya terminaron de escribirse"""
+        if self.watch_stop is None:
+            return
+        while True:
+            try:
+                stop, item = self.watch_queue.get_nowait()
+            except queue.Empty:
+                break
+            if stop is not self.watch_stop:
+                continue  # De una vigilancia anterior, ya detenida
+            if isinstance(item, OSError):
+                self._stop_watch()
+                messagebox.showerror("Error", f"Se dejó de vigilar la carpeta:\n{str(item)}")
+                return
+            if item not in self.file_widgets:
+                self.add_file(item)
+        self.after(WATCH_POLL_MS, self._poll_watch)
+
+    def _stop_watch(self):
+        if self.watch_stop is None:
+            return
+        self.watch_stop.set()
+        self.watch_stop = None
+        self.watch_dir = ""
+        self.btn_watch.config(text="📂 Vigilar carpeta")
+        self._update_file_count()
 
     def clear_all(self):
+        for file_path in list(self.extractions):
+            self._discard_extraction(file_path)
+        self.email_pending = False
+        self.btn_generate.config(state=tk.NORMAL)
         self.pdf_files = []
         self.parsed_data = []
         self.file_widgets = {}
+        self.file_status = {}
         for widget in self.files_container.scrollable_frame.winfo_children():
             widget.destroy()
-        self.text_area.config(state=tk.NORMAL)
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(tk.END, "Cargue archivos PDF y genere el correo...")
-        self.text_area.config(state=tk.DISABLED)
+        self._close_cell_editor()
+        self.table.delete(*self.table.get_children())
+        self.table_rows = {}
+        self.corrections = {}
+        self.attachment_sizes = {}
+        self.xml_records = {}
+        self.xml_sources = {}
+        # Los archivos ya escritos en attachment_dir se quedan ahí (pueden estar en el portapapeles)
+        self.archive_members = {}
+        self.member_digests = set()
+        # Los hilos de ZIPs aún abiertos siguen escribiendo en la cola anterior, que ya nadie lee
+        self.archive_reads = {}
+        self.archive_queue = queue.Queue()
+        self.materialized = {}
+        self.history_batch = new_batch_id()
         self.current_html = ""
+        self.clipboard_payload = None
+        self.debtor_emails = []
+        self.current_records = []
+        self.email_selector.config(values=[])
+        self.email_selector.set("")
         self._update_file_count()
 
     def _update_file_count(self):
         """Actualiza el label con el número de documentos en cola"""
         count = len(self.pdf_files)
-        self.lbl_files.config(text=f"Documentos en cola: {count}")
+        watching = f"  ·  vigilando {self.watch_dir}" if self.watch_dir else ""
+        self.lbl_files.config(text=f"Documentos en cola: {count}{watching}")
 
-    # --- EXTRACCION PDF (Mejorado con múltiples estrategias) ---
+    # --- EXTRACCION PDF (delegada al motor sin GUI en extractor.py) ---
     def extract_pdf_data(self, pdf_path):
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                page = pdf.pages[0]
-                text = page.extract_text()
-                
-                # Si no hay texto, intentar OCR o informar error útil
-                if not text or len(text.strip()) < 50:
-                    filename = os.path.basename(pdf_path)
-                    print(f"⚠️  PDF '{filename}' no contiene texto extraíble (puede ser imagen escaneada)")
-                    return {
-                        "emisor_nombre": f"[PDF sin texto: {filename}]",
-                        "emisor_rut": "S/I",
-                        "deudor_nombre": "S/I",
-                        "deudor_rut": "S/I",
-                        "folio": "S/I",
-                        "monto": "0",
-                        "fecha_emision": "S/I",
-                        "valor_bruto": "0",
-                    }
-
-                # Funciones auxiliares
-                def safe_search(patterns, text, default="S/I"):
-                    """Intenta múltiples patrones hasta encontrar match"""
-                    if not isinstance(patterns, list):
-                        patterns = [patterns]
-                    for pattern in patterns:
-                        match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-                        if match:
-                            result = match.group(1).strip() if match.lastindex >= 1 else match.group(0).strip()
-                            # Limpiar saltos de línea múltiples
-                            result = re.sub(r'\s+', ' ', result)
-                            return result
-                    return default
-
-                def norm_rut(r):
-                    """Normalizar espacios en RUTs"""
-                    return re.sub(r'\s+', '', r)
-
-                def format_fecha(raw):
-                    """Convertir fecha a DD/MM/YYYY"""
-                    raw = raw.strip()
-                    if raw == "S/I" or not raw:
-                        return "S/I"
-                    
-                    # Formato YYYY-MM-DD (ISO)
-                    m = re.search(r'(\d{4})-(\d{1,2})-(\d{1,2})', raw)
-                    if m:
-                        y, mo, d = m.groups()
-                        return f"{int(d):02d}/{int(mo):02d}/{int(y):04d}"
-                    
-                    # Formato DD/MM/YYYY or DD-MM-YYYY
-                    m = re.search(r"(\d{1,2})\s*[/-]\s*(\d{1,2})\s*[/-]\s*(\d{2,4})", raw)
-                    if m:
-                        d, mo, y = m.groups()
-                        y = y if len(y) == 4 else ("20" + y)
-                        return f"{int(d):02d}/{int(mo):02d}/{int(y):04d}"
-                    
-                    # Textual español: '24 de Diciembre del 2025'
-                    m2 = re.search(r"(\d{1,2})\s+de\s+([A-Za-záéíóúÁÉÍÓÚñÑ]+)\s+(?:del|de)\s+(\d{4})", raw, re.IGNORECASE)
-                    if m2:
-                        d, month_name, y = m2.groups()
-                        months = {
-                            'enero':1,'febrero':2,'marzo':3,'abril':4,'mayo':5,'junio':6,
-                            'julio':7,'agosto':8,'septiembre':9,'setiembre':9,'octubre':10,'noviembre':11,'diciembre':12
-                        }
-                        mnum = months.get(month_name.lower())
-                        if mnum:
-                            return f"{int(d):02d}/{mnum:02d}/{int(y):04d}"
-                    
-                    return raw
-
-                # Extraer todos los RUTs del documento
-                rut_pattern = r"(?:R\.U\.T\.?:?\s*)?(\d{1,3}(?:\.\d{3}){1,2}-\s*[\dkK])"
-                all_ruts = re.findall(rut_pattern, text, re.IGNORECASE)
-                all_ruts = [norm_rut(r) for r in all_ruts if r]
-
-                # ESTRATEGIA 1: Detectar emisor RUT (primero en el documento)
-                emisor_rut = all_ruts[0] if all_ruts else "S/I"
-                
-                # ESTRATEGIA 2: Detectar deudor RUT (después de SEÑOR(ES) o segundo RUT)
-                deudor_rut = "S/I"
-                if len(all_ruts) >= 2:
-                    señor_idx = text.upper().find('SEÑOR')
-                    if señor_idx != -1:
-                        for m in re.finditer(rut_pattern, text, re.IGNORECASE):
-                            if m.start() > señor_idx:
-                                deudor_rut = norm_rut(m.group(1))
-                                break
-                    if deudor_rut == "S/I":
-                        deudor_rut = all_ruts[1]
-
-                # Normalizar números: convertir comas a puntos para unificar formato
-                def normalize_amount(amt_str):
-                    """Convierte '32,567,147' o '32.567.147' a '32.567.147'"""
-                    # Si tiene comas, asumir que son separadores de miles (formato anglosajón)
-                    if ',' in amt_str:
-                        return amt_str.replace(',', '.')
-                    return amt_str
-
-                # Extracción de campos con múltiples estrategias
-                data = {
-                    # Emisor nombre: línea después del primer RUT, antes de Giro
-                    "emisor_nombre": safe_search([
-                        r"R\.U\.T\.?:?\s*[\d\.\-\s]+\n\s*([A-ZÁÉÍÓÚÑ][A-ZÁÉÍÓÚÑ\s\.\-]+?)\s*\n\s*Giro:",  # Patrón principal
-                        r"^([A-ZÁÉÍÓÚÑ][A-Z\sÁÉÍÓÚÑ\.\-]+?SPA)\s*\n",  # Fallback: línea que termine en SPA
-                        r"^([A-ZÁÉÍÓÚÑ][A-Z\sÁÉÍÓÚÑ\.\-]+?LIMITADA)\s*\n",  # Fallback: línea que termine en LIMITADA
-                    ], text, default="EMISOR DESCONOCIDO"),
-                    
-                    "emisor_rut": emisor_rut,
-                    
-                    # Deudor nombre: múltiples patrones
-                    "deudor_nombre": safe_search([
-                        r"Señor\(es\):[^\n]*\n([A-Z][A-ZÁÉÍÓÚÑ\s\.\-]+?SOCIEDAD\s+ANONIMA)",  # Formato Factura1550: nombre en línea siguiente
-                        r"Señor\(es\)([A-Z][A-ZÁÉÍÓÚÑ\s\.\-]+?)(?:Direcci[oó]n|RUT\s|R\.U\.T\.?:|\n.*?RUT\s)",  # Sin espacio después de ()
-                        r"SEÑOR\(ES\)[:\s]*([A-Z][A-ZÁÉÍÓÚÑ\s\.\-]+?)(?:\s+R\.U\.T\.?:|Direcci[oó]n:|\n.*?R\.U\.T\.?:)",
-                        r"Señor\(es\)[:\s]+([A-Z][A-ZÁÉÍÓÚÑ\s\.\-]+?)(?:\s+Giro\s*:|R\.U\.T\.?:|Direcci[oó]n:|\n.*?Giro\s*:)",
-                    ], text, default="S/I"),
-                    
-                    "deudor_rut": deudor_rut,
-                    
-                    # Folio: múltiples formatos
-                    "folio": safe_search([
-                        r"(?:FACTURA\s+ELECTR[OÓ]NICA|ELECTRONICA)\s*\n\s*N[°º]?\s*(\d+)",  # Folio en línea separada
-                        r"(?:N[°º]|Nº)\s*(\d+)",
-                        r"Folio[:\s]*(\d+)",
-                    ], text, default="0"),
-                    
-                    # Monto total: múltiples variantes (soporta comas y puntos)
-                    "monto": None,  # Lo calculamos después
-                    
-                    # Fecha emisión
-                    "fecha_emision": None,
-                    
-                    # Valor bruto (mismo que monto)
-                    "valor_bruto": None,  # Lo calculamos después
-                }
-                
-                # Extraer monto con soporte para comas y puntos
-                raw_monto = safe_search([
-                    r"Total\s+Final[\s\$]*:?\s*\$?\s*([\d\.,]+)",
-                    r"TOTAL\s+FINAL[\s\$]*:?\s*\$?\s*([\d\.,]+)",
-                    r"TOTAL[\s\$]*:?\s*\$?\s*([\d\.,]+)",
-                    r"Total[\s\$]*:?\s*\$?\s*([\d\.,]+)",
-                ], text, default="0")
-                data['monto'] = normalize_amount(raw_monto)
-                data['valor_bruto'] = data['monto']
-                
-                # Formatear fecha de emisión
-                raw_fecha = safe_search([
-                    r"Fecha\s+(?:de\s+)?Emisi[oó]n[:\s]*([^\n]+)",
-                    r"Fecha:[^\n]*\n(\d{1,2}/\d{1,2}/\d{4})",  # Fecha en línea siguiente (Factura1550)
-                    r"Fecha[:\s]+(\d{1,2}[/-]\d{1,2}[/-]\d{4})",  # Fecha en misma línea
-                    r"Fecha[:\s]*(\d{4}-\d{1,2}-\d{1,2})",
-                ], text, default="S/I")
-                
-                data['fecha_emision'] = format_fecha(raw_fecha)
-                
-                return data
+        return extract_pdf_data(pdf_path)
+
+    # --- EXTRACCION EN SEGUNDO PLANO (al agregar cada archivo, sondeo con after) ---
+    def queue_extraction(self, file_path):
+        """Envía el PDF al pool de procesos; el resultado queda memoizado por ruta.
+
+        Cada worker consulta primero la caché por hash del PDF (cache.py), así
+        los archivos ya procesados antes vuelven sin re-extraer el texto.
+        """
+        if file_path in self.extractions:
+            return
+        if file_path in self.xml_records:
+            # XML DTE: los datos ya se leyeron, el future nace terminado
+            future = Future()
+            future.set_result(self.xml_records[file_path])
+            self.extractions[file_path] = future
+        else:
+            if self.executor is None:
+                self.executor = create_pool(preload=True)
+            # Los miembros de ZIP viajan al worker como bytes (MemoryFile)
+            source = self.archive_members.get(file_path, file_path)
+            self.extractions[file_path] = self.executor.submit(extract_pdf_data_cached, source)
+            self.future_pools[file_path] = self.executor
+        self.finished_paths.discard(file_path)
+        self._set_file_status(file_path, "⏳ En cola")
+        if not self.polling:
+            self.polling = True
+            self.progress_frame.pack(fill=tk.X, pady=(6, 0))
+            self.after(100, self._poll_extraction)
+
+    def _discard_extraction(self, file_path):
+        """Cancela y olvida la extracción de un archivo (si aún no empieza, no se procesa)"""
+        future = self.extractions.pop(file_path, None)
+        if future is not None:
+            future.cancel()
+        self.future_pools.pop(file_path, None)
+        self.finished_paths.discard(file_path)
+        self.ocr_paths.discard(file_path)
+
+    def _ocr_ready(self):
+        """True si se puede hacer OCR; la primera vez revisa pytesseract/Tesseract"""
+        if self.ocr_enabled is None:
+            self.ocr_enabled = ocr_available()
+            if not self.ocr_enabled:
+                print("⚠️  OCR no disponible: instala pytesseract y Tesseract para leer PDFs escaneados")
+        return self.ocr_enabled
 
+    def _queue_ocr(self, file_path, placeholder):
+        """Reemplaza el resultado sin texto por un OCR en su pool (cacheado por hash del PDF)"""
+        if self.ocr_executor is None:
+            self.ocr_executor = create_ocr_pool()
+        # Si el OCR falla, el future devuelve el mismo registro '[PDF sin texto]'
+        source = self.archive_members.get(file_path, file_path)
+        self.extractions[file_path] = self.ocr_executor.submit(ocr_pdf_data_cached, source, placeholder)
+        self.future_pools[file_path] = self.ocr_executor
+        self.ocr_paths.add(file_path)
+        self._set_file_status(file_path, "🔍 OCR", "#007aff")
+
+    def _poll_extraction(self):
+        """Revisa los futures pendientes, actualiza tarjetas y progreso"""
+        for file_path, future in self.extractions.items():
+            if file_path in self.finished_paths:
+                continue
+            if future.done():
+                data = self._future_result(file_path, future)
+                if data and is_no_text(data) and file_path not in self.ocr_paths and self._ocr_ready():
+                    # PDF escaneado: sigue pendiente hasta que termine el OCR
+                    self._queue_ocr(file_path, data)
+                    continue
+                self.finished_paths.add(file_path)
+                if data:
+                    # Mostrar qué backend de texto resolvió la factura
+                    backend = data.get("backend")
+                    self._set_file_status(file_path, f"✔ {backend}" if backend else "✔ Listo", "#2e7d32")
+                    self._show_row(file_path, {**data, **self.corrections.get(file_path, {})})
+                else:
+                    self._set_file_status(file_path, "✖ Error", "#c62828")
+            elif future.running() and file_path not in self.ocr_paths:
+                self._set_file_status(file_path, "⚙️ Procesando", "#007aff")
+
+        total = len(self.extractions)
+        done = len(self.finished_paths)
+        self.progress_bar.config(maximum=max(total, 1), value=done)
+        self.lbl_progress.config(text=f"{done}/{total}")
+        if done < total:
+            self.after(100, self._poll_extraction)
+            return
+
+        # Todo extraído: detener el sondeo y, si se pidió, armar el correo
+        self.polling = False
+        self.progress_frame.pack_forget()
+        if self.email_pending:
+            self.email_pending = False
+            self.btn_generate.config(state=tk.NORMAL)
+            self.render_email(self._collect_results())
+
+    def _future_result(self, file_path, future):
+        """Resultado de un future terminado; None si el worker falló"""
+        try:
+            return future.result()
+        except BrokenProcessPool as e:
+            # Murió un worker: el pool que corría este archivo queda inutilizable
+            print(f"❌ Error en el pool de extracción: {type(e).__name__}: {e}")
+            self._drop_pool(self.future_pools.get(file_path))
+            return None
+        except CancelledError:
+            # Quedó pendiente en un pool roto que se apagó: cuenta como error y se reencola al generar
+            print(f"❌ Extracción cancelada: {os.path.basename(file_path)}")
+            return None
         except Exception as e:
-            print(f"❌ Error parsing {os.path.basename(pdf_path)}: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+            # Error de este archivo: el pool sigue sirviendo para los demás
+            print(f"❌ Error extrayendo {os.path.basename(file_path)}: {type(e).__name__}: {e}")
             return None
 
+    def _drop_pool(self, pool):
+        """Apaga un pool roto y lo olvida; se recrea en el próximo envío"""
+        if pool is None:
+            return
+        pool.shutdown(wait=False, cancel_futures=True)
+        # Cada pool por separado: si se rompe el de texto, el de OCR sigue (y al revés)
+        if pool is self.executor:
+            self.executor = None
+        elif pool is self.ocr_executor:
+            self.ocr_executor = None
+
+    def _collect_results(self):
+        """Resultados en el orden de la cola, con las correcciones de la tabla (None = archivo con error)"""
+        results = []
+        for file_path in self.pdf_files:
+            data = self._future_result(file_path, self.extractions[file_path])
+            if data and file_path in self.corrections:
+                data = {**data, **self.corrections[file_path]}
+            results.append(data)
+        return results
+
+    def cancel_extraction(self):
+        """Cancela las extracciones que aún no terminan (se reintentan al generar)"""
+        for file_path in list(self.extractions):
+            if file_path not in self.finished_paths:
+                # Los que ya están en ejecución terminan en el worker, pero se descartan
+                self._discard_extraction(file_path)
+                self._set_file_status(file_path, "Cancelado")
+        self.email_pending = False
+        self.btn_generate.config(state=tk.NORMAL)
+
     # --- GENERACION DEL CORREO (CAMBIO PRINCIPAL AQUÍ) ---
     def generate_email(self):
         if not self.pdf_files:
             messagebox.showwarning("Alerta", "Carga al menos un archivo PDF primero.")
             return
+        # Reencolar los archivos cancelados o cuyo worker murió
+        for file_path in self.pdf_files:
+            future = self.extractions.get(file_path)
+            if future is not None and future.done() and (future.cancelled() or future.exception() is not None):
+                self._discard_extraction(file_path)
+            self.queue_extraction(file_path)
+
+        if len(self.finished_paths) == len(self.extractions):
+            # Todo se extrajo mientras se cargaban los archivos: el correo sale al instante
+            self.render_email(self._collect_results())
+        else:
+            self.email_pending = True
+            self.btn_generate.config(state=tk.DISABLED)
 
+    def render_email(self, results):
+        """Arma un correo por deudor con los resultados de la extracción (None = archivo con error)"""
         self.parsed_data = []
         errors = 0
-        
-        for file_path in self.pdf_files:
-            data = self.extract_pdf_data(file_path)
+
+        for file_path, data in zip(self.pdf_files, results):
             if data:
-                self.parsed_data.append(data)
+                # Se guarda la ruta para poder adjuntar solo los PDFs de cada deudor
+                self.parsed_data.append({**data, "archivo": file_path})
             else:
                 errors += 1
 
         if not self.parsed_data:
             messagebox.showerror("Error", "No se pudieron leer datos de los PDFs.")
             return
+        # PDF y XML DTE de la misma factura: un solo registro, con los datos del XML
+        self.parsed_data = merge_pdf_and_xml(self.parsed_data)
+        # Facturas que ya salieron en un correo anterior (p. ej. ya cedidas): avisar antes de armarlo
+        if not self.confirm_repeats(self.parsed_data):
+            return
 
-        # Tomamos los datos del deudor del primer PDF cargado para el encabezado
-        header_data = self.parsed_data[0]
-        deudor_full = f"{header_data['deudor_nombre']} {header_data['deudor_rut']}".upper()
-
-        # --- FORMATO DE CORREO HTML PARA GMAIL ---
-        # Genera HTML inline completo listo para copiar/pegar en Gmail
-        
-        # Nuevo orden de columnas solicitado:
-        # Fecha Emisión, Rut Emisor, Nombre Emisor, N° Factura, Rut Deudor, Nombre Deudor, Valor Bruto Factura
-        rows_html = ""
-        for item in self.parsed_data:
-            rows_html += f"""    <tr>
-        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt;">{item.get('fecha_emision','S/I')}</td>
-        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt;">{item.get('emisor_rut','S/I')}</td>
-        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt;">{item.get('emisor_nombre','S/I')}</td>
-        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt; text-align: center;">{item.get('folio','')}</td>
-        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt;">{item.get('deudor_rut','S/I')}</td>
-        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt;">{item.get('deudor_nombre','S/I')}</td>
-        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt; text-align: right;">{item.get('valor_bruto', item.get('monto','0'))}</td>
-    </tr>
-"""
-        
-        email_body = f"""<div style="font-family: Arial, sans-serif; font-size: 11pt; line-height: 1.5;">
-    <p>Estimado:</p>
-    
-    <p>Junto con saludar, agradeceré a<br>
-    <strong>{deudor_full}</strong><br>
-    usted que pueda confirmar por este medio, la recepción y conformidad de las siguientes facturas electrónicas adjuntas, emitida por nuestro(s) cliente(s), las cuales están siendo cedidas a nuestro Factoring Punto Base Financiero Spa.</p>
-    
-    <div style="background-color: #e8e8e8; padding: 8px 12px; margin: 12px 0; font-weight: bold; font-size: 11pt;">
-        {deudor_full}
-    </div>
-    
-    <table style="border-collapse: collapse; margin: 12px 0;">
-        <thead>
-            <tr style="background-color: #4a6fa5;">
-                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: left; color: #ffffff; font-size: 10pt; font-weight: 600;">Fecha Emisión</th>
-                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: left; color: #ffffff; font-size: 10pt; font-weight: 600;">Rut Emisor</th>
-                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: left; color: #ffffff; font-size: 10pt; font-weight: 600;">Nombre Emisor</th>
-                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: center; color: #ffffff; font-size: 10pt; font-weight: 600;">N° Factura</th>
-                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: left; color: #ffffff; font-size: 10pt; font-weight: 600;">Rut Deudor</th>
-                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: left; color: #ffffff; font-size: 10pt; font-weight: 600;">Nombre Deudor</th>
-                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: right; color: #ffffff; font-size: 10pt; font-weight: 600;">Valor Bruto</th>
-            </tr>
-        </thead>
-        <tbody>
-{rows_html}        </tbody>
-    </table>
-    
-    <p style="font-size: 10pt;">Favor ayudarnos con la siguiente información:<br>
-    -Si mercaderías y/o productos se encuentran recibidos conformes sin observaciones?<br>
-    -Si las facturas se encuentran recibidas?<br>
-    -Existen notas de crédito o algún otro descuento que afecte el pago de estos documentos?<br>
-    -Posible fecha de pago.</p>
-</div>"""
-
-        # Guardar HTML para copiar
-        self.current_html = email_body
-        # Mostrar vista previa como texto
-        self.text_area.config(state=tk.NORMAL)
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(tk.END, self._html_to_preview_text())
-        self.text_area.config(state=tk.DISABLED)
-        
+        # Tamaño de los adjuntos, medido una vez por lote: cada correo queda bajo el límite de Gmail
+        # Los documentos de un mismo EnvioDTE cuentan cada uno con el XML completo (cota conservadora)
+        sources = {item["archivo"]: self.source_path(item["archivo"]) for item in self.parsed_data}
+        sizes = file_sizes({source for source in sources.values() if source not in self.archive_members})
+        # Los miembros de ZIP se miden en memoria (no están en el disco)
+        sizes.update((source, len(self.archive_members[source].data))
+                     for source in sources.values() if source in self.archive_members)
+        self.attachment_sizes = {key: sizes[source] for key, source in sources.items()}
+        total = self._build_emails(0)
+        self.record_history(self.parsed_data)
+        debtors = len({key for key, _, _ in self.debtor_emails})
+        if total > debtors:
+            messagebox.showinfo("Varios correos", f"Los adjuntos pasan de {format_size(ATTACHMENT_BUDGET)} por correo: el lote se repartió en {total} correos ({debtors} deudor(es)).\n\nElige cada correo en \"Correo para\" y copia sus PDFs por separado.")
+        elif total > 1:
+            messagebox.showinfo("Varios deudores", f"El lote tiene facturas de {total} deudores: se generó un correo para cada uno.\n\nElige el deudor en \"Correo para\" antes de copiar.")
+        oversized = [os.path.basename(path) for path, size in self.attachment_sizes.items() if size > ATTACHMENT_BUDGET]
+        if oversized:
+            messagebox.showwarning("Adjunto muy grande", "Estos PDFs pasan solos el límite de adjuntos y no se podrán enviar como adjunto:\n\n" + "\n".join(oversized))
         if errors > 0:
             messagebox.showwarning("Atención", f"Se generó el correo, pero {errors} archivo(s) no pudieron ser leídos.")
 
+    # --- HISTORIAL DE ENVÍOS (ver history.py) ---
+    def _sent_history(self):
+        """Historial de envíos, abierto al primer uso; None si no se pudo abrir"""
+        if self.history is None:
+            try:
+                self.history = SentHistory()
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️  Historial de envíos no disponible: {type(e).__name__}: {e}")
+                self.history = False
+        return self.history or None
+
+    def confirm_repeats(self, items):
+        """Marca las facturas que ya salieron en otro correo; False si el usuario no quiere seguir"""
+        history = self._sent_history()
+        if history is None:
+            return True
+        try:
+            # Una sola consulta para todo el lote; el lote en curso no cuenta (regenerar no avisa)
+            found = history.find_sent(items, exclude_batch=self.history_batch)
+        except sqlite3.Error as e:
+            print(f"⚠️  No se pudo consultar el historial: {type(e).__name__}: {e}")
+            return True
+        repeated = [item for item in items if invoice_key(item) in found]
+        if not repeated:
+            return True
+        for item in repeated:
+            self._set_file_status(item["archivo"], "⚠ Ya enviada", "#e65100")
+        return messagebox.askyesno(
+            "Facturas ya enviadas",
+            f"{len(repeated)} factura(s) ya se incluyeron en un correo anterior:\n\n"
+            + "\n".join(format_repeats(items, found)) + "\n\n¿Generar el correo igual?",
+            icon="warning",
+        )
+
+    def record_history(self, items):
+        """Registra las facturas del correo generado en el historial de envíos"""
+        history = self._sent_history()
+        if history is None:
+            return
+        try:
+            history.record(items, self.history_batch)
+        except sqlite3.Error as e:
+            print(f"⚠️  No se pudo guardar el historial: {type(e).__name__}: {e}")
+
+    def _build_emails(self, index):
+        """Arma los correos por deudor desde parsed_data, muestra el del índice y devuelve cuántos hay"""
+        # --- FORMATO DE CORREO HTML PARA GMAIL (ver email_render.py) ---
+        if self.corrections:
+            self.parsed_data = [{**item, **self.corrections.get(item["archivo"], {})} for item in self.parsed_data]
+        self.debtor_emails = build_debtor_emails(self.parsed_data, self.attachment_sizes)
+        total = len(self.debtor_emails)
+        parts = Counter(key for key, _, _ in self.debtor_emails)
+        labels, seen = [], Counter()
+        for i, (key, records, _) in enumerate(self.debtor_emails, 1):
+            seen[key] += 1
+            part = f" · parte {seen[key]}/{parts[key]}" if parts[key] > 1 else ""
+            size = format_size(batch_size(records, self.attachment_sizes))
+            labels.append(f"{i}/{total} · {records[0]['deudor_nombre']} {records[0]['deudor_rut']} ({len(records)} factura(s), {size}){part}")
+        self.email_selector.config(values=labels)
+        # Al corregir un RUT de deudor pueden cambiar los grupos: el índice puede quedar fuera
+        self.show_email(index if 0 <= index < total else 0)
+        return total
+
+    def show_email(self, index):
+        """Selecciona el correo del deudor y marca sus facturas en la tabla"""
+        if not 0 <= index < len(self.debtor_emails):
+            return
+        _, self.current_records, self.current_html = self.debtor_emails[index]
+        self.email_selector.current(index)
+        iids = [self.table_rows[item["archivo"]][0] for item in self.current_records
+                if item["archivo"] in self.table_rows]
+        self.table.selection_set(iids)
+        if iids:
+            self.table.see(iids[0])
+
+    # --- PORTAPAPELES (en un hilo aparte: ver clipboard.py) ---
+    def _clipboard_job(self, job, on_done):
+        """Corre `job()` fuera del hilo de Tk y llama on_done(resultado, error) al terminar"""
+        if self.clipboard_executor is None:
+            # Un solo hilo: las copias quedan en orden y el backend se crea una vez
+            self.clipboard_executor = ThreadPoolExecutor(max_workers=1)
+        for button in (self.btn_copy, self.btn_copy_pdfs):
+            button.config(state=tk.DISABLED)
+        self._poll_clipboard(self.clipboard_executor.submit(job), on_done)
+
+    def _poll_clipboard(self, future, on_done):
+        if not future.done():
+            self.after(50, self._poll_clipboard, future, on_done)
+            return
+        for button in (self.btn_copy, self.btn_copy_pdfs):
+            button.config(state=tk.NORMAL)
+        error = future.exception()
+        on_done(None if error else future.result(), error)
+
+    def _clipboard_backend(self):
+        """Backend del sistema (se crea en el hilo del portapapeles); None si no hay"""
+        if self.clipboard_backend is None:
+            self.clipboard_backend = get_backend() or False
+        return self.clipboard_backend or None
+
     def copy_to_clipboard(self):
         # Usar el HTML guardado en lugar de obtenerlo del widget
         html = getattr(self, 'current_html', '')
         if len(html) < 5:
             messagebox.showwarning("Aviso", "No hay contenido para copiar. Genera el correo primero.")
             return
-        
-        # Copiar HTML al portapapeles de Windows para que Gmail lo reconozca
-        try:
-            win32clipboard.OpenClipboard()
-            win32clipboard.EmptyClipboard()
-            
-            # Formato CF_HTML para que aplicaciones web lo reconozcan
-            cf_html = self._generate_cf_html(html)
-            win32clipboard.SetClipboardData(win32clipboard.RegisterClipboardFormat("HTML Format"), cf_html.encode('utf-8'))
-            
-            # También copiar como texto plano (fallback)
-            win32clipboard.SetClipboardData(win32clipboard.CF_UNICODETEXT, html)
-            
-            win32clipboard.CloseClipboard()
-            messagebox.showinfo("¡Listo!", "Correo copiado al portapapeles (formato HTML).")
-        except Exception as e:
-            # Fallback a método estándar si falla
+        records = self.current_records
+        # CF_HTML y texto plano del correo ya copiado antes: se reutilizan tal cual
+        cached = self.clipboard_payload
+        payload = cached[1] if cached is not None and cached[0] is html else None
+
+        def job():
+            data = payload or html_payload(html, build_preview_text(records))
+            backend = self._clipboard_backend()
+            if backend is not None:
+                backend.set_html(*data)
+            return data, backend is not None
+
+        def done(result, error):
+            if result is not None:
+                self.clipboard_payload = (html, result[0])
+                if result[1]:
+                    messagebox.showinfo("¡Listo!", "Correo copiado al portapapeles (formato HTML).")
+                    return
+                error = "No hay portapapeles HTML en este equipo."
+            # Fallback al portapapeles de Tk: la misma tabla en texto
             self.clipboard_clear()
-            self.clipboard_append(html)
-            messagebox.showwarning("Copiado", f"Copiado como texto plano. {str(e)}")
-    
-    def _generate_cf_html(self, html):
-        """Genera el formato CF_HTML requerido por Windows"""
-        html_prefix = "<!DOCTYPE html><html><body>"
-        html_suffix = "</body></html>"
-        html_full = html_prefix + html + html_suffix
-        
-        # CF_HTML requiere encabezados específicos
-        template = (
-            "Version:0.9\r\n"
-            "StartHTML:{start_html:09d}\r\n"
-            "EndHTML:{end_html:09d}\r\n"
-            "StartFragment:{start_frag:09d}\r\n"
-            "EndFragment:{end_frag:09d}\r\n"
-            "<html><body>\r\n"
-            "<!--StartFragment-->{fragment}<!--EndFragment-->\r\n"
-            "</body></html>"
-        )
-        
-        fragment = html
-        dummy = template.format(start_html=0, end_html=0, start_frag=0, end_frag=0, fragment=fragment)
-        
-        start_html = dummy.index("<html>")
-        end_html = dummy.index("</html>") + 7
-        start_frag = dummy.index("<!--StartFragment-->") + 20
-        end_frag = dummy.index("<!--EndFragment-->")
-        
-        return template.format(
-            start_html=start_html,
-            end_html=end_html,
-            start_frag=start_frag,
-            end_frag=end_frag,
-            fragment=fragment
-        )
+            self.clipboard_append(result[0][2] if result is not None else build_preview_text(records))
+            messagebox.showwarning("Copiado", f"Copiado como texto plano. {str(error)}")
+
+        self._clipboard_job(job, done)
+
+    def email_attachments(self):
+        """Archivos a adjuntar al correo seleccionado: los de sus facturas, y nada más.
+
+        Sale de current_records (no de la cola): quedan fuera los archivos con
+        error y el XML de una factura que ya se unió con su PDF.
+        """
+        # Los documentos de un EnvioDTE comparten archivo: se adjunta una sola vez
+        return list(dict.fromkeys(self.source_path(item["archivo"]) for item in self.current_records))
 
     def copy_pdfs_to_clipboard(self):
-        """Copia los archivos PDF cargados al portapapeles de Windows (para pegar en Gmail)"""
-        if not self.pdf_files:
-            messagebox.showwarning("Aviso", "No hay archivos PDF cargados.")
+        """Copia los PDFs del correo seleccionado al portapapeles (para pegarlos en Gmail como adjuntos)"""
+        if not self.current_records:
+            messagebox.showwarning("Aviso", "No hay PDFs para adjuntar. Genera el correo primero.")
             return
-        
-        try:
-            # Formato CF_HDROP para copiar archivos al portapapeles
-            # Estructura DROPFILES: https://docs.microsoft.com/en-us/windows/win32/api/shlobj_core/ns-shlobj_core-dropfiles
-            
-            # Crear lista de archivos con rutas absolutas terminadas en null
-            files_str = "\0".join(os.path.abspath(f) for f in self.pdf_files) + "\0\0"
-            files_bytes = files_str.encode('utf-16-le')
-            
-            # Estructura DROPFILES (20 bytes header + files)
-            # pFiles: offset donde empiezan los archivos (20 bytes)
-            # pt.x, pt.y: coordenadas (0, 0)
-            # fNC: non-client area flag (False)
-            # fWide: Unicode flag (True para UTF-16)
-            dropfiles = struct.pack('IIIIi', 20, 0, 0, 0, 1) + files_bytes
-            
-            win32clipboard.OpenClipboard()
-            win32clipboard.EmptyClipboard()
-            win32clipboard.SetClipboardData(win32clipboard.CF_HDROP, dropfiles)
-            win32clipboard.CloseClipboard()
-            
-            count = len(self.pdf_files)
+        pdf_files = self.email_attachments()
+        members = {key: self.archive_members[key] for key in pdf_files if key in self.archive_members}
+
+        def job():
+            backend = self._clipboard_backend()
+            if backend is None:
+                raise RuntimeError("No hay portapapeles de archivos en este equipo.")
+            # Los que vienen de un ZIP se escriben a una carpeta temporal solo ahora, al adjuntarlos
+            backend.set_files(self.attachment_paths(pdf_files, members))
+
+        def done(result, error):
+            if error is not None:
+                messagebox.showerror("Error", f"No se pudieron copiar los archivos:\n{str(error)}")
+                return
+            count = len(pdf_files)
             messagebox.showinfo("¡Listo!", f"{count} archivo(s) PDF copiado(s) al portapapeles.\n\nAhora puedes pegarlos (Ctrl+V) en Gmail como adjuntos.")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudieron copiar los archivos:\n{str(e)}")
+
+        self._clipboard_job(job, done)
+
+    def show_timings(self):
+        """Panel con el resumen de tiempos por etapa y por campo de esta sesión"""
+        if self.timings_window is None or not self.timings_window.winfo_exists():
+            self.timings_window = tk.Toplevel(self)
+            self.timings_window.title("Tiempos de extracción")
+            self.timings_window.geometry("560x480")
+            text = tk.Text(self.timings_window, font=("Consolas", 9), wrap="none", padx=8, pady=8)
+            text.pack(fill=tk.BOTH, expand=True)
+            ttk.Button(self.timings_window, text="Actualizar", command=self.show_timings).pack(pady=6)
+            self.timings_window.text = text
+        summary = timings.summarize(timings.read_log(offset=self.timings_offset))
+        text = self.timings_window.text
+        text.configure(state="normal")
+        text.delete("1.0", tk.END)
+        text.insert("1.0", timings.format_summary(summary))
+        text.configure(state="disabled")
+        self.timings_window.lift()
 
     def preview_html_in_browser(self):
         """Abre el HTML generado en el navegador por defecto para vista previa renderizada"""
@@ -660,37 +1224,15 @@ class NativeInvoiceApp(TkinterDnD.Tk):
             messagebox.showwarning("Aviso", "No hay contenido para previsualizar. Genera el correo primero.")
             return
         
+        # Import diferido: solo los usa la vista previa (precargados tras el arranque)
+        import tempfile
+        import webbrowser
+
         try:
             # Crear archivo temporal HTML
             with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as f:
                 # Escribir HTML completo con estilos
-                full_html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Vista Previa - Correo de Facturas</title>
-    <style>
-        body {{
-            font-family: Arial, sans-serif;
-            padding: 20px;
-            max-width: 900px;
-            margin: 0 auto;
-            background-color: #f5f5f5;
-        }}
-        .email-container {{
-            background-color: white;
-            padding: 30px;
-            border-radius: 8px;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-        }}
-    </style>
-</head>
-<body>
-    <div class="email-container">
-        {html}
-    </div>
-</body>
-</html>"""
+                full_html = build_email_document(html)
                 f.write(full_html)
                 temp_path = f.name
             
@@ -700,35 +1242,8 @@ class NativeInvoiceApp(TkinterDnD.Tk):
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo abrir la vista previa:\n{str(e)}")
 
-    def _html_to_preview_text(self):
-        """Convierte el contenido a texto legible para la vista previa"""
-        if not self.parsed_data:
-            return ""
-
-        header_data = self.parsed_data[0]
-        deudor_full = f"{header_data['deudor_nombre']} {header_data['deudor_rut']}".upper()
-
-        text = "Estimado:\n\n"
-        text += f"Junto con saludar, agradeceré a\n{deudor_full}\nusted que pueda confirmar por este medio, la recepción y conformidad de las siguientes facturas electrónicas adjuntas, emitida por nuestro(s) cliente(s), las cuales están siendo cedidas a nuestro Factoring Punto Base Financiero Spa.\n\n"
-        text += f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-        text += f"  {deudor_full}\n"
-        text += f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-        text += "{:<20} | {:<15} | {:<30} | {:^10} | {:<15} | {:<30} | {:>18}\n".format(
-            'Fecha Emisión', 'Rut Emisor', 'Nombre Emisor', 'N° Factura', 'Rut Deudor', 'Nombre Deudor', 'Valor Bruto Factura'
-        )
-        text += "{:-<20}-+-{:-<15}-+-{:-<30}-+-{:-<10}-+-{:-<15}-+-{:-<30}-+-{:-<18}\n".format('', '', '', '', '', '', '')
-
-        for item in self.parsed_data:
-            text += f"{item.get('fecha_emision','S/I'):<20} | {item.get('emisor_rut','S/I'):<15} | {item.get('emisor_nombre','S/I'):<30} | {item.get('folio',''):^10} | {item.get('deudor_rut','S/I'):<15} | {item.get('deudor_nombre','S/I'):<30} | {item.get('valor_bruto', item.get('monto','0')):>18}\n"
-
-        text += "\n\nFavor ayudarnos con la siguiente información:\n"
-        text += "-Si mercaderías y/o productos se encuentran recibidos conformes sin observaciones?\n"
-        text += "-Si las facturas se encuentran recibidas?\n"
-        text += "-Existen notas de crédito o algún otro descuento que afecte el pago de estos documentos?\n"
-        text += "-Posible fecha de pago.\n"
-
-        return text
-
 if __name__ == "__main__":
+    # Necesario para el pool de procesos en el ejecutable de PyInstaller (Windows)
+    multiprocessing.freeze_support()
     app = NativeInvoiceApp()
     app.mainloop()
\ No newline at end of file
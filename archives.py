@@ -0,0 +1,110 @@
+"""Facturas dentro de archivos ZIP, leídas en memoria (sin descomprimir al disco).
+
+Los proveedores mandan ZIPs con decenas de PDFs (a veces con su XML DTE).
+Cada miembro se lee por bloques a un buffer mientras se calcula su SHA-256:
+el hash sirve para saltar duplicados (el mismo PDF dos veces en el ZIP, o en
+dos ZIPs del mismo lote) y como clave de la caché, sin volver a leer nada.
+Los miembros van al extractor como extractor.MemoryFile; solo se escriben
+al disco (materialize) cuando hay que adjuntarlos.
+
+Cada miembro se identifica como 'proveedor.zip::carpeta/factura.pdf'.
+"""
+import hashlib
+import lzma
+import os
+import zipfile
+import zlib
+
+from extractor import MemoryFile
+
+ARCHIVE_SUFFIXES = (".zip",)
+MEMBER_SUFFIXES = (".pdf", ".xml")
+MEMBER_SEP = "::"
+CHUNK_SIZE = 1 << 20
+# Errores de un miembro dañado o no soportado: se omite ese miembro y se sigue con el resto.
+# BadZipFile: CRC incorrecto; EOFError: datos truncados; zlib.error / LZMAError / OSError (bzip2):
+# datos comprimidos corruptos; NotImplementedError: compresión no soportada (Deflate64...);
+# RuntimeError: miembro cifrado; ValueError: pasa de MAX_MEMBER_BYTES
+MEMBER_ERRORS = (zipfile.BadZipFile, EOFError, zlib.error, lzma.LZMAError, OSError,
+                 NotImplementedError, RuntimeError, ValueError)
+# Un miembro que descomprimido pasa de esto no es una factura (o es un ZIP bomba)
+MAX_MEMBER_BYTES = 100 * 1024 * 1024
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def is_member(key):
+    """True si la clave es la de un miembro de ZIP ('archivo.zip::factura.pdf')"""
+    return MEMBER_SEP in key
+
+
+def member_key(archive_path, name):
+    return f"{archive_path}{MEMBER_SEP}{name}"
+
+
+def read_member(zf, info, chunk_size=CHUNK_SIZE):
+    """(bytes, sha256) del miembro, calculando el hash mientras se descomprime"""
+    h = hashlib.sha256()
+    buffer = bytearray()
+    with zf.open(info) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+            buffer += chunk
+            if len(buffer) > MAX_MEMBER_BYTES:
+                raise ValueError(f"'{info.filename}' pasa de {MAX_MEMBER_BYTES // (1024 * 1024)} MB descomprimido")
+    return bytes(buffer), h.hexdigest()
+
+
+def iter_members(archive_path, seen=None):
+    """MemoryFile de cada PDF/XML del ZIP, en el orden del archivo.
+
+    `seen` (set de hashes) se comparte entre llamadas para saltar también
+    los duplicados de otros ZIPs; los repetidos y los dañados (MEMBER_ERRORS)
+    no se devuelven. Lanza zipfile.BadZipFile u OSError si no se puede abrir
+    el ZIP.
+    """
+    seen = set() if seen is None else seen
+    with zipfile.ZipFile(archive_path) as zf:
+        for info in zf.infolist():
+            name = info.filename
+            # Carpetas y metadatos que agrega el compresor de macOS
+            if info.is_dir() or name.startswith("__MACOSX/") or not name.lower().endswith(MEMBER_SUFFIXES):
+                continue
+            try:
+                data, digest = read_member(zf, info)
+            except MEMBER_ERRORS as e:
+                print(f"⚠️  Se omite '{name}' de {os.path.basename(archive_path)}: {type(e).__name__}: {e}")
+                continue
+            if digest in seen:
+                print(f"⚠️  '{name}' repetido en {os.path.basename(archive_path)}: se omite")
+                continue
+            seen.add(digest)
+            yield MemoryFile(member_key(archive_path, name), data, digest)
+
+
+def unique_path(directory, name, taken):
+    """Ruta libre en `directory` para `name` ('factura (2).pdf' si ya se usó)"""
+    stem, ext = os.path.splitext(name)
+    candidate, n = name, 1
+    while candidate.lower() in taken:
+        n += 1
+        candidate = f"{stem} ({n}){ext}"
+    taken.add(candidate.lower())
+    return os.path.join(directory, candidate)
+
+
+def materialize(members, directory):
+    """Escribe los miembros en `directory` (con su nombre, sin carpetas) y devuelve las rutas"""
+    os.makedirs(directory, exist_ok=True)
+    taken = {name.lower() for name in os.listdir(directory)}
+    paths = []
+    for member in members:
+        # Nombre dentro del ZIP sin carpetas (los ZIP hechos en Windows pueden usar '\\')
+        name = member.name.split(MEMBER_SEP, 1)[1].replace("\\", "/")
+        path = unique_path(directory, os.path.basename(name), taken)
+        with open(path, "wb") as f:
+            f.write(member.data)
+        paths.append(path)
+    return paths
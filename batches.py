@@ -0,0 +1,57 @@
+"""Reparto de las facturas en correos que respetan el límite de adjuntos.
+
+Gmail no acepta más de 25 MB de adjuntos por correo. Antes de armar los
+correos se mide cada PDF una sola vez y las facturas de cada deudor se
+reparten en lotes que no pasan de ATTACHMENT_BUDGET; nunca se mezclan
+deudores en un mismo lote.
+"""
+import os
+
+GMAIL_LIMIT = 25 * 1024 * 1024
+ATTACHMENT_BUDGET = GMAIL_LIMIT - 1024 * 1024  # Margen para el cuerpo HTML del correo
+
+
+def file_sizes(paths):
+    """{ruta: tamaño en bytes} de los archivos (0 si no se pudo leer)"""
+    sizes = {}
+    for path in paths:
+        try:
+            sizes[path] = os.stat(path).st_size
+        except OSError as e:
+            print(f"⚠️  No se pudo medir '{os.path.basename(path)}': {type(e).__name__}: {e}")
+            sizes[path] = 0
+    return sizes
+
+
+def batch_size(items, sizes):
+    """Bytes de adjuntos de un lote de registros (clave 'archivo')"""
+    return sum(sizes.get(item.get("archivo"), 0) for item in items)
+
+
+def pack_batches(items, sizes, budget=ATTACHMENT_BUDGET):
+    """Reparte los registros en lotes de a lo más `budget` bytes de adjuntos.
+
+    First-fit decreasing: los archivos más grandes se ubican primero, cada
+    uno en el primer lote donde cabe. Un archivo que solo ya pasa el
+    presupuesto queda en un lote propio. Los lotes y las facturas dentro de
+    cada uno conservan el orden original.
+    """
+    item_sizes = [sizes.get(item.get("archivo"), 0) for item in items]
+    bins = []  # [bytes usados, índices]
+    for i in sorted(range(len(items)), key=lambda i: -item_sizes[i]):
+        for current in bins:
+            if current[0] + item_sizes[i] <= budget:
+                current[0] += item_sizes[i]
+                current[1].append(i)
+                break
+        else:
+            bins.append([item_sizes[i], [i]])
+    ordered = sorted((sorted(indices) for _, indices in bins), key=lambda indices: indices[0])
+    return [[items[i] for i in indices] for indices in ordered]
+
+
+def format_size(n_bytes):
+    """Tamaño legible: '850 KB', '12.4 MB'"""
+    if n_bytes < 1024 * 1024:
+        return f"{n_bytes / 1024:.0f} KB"
+    return f"{n_bytes / (1024 * 1024):.1f} MB"
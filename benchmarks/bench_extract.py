@@ -0,0 +1,155 @@
+"""Benchmark de extracción de punta a punta sobre el corpus sintético.
+
+Compara el modo serial con el pool de procesos (extractor.extract_batch) y
+reporta archivos/seg, latencia por archivo (p50/p95), RSS máximo y cuántas
+facturas no coinciden con los valores esperados.
+
+    python benchmarks/bench_extract.py [-n 200] [--workers 4] [--backends pdfium,pdfplumber]
+                                       [--annex-pages 39] [--low-memory]
+
+Cada modo corre en un subproceso propio para que el RSS máximo de uno no
+contamine la medición del otro.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import generate_corpus  # noqa: E402
+from extractor import DEFAULT_BACKENDS, default_workers, extract_batch, extract_invoice  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def timed_extract(pdf_path, backends=DEFAULT_BACKENDS):
+    """Extrae un PDF y devuelve (dict, segundos); se ejecuta dentro del worker"""
+    t0 = time.perf_counter()
+    data = extract_invoice(pdf_path, backends)
+    elapsed = time.perf_counter() - t0
+    return (data.to_dict() if data else None), elapsed
+
+
+def _timed_with_backends(args):
+    return timed_extract(*args)
+
+
+def peak_rss_mb():
+    """(RSS máximo del proceso, RSS máximo de sus hijos) en MB; None si no se puede medir"""
+    if resource is None:
+        return None, None
+    # ru_maxrss viene en KB en Linux y en bytes en macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return own, children
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run_mode(mode, corpus, workers, backends, low_memory=False):
+    """Corre un modo sobre el corpus y devuelve las métricas (en el proceso actual)"""
+    paths = [p for p, _ in corpus]
+    t0 = time.perf_counter()
+    if mode == "serial":
+        results = [timed_extract(p, backends) for p in paths]
+    else:
+        results = extract_batch([(p, backends) for p in paths], workers=workers,
+                                extract=_timed_with_backends, low_memory=low_memory)
+    wall = time.perf_counter() - t0
+
+    latencies = [r[1] for r in results if r]
+    mismatches = 0
+    for result, (_, expected) in zip(results, corpus):
+        data = result[0] if result else None
+        if not data or any(data[k] != v for k, v in expected.items()):
+            mismatches += 1
+
+    own_rss, children_rss = peak_rss_mb()
+    return {
+        "mode": mode,
+        "files": len(paths),
+        "workers": 1 if mode == "serial" else workers,
+        "wall_s": wall,
+        "files_per_s": len(paths) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "rss_mb": own_rss,
+        "worker_rss_mb": children_rss,
+        "mismatches": mismatches,
+    }
+
+
+def _format_rss(value):
+    return "n/d" if value is None else f"{value:.1f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del extractor de facturas")
+    parser.add_argument("-n", type=int, default=200, help="facturas del corpus")
+    parser.add_argument("--workers", type=int, default=None, help="procesos del modo paralelo")
+    parser.add_argument("--backends", default=",".join(DEFAULT_BACKENDS),
+                        help="backends de texto en orden (p. ej. pdfplumber)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--modes", default="serial,parallel")
+    parser.add_argument("--corpus-dir", help="reusar/guardar el corpus en este directorio")
+    parser.add_argument("--annex-pages", type=int, default=0, help="páginas de anexo por factura")
+    parser.add_argument("--low-memory", action="store_true", help="pool con tope de memoria y reciclado")
+    parser.add_argument("--json", action="store_true", help="salida JSON (una línea por modo)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    backends = tuple(b for b in args.backends.split(",") if b)
+    workers = args.workers or default_workers(args.n)
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix="facturas_bench_")
+    corpus = generate_corpus(corpus_dir, args.n, args.seed, annex_pages=args.annex_pages)
+
+    if args.child:
+        # Subproceso: un solo modo, resultado como JSON en stdout
+        print(json.dumps(run_mode(args.child, corpus, workers, backends, args.low_memory)))
+        return 0
+
+    results = []
+    for mode in args.modes.split(","):
+        cmd = [sys.executable, os.path.abspath(__file__), "-n", str(args.n), "--seed", str(args.seed),
+               "--workers", str(workers), "--backends", ",".join(backends),
+               "--corpus-dir", corpus_dir, "--annex-pages", str(args.annex_pages), "--child", mode]
+        if args.low_memory:
+            cmd.append("--low-memory")
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    if not args.corpus_dir:
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    if args.json:
+        for r in results:
+            print(json.dumps(r))
+    else:
+        print(f"Corpus: {args.n} facturas de {1 + args.annex_pages} página(s) en {corpus_dir}"
+              f" | backends: {','.join(backends)}{' | low-memory' if args.low_memory else ''}")
+        print(f"{'modo':<10}{'workers':>8}{'arch/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+              f"{'RSS MB':>9}{'RSS wkr':>9}{'errores':>9}")
+        for r in results:
+            print(f"{r['mode']:<10}{r['workers']:>8}{r['files_per_s']:>10.1f}{r['p50_ms']:>10.2f}"
+                  f"{r['p95_ms']:>10.2f}{_format_rss(r['rss_mb']):>9}{_format_rss(r['worker_rss_mb']):>9}"
+                  f"{r['mismatches']:>9}")
+    # Código de salida != 0 si alguna factura no coincide: sirve como chequeo de regresión
+    return 1 if any(r["mismatches"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
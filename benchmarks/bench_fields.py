@@ -0,0 +1,90 @@
+"""Micro-benchmark de la extracción de campos (solo regex, sin abrir PDFs).
+
+Mide el tiempo por factura de extractor.parse_invoice_text sobre textos de
+ejemplo con los formatos que reconocen los patrones. Con --uncompiled cada
+campo se busca como antes de precompilar la tabla: re.search con el patrón
+en texto y sin saltar los patrones cuya palabra clave no aparece, para
+comparar las dos versiones en la misma máquina.
+
+    python benchmarks/bench_fields.py [--iter 2000] [--uncompiled]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import extractor  # noqa: E402
+from extractor import FLAGS, _FIELD_SOURCES, clean_match, parse_invoice_text  # noqa: E402
+
+# Detalle de productos: relleno típico de la primera página
+DETALLE = "".join(
+    f"{i:>3} PRODUCTO CODIGO {1000 + i} UNIDAD {i * 3} 12.500 {i * 37500:,}\n".replace(",", ".")
+    for i in range(1, 25)
+)
+
+SAMPLES = {
+    "estandar": (
+        "R.U.T.: 76.123.456-7\nCOMERCIAL LOS ANDES SPA\nGiro: VENTA AL POR MAYOR\n"
+        "FACTURA ELECTRONICA\nN° 1550\nFecha Emision: 24 de Diciembre del 2025\n"
+        "SEÑOR(ES): DISTRIBUIDORA SUR LIMITADA R.U.T.: 77.987.654-K\n"
+        "Dirección: AV. SIEMPRE VIVA 123\n" + DETALLE + "Total Final $: 1,190,000\n"
+    ),
+    "factura1550": (
+        "SERVICIOS INTEGRALES DEL NORTE SPA\nCasa Matriz: CALLE 1 #200\n"
+        "R.U.T.: 96.555.444-3\nFACTURA ELECTRONICA\nNº 88231\n"
+        "Señor(es):\nINDUSTRIAS DEL PACIFICO SOCIEDAD ANONIMA\nFecha:\n05/11/2025\n"
+        "R.U.T.: 90.222.111-5\n" + DETALLE + "TOTAL $ 32.567.147\n"
+    ),
+    "sin_espacio": (
+        "R.U.T.: 12.345.678-9\nFERRETERIA CENTRAL LIMITADA\nGiro: FERRETERIA\n"
+        "FACTURA ELECTRÓNICA N° 402\nSeñor(es)CONSTRUCTORA ALTAMIRA SPADirección LAS CONDES 45\n"
+        "RUT 76.000.111-2\nFecha: 2025-10-03\n" + DETALLE + "TOTAL: 4,560,300\n"
+    ),
+    "folio_iso": (
+        "AGRICOLA VALLE VERDE SPA\nR.U.T.: 77.111.222-3\nGiro: AGRICOLA\n"
+        "Folio: 9921\nFecha de Emisión: 2025-01-15\n"
+        "SEÑOR(ES) COOPERATIVA LECHERA DEL SUR Giro: LACTEOS R.U.T.: 81.333.444-K\n"
+        + DETALLE + "Total: 845.900\n"
+    ),
+}
+
+
+def search_field_uncompiled(field, text, keywords, default="S/I", first=None):
+    """extractor.search_field sin la tabla compilada ni el filtro por palabra clave"""
+    patterns = _FIELD_SOURCES[field]
+    order = range(len(patterns))
+    if first is not None and 0 <= first < len(patterns):
+        order = [first, *(i for i in order if i != first)]
+    for index in order:
+        match = re.search(patterns[index][0], text, FLAGS)
+        if match:
+            return clean_match(match), index
+    return default, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iter", type=int, default=2000, help="iteraciones por texto")
+    parser.add_argument("--uncompiled", action="store_true",
+                        help="buscar los campos con los patrones en texto (como antes de precompilarlos)")
+    args = parser.parse_args(argv)
+    if args.uncompiled:
+        extractor.search_field = search_field_uncompiled
+
+    total = 0.0
+    for name, text in SAMPLES.items():
+        parse_invoice_text(text)  # calentar la caché de re
+        t0 = time.perf_counter()
+        for _ in range(args.iter):
+            parse_invoice_text(text)
+        elapsed = time.perf_counter() - t0
+        total += elapsed
+        print(f"{name:<12} {elapsed / args.iter * 1e6:8.1f} µs/factura")
+    print(f"{'promedio':<12} {total / (args.iter * len(SAMPLES)) * 1e6:8.1f} µs/factura")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Corpus sintético de facturas DTE (PDF) para tests y benchmarks.
+
+Genera PDFs de una página, con texto real (no imágenes), en los formatos que
+reconocen los patrones de extractor.FIELD_PATTERNS: encabezado estándar con
+'Giro:', formato Factura1550 (nombre del deudor en la línea siguiente),
+'Señor(es)' sin espacio y 'SEÑOR(ES) ... Giro:'; montos con comas o puntos y
+fechas ISO, numéricas o en español. Cada PDF viene con los valores esperados.
+Con --annex-pages se agregan páginas de anexo (texto e imagen) detrás de la
+factura, para medir memoria con PDFs largos.
+
+    python benchmarks/corpus.py DIRECTORIO [-n 100] [--seed 1] [--annex-pages 39]
+"""
+import argparse
+import json
+import os
+import random
+
+MESES = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio",
+         "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+
+EMISORES = ["COMERCIAL LOS ANDES", "SERVICIOS INTEGRALES DEL NORTE", "FERRETERIA CENTRAL",
+            "AGRICOLA VALLE VERDE", "TRANSPORTES RAPIDOS DEL SUR", "INGENIERIA Y MONTAJE AUSTRAL"]
+DEUDORES = ["DISTRIBUIDORA SUR", "INDUSTRIAS DEL PACIFICO", "CONSTRUCTORA ALTAMIRA",
+            "COOPERATIVA LECHERA DEL SUR", "MINERA CERRO BLANCO", "SUPERMERCADOS LA ESTRELLA"]
+SOCIEDADES = ["SPA", "LIMITADA"]
+
+LAYOUTS = ("estandar", "factura1550", "senores_pegado", "senores_giro")
+
+
+# --- Escritura de PDF mínimo (Helvetica, WinAnsiEncoding) ---
+ANNEX_IMAGE_SIZE = 256  # Lado en píxeles de la imagen (gris, sin comprimir) de cada página anexa
+
+
+def _pdf_string(line):
+    escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"(" + escaped.encode("cp1252") + b")"
+
+
+def _text_stream(lines):
+    content = b"BT /F1 9 Tf 40 800 Td 12 TL\n"
+    content += b"".join(_pdf_string(line) + b" Tj T*\n" for line in lines)
+    return content + b"ET"
+
+
+def _stream(content, extra=b""):
+    return b"<< /Length %d%s >>\nstream\n" % (len(content), extra) + content + b"\nendstream"
+
+
+def write_pdf(path, lines, annex_pages=0):
+    """Escribe un PDF con una línea de texto por elemento de `lines` en la primera página.
+
+    `annex_pages` agrega páginas de anexo (detalle de texto y una imagen
+    sin comprimir), como las facturas largas que mandan algunos proveedores.
+    """
+    # Objetos 1-3: catálogo, árbol de páginas y fuente; luego cada página con su contenido
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    kids = []
+
+    def add_page(content, image=None):
+        resources = b"/Font << /F1 3 0 R >>"
+        if image is not None:
+            objects.append(image)
+            resources += b" /XObject << /Im1 %d 0 R >>" % len(objects)
+        objects.append(_stream(content))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842]"
+                       b" /Resources << %s >> /Contents %d 0 R >>" % (resources, len(objects)))
+        kids.append(b"%d 0 R" % len(objects))
+
+    add_page(_text_stream(lines))
+    side = ANNEX_IMAGE_SIZE
+    for number in range(1, annex_pages + 1):
+        pixels = bytes((x * number + y) % 256 for y in range(side) for x in range(side))
+        image = _stream(pixels, b" /Type /XObject /Subtype /Image /Width %d /Height %d"
+                                b" /ColorSpace /DeviceGray /BitsPerComponent 8" % (side, side))
+        annex = [f"ANEXO {number} - DETALLE DE DESPACHO"] + [
+            f"{i} GUIA {number * 1000 + i} BULTOS {i % 7 + 1} RECIBIDO CONFORME" for i in range(1, 50)]
+        add_page(_text_stream(annex) + b"\nq 300 0 0 300 150 150 cm /Im1 Do Q", image)
+
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+# --- Datos aleatorios con formato chileno ---
+def _rut(rng):
+    body = rng.randint(5_000_000, 99_999_999)
+    dv = rng.choice("0123456789K")
+    return f"{body:,}".replace(",", ".") + f"-{dv}"
+
+
+def _amount(rng, sep):
+    return f"{rng.randint(50_000, 90_000_000):,}".replace(",", sep)
+
+
+def _detail(rng):
+    lines = []
+    for i in range(1, rng.randint(5, 20)):
+        qty = rng.randint(1, 40)
+        price = rng.randint(1, 900) * 500
+        lines.append(f"{i} PRODUCTO CODIGO {1000 + i} UN {qty} {price:,} {qty * price:,}".replace(",", "."))
+    return lines
+
+
+def make_invoice(rng, layout):
+    """Devuelve (líneas de texto, valores esperados) para un layout de LAYOUTS"""
+    emisor = f"{rng.choice(EMISORES)} {rng.choice(SOCIEDADES)}"
+    deudor = rng.choice(DEUDORES)
+    emisor_rut, deudor_rut = _rut(rng), _rut(rng)
+    folio = str(rng.randint(1, 999_999))
+    sep = rng.choice([",", "."])
+    monto = _amount(rng, sep)
+    d, m, y = rng.randint(1, 28), rng.randint(1, 12), rng.randint(2023, 2026)
+    expected = {
+        "emisor_nombre": emisor, "emisor_rut": emisor_rut,
+        "deudor_rut": deudor_rut, "folio": folio,
+        "monto": monto.replace(",", "."), "fecha_emision": f"{d:02d}/{m:02d}/{y:04d}",
+    }
+
+    if layout == "estandar":
+        deudor = f"{deudor} {rng.choice(SOCIEDADES)}"
+        fecha = rng.choice([f"{d} de {MESES[m - 1]} del {y}", f"{y}-{m:02d}-{d:02d}", f"{d:02d}/{m:02d}/{y}"])
+        lines = [
+            f"R.U.T.: {emisor_rut}", emisor, "Giro: VENTA AL POR MAYOR", "FACTURA ELECTRONICA",
+            f"N° {folio}", f"Fecha Emision: {fecha}",
+            f"SEÑOR(ES): {deudor} R.U.T.: {deudor_rut}", "Dirección: AVENIDA PRINCIPAL 123",
+            *_detail(rng), f"Total Final $: {monto}",
+        ]
+    elif layout == "factura1550":
+        deudor = f"{deudor} SOCIEDAD ANONIMA"
+        lines = [
+            emisor, "Casa Matriz: CALLE UNO 200", f"R.U.T.: {emisor_rut}", "FACTURA ELECTRONICA",
+            f"Nº {folio}", "Señor(es):", deudor, "Fecha:", f"{d:02d}/{m:02d}/{y}",
+            f"R.U.T.: {deudor_rut}", *_detail(rng), f"TOTAL $ {monto}",
+        ]
+    elif layout == "senores_pegado":
+        deudor = f"{deudor} {rng.choice(SOCIEDADES)}"
+        lines = [
+            f"R.U.T.: {emisor_rut}", emisor, "Giro: SERVICIOS", f"FACTURA ELECTRÓNICA N° {folio}",
+            f"Señor(es){deudor}Dirección LAS CONDES 45", f"RUT {deudor_rut}",
+            f"Fecha: {y}-{m:02d}-{d:02d}", *_detail(rng), f"TOTAL: {monto}",
+        ]
+    elif layout == "senores_giro":
+        deudor = f"{deudor} {rng.choice(SOCIEDADES)}"
+        lines = [
+            emisor, f"R.U.T.: {emisor_rut}", "Giro: AGRICOLA", f"Folio: {folio}",
+            f"Fecha de Emisión: {d} de {MESES[m - 1]} de {y}",
+            f"SEÑOR(ES) {deudor} Giro: COMERCIO R.U.T.: {deudor_rut}",
+            *_detail(rng), f"Total: {monto}",
+        ]
+    else:
+        raise ValueError(f"Layout desconocido: {layout}")
+
+    expected["deudor_nombre"] = deudor
+    return lines, expected
+
+
+def generate_corpus(out_dir, n=len(LAYOUTS), seed=1, layouts=LAYOUTS, annex_pages=0):
+    """Escribe n facturas en out_dir (rotando layouts) y devuelve [(ruta, esperado)]"""
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    corpus = []
+    for i in range(n):
+        layout = layouts[i % len(layouts)]
+        lines, expected = make_invoice(rng, layout)
+        path = os.path.join(out_dir, f"factura_{i:04d}_{layout}.pdf")
+        write_pdf(path, lines, annex_pages)
+        corpus.append((path, expected))
+    return corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera facturas PDF sintéticas")
+    parser.add_argument("out_dir")
+    parser.add_argument("-n", type=int, default=100, help="cantidad de facturas")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--annex-pages", type=int, default=0,
+                        help="páginas de anexo (texto + imagen) por factura, p. ej. 39 para PDFs de 40 páginas")
+    args = parser.parse_args(argv)
+    corpus = generate_corpus(args.out_dir, args.n, args.seed, annex_pages=args.annex_pages)
+    with open(os.path.join(args.out_dir, "esperado.json"), "w", encoding="utf-8") as f:
+        json.dump({os.path.basename(p): e for p, e in corpus}, f, ensure_ascii=False, indent=1)
+    print(f"{len(corpus)} facturas escritas en {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Caché persistente (SQLite) de los datos extraídos de cada factura.
+
+La clave es el hash SHA-256 del contenido del PDF más la huella del
+extractor, así que renombrar o mover un archivo no invalida su entrada,
+pero cambiar los regex sí. Las entradas menos usadas se eliminan cuando
+la caché supera `max_entries`.
+
+Para no pagar una escritura por archivo en lotes grandes, los aciertos se
+acumulan y su last_used se escribe en un solo commit cada TOUCH_BATCH usos
+(o al limpiar o cerrar), y la cantidad de entradas se lleva en memoria: la
+tabla solo se vuelve a contar al pasar el tope, y ahí se borra de una vez
+un EVICT_FRACTION extra para que la limpieza no se repita en cada put.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import timings
+from extractor import MemoryFile, extract_pdf_data, extractor_fingerprint, is_no_text, source_name
+
+DEFAULT_MAX_ENTRIES = 20000
+TOUCH_BATCH = 100      # Aciertos que se acumulan antes de escribir su last_used
+EVICT_FRACTION = 0.05  # Al pasar el tope se borra también esta fracción de max_entries
+
+
+def default_cache_path():
+    """Ruta de la caché en la carpeta de datos locales del usuario"""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") \
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "PDF-Facturas", "facturas_cache.sqlite3")
+
+
+def file_digest(pdf_path, chunk_size=1 << 20):
+    """SHA-256 del contenido del archivo, leído por bloques"""
+    h = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class InvoiceCache:
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path or default_cache_path()
+        self.max_entries = max_entries
+        self.fingerprint = extractor_fingerprint()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Varios workers del pool comparten el archivo: WAL + timeout para esperar al que escribe
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS facturas ("
+            " key TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_facturas_last_used ON facturas(last_used)")
+        self.conn.commit()
+        # Cuántas entradas hay (estimado: los otros workers también insertan) y aciertos sin escribir
+        self.count = len(self)
+        self.touched = {}
+
+    def key_for(self, pdf_path):
+        """Clave de caché: hash del PDF + huella del extractor"""
+        if isinstance(pdf_path, MemoryFile):
+            # PDF en memoria: el hash suele venir calculado desde que se leyó
+            digest = pdf_path.digest or hashlib.sha256(pdf_path.data).hexdigest()
+        else:
+            digest = file_digest(pdf_path)
+        return f"{digest}:{self.fingerprint}"
+
+    def get(self, key):
+        """Devuelve el dict guardado (y lo marca como recién usado) o None"""
+        row = self.conn.execute("SELECT data FROM facturas WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        # Si el proceso termina antes de escribirlos, solo se pierde el orden LRU de esos usos
+        self.touched[key] = time.time()
+        if len(self.touched) >= TOUCH_BATCH:
+            self.flush()
+        return json.loads(row[0])
+
+    def flush(self):
+        """Escribe en un solo commit el last_used de los aciertos acumulados"""
+        if not self.touched:
+            return
+        touched, self.touched = self.touched, {}
+        with self.conn:
+            self.conn.executemany("UPDATE facturas SET last_used = ? WHERE key = ?",
+                                  [(used, key) for key, used in touched.items()])
+
+    def put(self, key, data):
+        """Guarda el dict de una factura y elimina las entradas más antiguas si sobra"""
+        new = self.conn.execute("SELECT 1 FROM facturas WHERE key = ?", (key,)).fetchone() is None
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO facturas (key, data, last_used) VALUES (?, ?, ?)",
+                (key, json.dumps(data, ensure_ascii=False), time.time()),
+            )
+        self.count += new
+        if self.count > self.max_entries:
+            self.evict()
+
+    def evict(self):
+        """Deja la caché bajo max_entries borrando las menos usadas en un solo DELETE"""
+        self.flush()  # El orden LRU tiene que incluir los últimos aciertos
+        with self.conn:
+            # Recuento exacto solo aquí: el estimado no ve lo que insertan los otros workers
+            self.count = len(self)
+            excess = self.count - self.max_entries
+            if excess > 0:
+                cursor = self.conn.execute(
+                    "DELETE FROM facturas WHERE rowid IN "
+                    "(SELECT rowid FROM facturas ORDER BY last_used LIMIT ?)",
+                    (excess + int(self.max_entries * EVICT_FRACTION),),
+                )
+                self.count -= cursor.rowcount
+
+    def purge_stale(self):
+        """Borra las entradas de versiones anteriores del extractor"""
+        with self.conn:
+            cursor = self.conn.execute("DELETE FROM facturas WHERE key NOT LIKE ?", (f"%:{self.fingerprint}",))
+        self.count -= cursor.rowcount
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM facturas").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+# Una conexión por proceso (cada worker del pool abre la suya)
+_caches = {}
+
+
+def get_cache(path=None):
+    path = path or default_cache_path()
+    if path not in _caches:
+        cache = InvoiceCache(path)
+        cache.purge_stale()
+        _caches[path] = cache
+    return _caches[path]
+
+
+def extract_pdf_data_cached(pdf_path, cache_path=None):
+    """extract_pdf_data con caché por contenido; se puede enviar al pool de procesos"""
+    start = time.perf_counter()
+    try:
+        cache = get_cache(cache_path)
+        key = cache.key_for(pdf_path)
+    except (OSError, sqlite3.Error) as e:
+        # Sin caché (disco lleno, archivo bloqueado...): extraer igual
+        print(f"⚠️  Caché no disponible: {type(e).__name__}: {e}")
+        return extract_pdf_data(pdf_path)
+
+    try:
+        data = cache.get(key)
+    except sqlite3.Error as e:
+        print(f"⚠️  No se pudo leer la caché: {type(e).__name__}: {e}")
+        data = None
+    if data is not None:
+        timings.log_event("cache", (time.perf_counter() - start) * 1000, archivo=os.path.basename(source_name(pdf_path)))
+        return data
+
+    # Los perfiles por emisor viven en el mismo archivo (import diferido: profiles importa este módulo)
+    from profiles import get_profiles
+    try:
+        profiles = get_profiles(cache.path)
+    except sqlite3.Error as e:
+        print(f"⚠️  Perfiles de emisor no disponibles: {type(e).__name__}: {e}")
+        profiles = None
+    data = extract_pdf_data(pdf_path, profiles)
+    # No se guardan errores ni PDFs sin texto (el placeholder lleva el nombre del archivo)
+    if data and not is_no_text(data):
+        try:
+            cache.put(key, data)
+        except sqlite3.Error as e:
+            print(f"⚠️  No se pudo guardar en caché: {type(e).__name__}: {e}")
+    return data
@@ -0,0 +1,411 @@
+"""Modo por lotes (sin GUI): extrae facturas y escribe el correo y los datos.
+
+    python cli.py facturas/ "otras/*.pdf" -o salida/ --workers 8
+
+Acepta archivos PDF y XML DTE del SII (también EnvioDTE con varios
+documentos), ZIPs con esos archivos (se leen en memoria, ver archives.py),
+patrones glob y directorios. Escribe en el directorio de
+salida el mismo HTML de correo que arma la aplicación, uno por deudor
+(correo_<rut deudor>.html, en partes si los adjuntos pasan el límite de
+Gmail), y los registros extraídos en facturas.csv / facturas.json.
+
+Con --watch, después de las entradas sigue vigilando los directorios y
+procesa cada tanda de PDFs nuevos en <salida>/lote_<fecha>/ (ver watch.py).
+
+Con --history cada lote se compara con el historial de envíos de la
+aplicación (avisa de las facturas que ya salieron en otro correo) y queda
+registrado en él (ver history.py).
+
+Códigos de salida:
+    0  todos los archivos se leyeron
+    1  algún archivo no se pudo leer (el resto se escribe igual)
+    2  no se encontraron PDFs o no se pudo leer ninguno
+"""
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import re
+import signal
+import sqlite3
+import sys
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import CancelledError, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import fields
+from datetime import datetime
+from xml.etree.ElementTree import ParseError
+
+import timings
+from archives import is_archive, iter_members
+from batches import ATTACHMENT_BUDGET, batch_size, file_sizes, format_size
+from cache import extract_pdf_data_cached
+from dte import is_xml, merge_pdf_and_xml, parse_dte
+from email_render import build_debtor_emails, build_email_document
+from extractor import (
+    LOW_MEMORY_TASKS_PER_CHILD, InvoiceData, MemoryFile, create_pool, default_workers, extract_batch,
+    extract_pdf_data, is_no_text, source_name, warm_pool,
+)
+from history import SentHistory, default_history_path, format_repeats, new_batch_id
+from ocr import ocr_available, ocr_batch
+from profiles import format_stats, get_profiles
+from watch import DEBOUNCE, FolderWatcher
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_NO_DATA = 2
+
+WATCH_TICK = 0.2  # Segundos entre revisiones en modo --watch
+
+CSV_FIELDS = ["archivo"] + [f.name for f in fields(InvoiceData)]
+
+
+def collect_inputs(inputs, recursive=False):
+    """Expande archivos, globs y directorios a una lista de PDFs, XML DTE y ZIPs sin duplicados (en orden)"""
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            if recursive:
+                for root, dirs, files in os.walk(item):
+                    dirs.sort()
+                    found.extend(os.path.join(root, f) for f in sorted(files))
+            else:
+                found.extend(os.path.join(item, f) for f in sorted(os.listdir(item)))
+        elif glob.has_magic(item):
+            # En Windows la consola no expande los comodines: se hace aquí
+            found.extend(sorted(glob.glob(item, recursive=recursive)))
+        else:
+            found.append(item)
+
+    pdfs = []
+    seen = set()
+    for path in found:
+        key = os.path.normcase(os.path.abspath(path))
+        if path.lower().endswith((".pdf", ".xml", ".zip")) and key not in seen:
+            seen.add(key)
+            pdfs.append(path)
+    return pdfs
+
+
+def write_csv(path, rows):
+    # utf-8-sig para que Excel reconozca los acentos
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_json(path, rows, failed):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"facturas": rows, "errores": failed}, f, ensure_ascii=False, indent=2)
+
+
+def write_html(output_dir, parsed_data, budget=ATTACHMENT_BUDGET, known_sizes=None):
+    """Escribe un correo por deudor y devuelve las rutas escritas.
+
+    Si los PDFs de un deudor pasan de `budget` bytes, su correo se reparte
+    en correo_<rut>_parte<N>.html, cada uno con su tabla y sus adjuntos.
+    `known_sizes` trae el tamaño de los archivos que no están en el disco
+    (miembros de ZIP).
+    """
+    known_sizes = known_sizes or {}
+    sizes = file_sizes([item["archivo"] for item in parsed_data if item["archivo"] not in known_sizes])
+    sizes.update(known_sizes)
+    emails = build_debtor_emails(parsed_data, sizes, budget)
+    parts = Counter(key for key, _, _ in emails)
+    seen = Counter()
+    written = []
+    for key, items, html in emails:
+        # 'S/I' y otros caracteres no válidos en nombres de archivo
+        name = f"correo_{re.sub(r'[^0-9A-Za-z-]', '_', key)}"
+        if parts[key] > 1:
+            seen[key] += 1
+            name += f"_parte{seen[key]}"
+            print(f"📎 {name}.html: {len(items)} adjunto(s), {format_size(batch_size(items, sizes))}")
+        path = os.path.join(output_dir, f"{name}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(build_email_document(html))
+        written.append(path)
+    return written
+
+
+def apply_ocr(pdf_files, results):
+    """Reemplaza los registros '[PDF sin texto]' por lo que lea el OCR (en su propio pool)"""
+    scanned = [i for i, data in enumerate(results) if data and is_no_text(data)]
+    if not scanned:
+        return results
+    if not ocr_available():
+        print("⚠️  OCR no disponible: instala pytesseract y Tesseract para leer PDFs escaneados", file=sys.stderr)
+        return results
+    results = list(results)
+    for i, data in zip(scanned, ocr_batch([pdf_files[i] for i in scanned])):
+        if data:
+            results[i] = data
+    return results
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="Procesa facturas PDF por lotes, sin abrir la ventana."
+    )
+    parser.add_argument("inputs", nargs="+", help="archivos PDF, XML DTE o ZIP, patrones glob o directorios")
+    parser.add_argument("-o", "--output-dir", default=".", help="directorio de salida (por defecto: actual)")
+    parser.add_argument("-f", "--formats", default="html,csv,json",
+                        help="salidas separadas por coma: html, csv, json (por defecto: todas)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="procesos en paralelo (por defecto: uno por núcleo; 1 = serial)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="recorrer subdirectorios")
+    parser.add_argument("--no-cache", action="store_true", help="no usar la caché de facturas ya extraídas")
+    parser.add_argument("--stats", action="store_true",
+                        help="mostrar al final los perfiles aprendidos por emisor y su tasa de acierto")
+    parser.add_argument("--ocr", action="store_true",
+                        help="leer con OCR los PDFs escaneados (requiere pytesseract y Tesseract)")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="workers con tope de memoria que se reciclan cada "
+                             f"{LOW_MEMORY_TASKS_PER_CHILD} archivos (para PDFs largos)")
+    parser.add_argument("--attachment-budget", type=float, default=ATTACHMENT_BUDGET / (1024 * 1024),
+                        metavar="MB", help="máximo de adjuntos por correo; sobre eso el correo de un deudor "
+                                           f"se reparte en partes (por defecto: {ATTACHMENT_BUDGET // (1024 * 1024)})")
+    parser.add_argument("--watch", action="store_true",
+                        help="después de procesar las entradas, vigilar los directorios y procesar cada "
+                             "tanda de PDFs nuevos en <salida>/lote_<fecha>/ (Ctrl+C para terminar)")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE, metavar="SEG",
+                        help=f"segundos sin cambios para dar un PDF vigilado por terminado (por defecto: {DEBOUNCE:g})")
+    parser.add_argument("--history", nargs="?", const=default_history_path(), metavar="ARCHIVO",
+                        help="avisar de las facturas que ya salieron en un correo anterior y registrar "
+                             "las de este lote (por defecto, el historial de la aplicación)")
+    parser.add_argument("--timings", metavar="ARCHIVO",
+                        help="registrar los tiempos por etapa de cada factura en ARCHIVO (JSON lines) "
+                             "y mostrar un resumen al final")
+    return parser
+
+
+def read_dte(path):
+    """Documentos de un XML DTE (ruta o MemoryFile); None si no se pudo leer o no trae ninguno"""
+    try:
+        documents = parse_dte(path.open() if isinstance(path, MemoryFile) else path)
+    except (OSError, ParseError) as e:
+        name = os.path.basename(source_name(path))
+        print(f"❌ Error leyendo XML {name}: {type(e).__name__}: {e}", file=sys.stderr)
+        return None
+    return documents or None
+
+
+def expand_archives(files):
+    """Reemplaza cada ZIP por sus PDFs y XML en memoria (MemoryFile), sin repetidos.
+
+    Devuelve (entradas, ZIPs que no se pudieron abrir).
+    """
+    entries = []
+    bad = []
+    seen = set()  # Hashes de los miembros: el mismo PDF en dos ZIPs se lee una vez
+    for path in files:
+        if not is_archive(path):
+            entries.append(path)
+            continue
+        try:
+            entries.extend(iter_members(path, seen))
+        except (OSError, zipfile.BadZipFile) as e:
+            print(f"❌ Error abriendo {os.path.basename(path)}: {type(e).__name__}: {e}", file=sys.stderr)
+            bad.append(path)
+    return entries, bad
+
+
+def split_results(files, results):
+    """(filas con 'archivo', rutas que no se pudieron leer).
+
+    Cada resultado es el dict de un PDF, la lista de documentos de un XML o None.
+    """
+    rows = []
+    failed = []
+    for path, data in zip(files, results):
+        if not data:
+            failed.append(path)
+            continue
+        for item in data if isinstance(data, list) else [data]:
+            rows.append({"archivo": path, **item})
+    return rows, failed
+
+
+def check_history(path, rows):
+    """Avisa de las facturas del lote que ya se enviaron y registra el lote en el historial"""
+    try:
+        history = SentHistory(path)
+        try:
+            found = history.find_sent(rows)
+            for line in format_repeats(rows, found, limit=len(rows)):
+                print(f"⚠️  Ya enviada: {line}", file=sys.stderr)
+            history.record(rows, new_batch_id())
+        finally:
+            history.close()
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️  Historial de envíos no disponible: {type(e).__name__}: {e}", file=sys.stderr)
+
+
+def write_outputs(args, formats, output_dir, rows, failed, known_sizes=None):
+    """Escribe las salidas pedidas en output_dir y devuelve las rutas escritas"""
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    if "html" in formats:
+        written.extend(write_html(output_dir, rows, int(args.attachment_budget * 1024 * 1024), known_sizes))
+    if "csv" in formats:
+        written.append(os.path.join(output_dir, "facturas.csv"))
+        write_csv(written[-1], rows)
+    if "json" in formats:
+        written.append(os.path.join(output_dir, "facturas.json"))
+        write_json(written[-1], rows, failed)
+    return written
+
+
+def report(files, rows, failed, written, output_dir):
+    read = len(files) - len(failed)
+    print(f"✅ {len(rows)} factura(s) extraída(s) de {read}/{len(files)} archivo(s); "
+          f"{len(written)} archivo(s) escritos en {output_dir}")
+    for path in failed:
+        print(f"❌ No se pudo leer: {path}", file=sys.stderr)
+
+
+def future_result(path, future):
+    """Resultado del future; None si el worker falló (se cuenta como archivo con error)"""
+    try:
+        return future.result()
+    except (Exception, CancelledError) as e:
+        # CancelledError: quedó pendiente en un pool roto que se apagó
+        print(f"❌ Error parsing {os.path.basename(path)}: {type(e).__name__}: {e}")
+        return None
+
+
+def start_watch_pool(workers, low_memory):
+    """Pool del modo --watch, con los workers ya levantados"""
+    pool = create_pool(workers, low_memory)
+    # Los workers se levantan con SIGINT ignorado: Ctrl+C lo atiende solo este proceso
+    handler = signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        wait(warm_pool(pool, workers))
+    finally:
+        signal.signal(signal.SIGINT, handler)
+    return pool
+
+
+def restart_watch_pool(pool, workers, low_memory):
+    """Apaga un pool roto (murió un worker) y levanta otro: la vigilancia sigue"""
+    print("⚠️  Murió un worker del pool de extracción: se levanta uno nuevo", file=sys.stderr)
+    pool.shutdown(wait=False, cancel_futures=True)
+    return start_watch_pool(workers, low_memory)
+
+
+def watch_folders(args, formats, extract):
+    """Modo --watch: cada tanda de PDFs nuevos se extrae y se escribe en su propio lote_<fecha>/.
+
+    Los archivos se envían al pool apenas terminan de escribirse (la
+    extracción corre mientras siguen llegando otros); el lote se escribe
+    cuando la tanda dejó de crecer y todas sus extracciones terminaron.
+    """
+    directories = [item for item in args.inputs if os.path.isdir(item)]
+    if not directories:
+        print("❌ --watch necesita al menos un directorio.", file=sys.stderr)
+        return EXIT_NO_DATA
+    watcher = FolderWatcher(directories, recursive=args.recursive, debounce=args.debounce)
+    print(f"👀 Vigilando {', '.join(directories)} ({watcher.method}); Ctrl+C para terminar")
+    batch = []  # (ruta, future, pool que lo corre) de la tanda en curso
+    workers = args.workers or default_workers(os.cpu_count() or 1)
+    pool = start_watch_pool(workers, args.low_memory)
+    try:
+        while True:
+            for path in watcher.poll():
+                try:
+                    future = pool.submit(extract, path)
+                except BrokenProcessPool:
+                    pool = restart_watch_pool(pool, workers, args.low_memory)
+                    future = pool.submit(extract, path)
+                batch.append((path, future, pool))
+            if batch and not watcher.busy() and all(future.done() for _, future, _ in batch):
+                pdf_files = [path for path, _, _ in batch]
+                results = [future_result(path, future) for path, future, _ in batch]
+                broken = {owner for _, future, owner in batch
+                          if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool)}
+                if pool in broken:
+                    # Esos archivos quedan con error; los que lleguen después van a un pool nuevo
+                    pool = restart_watch_pool(pool, workers, args.low_memory)
+                if args.ocr:
+                    results = apply_ocr(pdf_files, results)
+                rows, failed = split_results(pdf_files, results)
+                output_dir = os.path.join(args.output_dir, f"lote_{datetime.now():%Y%m%d_%H%M%S}")
+                if args.history and rows:
+                    check_history(args.history, rows)
+                written = write_outputs(args, formats, output_dir, rows, failed) if rows else []
+                report(pdf_files, rows, failed, written, output_dir)
+                batch = []
+            time.sleep(WATCH_TICK)
+    except KeyboardInterrupt:
+        print("⏹️  Vigilancia detenida")
+    finally:
+        watcher.close()
+        pool.shutdown()
+    return EXIT_OK
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    formats = {f.strip().lower() for f in args.formats.split(",") if f.strip()}
+    unknown = formats - {"html", "csv", "json"}
+    if unknown:
+        print(f"❌ Formato desconocido: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return EXIT_NO_DATA
+
+    if args.timings:
+        # Antes de crear el pool: los workers heredan la variable de entorno
+        os.environ[timings.LOG_ENV] = os.path.abspath(args.timings)
+        timings_offset = timings.log_size()
+    extract = extract_pdf_data if args.no_cache else extract_pdf_data_cached
+
+    files = collect_inputs(args.inputs, args.recursive)
+    if not files and not args.watch:
+        print("❌ No se encontraron archivos PDF, XML ni ZIP.", file=sys.stderr)
+        return EXIT_NO_DATA
+
+    failed = []
+    if files:
+        # Los ZIP se leen en memoria; sus miembros siguen como cualquier otro archivo
+        entries, bad_archives = expand_archives(files)
+        names = [source_name(entry) for entry in entries]
+        # Los XML DTE se leen aquí mismo (es rápido); los PDFs van al pool
+        pdf_entries = [entry for entry in entries if not is_xml(source_name(entry))]
+        results = extract_batch(pdf_entries, workers=args.workers, extract=extract, low_memory=args.low_memory)
+        if args.ocr:
+            results = apply_ocr(pdf_entries, results)
+        by_name = {source_name(entry): data for entry, data in zip(pdf_entries, results)}
+        rows, failed = split_results(
+            names, [by_name[name] if name in by_name else read_dte(entry) for name, entry in zip(names, entries)])
+        failed.extend(bad_archives)
+        # PDF y XML de la misma factura: un solo registro, con los datos del XML
+        rows = merge_pdf_and_xml(rows)
+        if not rows:
+            print(f"❌ No se pudieron leer datos de los {len(names) + len(bad_archives)} archivo(s).", file=sys.stderr)
+            if not args.watch:
+                return EXIT_NO_DATA
+        else:
+            if args.history:
+                check_history(args.history, rows)
+            member_sizes = {entry.name: len(entry.data) for entry in entries if isinstance(entry, MemoryFile)}
+            written = write_outputs(args, formats, args.output_dir, rows, failed, member_sizes)
+            report(names + bad_archives, rows, failed, written, args.output_dir)
+
+    if args.watch:
+        code = watch_folders(args, formats, extract)
+        if code != EXIT_OK:
+            return code
+    if args.stats:
+        print(format_stats(get_profiles().stats()))
+    if args.timings:
+        print(timings.format_summary(timings.summarize(timings.read_log(offset=timings_offset))))
+    return EXIT_PARTIAL if failed else EXIT_OK
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""Portapapeles intercambiable para copiar el correo y los PDFs adjuntos.
+
+Backends:
+
+    win32    pywin32: 'HTML Format' (CF_HTML) + texto plano, y CF_HDROP para archivos
+    xclip    Linux/X11: text/html y text/uri-list con el comando xclip
+    memoria  guarda lo copiado en el objeto (tests y equipos sin escritorio)
+
+get_backend() elige el primero disponible (o el de FACTURAS_CLIPBOARD).
+Las funciones de este módulo no tocan Tk: la app las corre en un hilo aparte
+para no congelar la ventana con correos grandes o cientos de adjuntos.
+"""
+import os
+import shutil
+import struct
+import subprocess
+import time
+from pathlib import Path
+
+from email_render import build_cf_html
+
+BACKEND_ENV = "FACTURAS_CLIPBOARD"
+OPEN_RETRIES = 10     # Otro programa puede tener el portapapeles abierto un instante
+RETRY_DELAY = 0.05    # Segundos entre intentos
+XCLIP_TIMEOUT = 10
+
+
+# --- Contenido a copiar ---
+def html_payload(html, text):
+    """(fragmento HTML en UTF-8, CF_HTML, texto plano): el HTML se codifica una sola vez"""
+    fragment = html.encode("utf-8")
+    return fragment, build_cf_html(fragment), text
+
+
+def build_dropfiles(paths):
+    """Estructura DROPFILES de CF_HDROP con las rutas absolutas en UTF-16.
+
+    https://docs.microsoft.com/en-us/windows/win32/api/shlobj_core/ns-shlobj_core-dropfiles
+    pFiles = 20 (los archivos van después del encabezado), pt = (0, 0),
+    fNC = 0 y fWide = 1 (rutas Unicode); la lista termina en doble null.
+    """
+    files = "".join(os.path.abspath(p) + "\0" for p in paths) + "\0"
+    return struct.pack("IIIIi", 20, 0, 0, 0, 1) + files.encode("utf-16-le")
+
+
+# --- Backends ---
+class MemoryClipboard:
+    """Portapapeles en memoria: guarda el último contenido copiado"""
+    name = "memoria"
+
+    def __init__(self):
+        self.fragment = self.cf_html = self.text = None
+        self.files = []
+
+    def set_html(self, fragment, cf_html, text):
+        self.fragment, self.cf_html, self.text = fragment, cf_html, text
+
+    def set_files(self, paths):
+        self.files = [os.path.abspath(p) for p in paths]
+
+
+class Win32Clipboard:
+    """Portapapeles de Windows (pywin32)"""
+    name = "win32"
+
+    def __init__(self):
+        import win32clipboard
+
+        self.win32 = win32clipboard
+        self.html_format = win32clipboard.RegisterClipboardFormat("HTML Format")
+
+    def _open(self):
+        for attempt in range(OPEN_RETRIES):
+            try:
+                self.win32.OpenClipboard()
+                return
+            except Exception:  # pywintypes.error: lo tiene abierto otro programa
+                if attempt == OPEN_RETRIES - 1:
+                    raise
+                time.sleep(RETRY_DELAY)
+
+    def _set(self, *formats):
+        self._open()
+        try:
+            self.win32.EmptyClipboard()
+            for fmt, data in formats:
+                self.win32.SetClipboardData(fmt, data)
+        finally:
+            self.win32.CloseClipboard()
+
+    def set_html(self, fragment, cf_html, text):
+        # También texto plano (fallback): la misma tabla en texto, no el HTML crudo
+        self._set((self.html_format, cf_html), (self.win32.CF_UNICODETEXT, text))
+
+    def set_files(self, paths):
+        self._set((self.win32.CF_HDROP, build_dropfiles(paths)))
+
+
+class XclipClipboard:
+    """Portapapeles de X11 con xclip (un solo formato por copia)"""
+    name = "xclip"
+
+    def __init__(self):
+        if shutil.which("xclip") is None:
+            raise RuntimeError("xclip no está instalado")
+
+    def _run(self, target, data):
+        subprocess.run(["xclip", "-selection", "clipboard", "-t", target],
+                       input=data, check=True, timeout=XCLIP_TIMEOUT)
+
+    def set_html(self, fragment, cf_html, text):
+        # Los navegadores pegan text/html con formato; el CF_HTML es solo de Windows
+        self._run("text/html", fragment)
+
+    def set_files(self, paths):
+        uris = "\n".join(Path(os.path.abspath(p)).as_uri() for p in paths)
+        self._run("text/uri-list", uris.encode("utf-8"))
+
+
+BACKENDS = {
+    "win32": Win32Clipboard,
+    "xclip": XclipClipboard,
+    "memoria": MemoryClipboard,
+}
+
+
+def get_backend(name=None):
+    """Backend pedido (o en FACTURAS_CLIPBOARD); si no, el primero del sistema. None si no hay"""
+    name = name or os.environ.get(BACKEND_ENV)
+    if name:
+        return BACKENDS[name]()
+    for backend in (Win32Clipboard, XclipClipboard):
+        try:
+            return backend()
+        except (ImportError, RuntimeError):
+            continue
+    return None
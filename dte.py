@@ -0,0 +1,132 @@
+"""Lectura directa del XML de los DTE del SII (sin pasar por el PDF).
+
+El XML del DTE trae los datos oficiales de la factura: no hay texto que
+adivinar ni cadena de patrones. Se lee en streaming (iterparse), así un
+EnvioDTE con cientos de documentos no se carga entero en memoria; cada
+<Documento> da un registro con la misma forma que extract_pdf_data.
+Si llegan el PDF y el XML de la misma factura, merge_pdf_and_xml los une.
+
+Los nombres de etiqueta se comparan sin espacio de nombres: sirven el
+DTE suelto, el EnvioDTE del SII y las variantes sin xmlns de algunos ERP.
+"""
+import xml.etree.ElementTree as ET
+
+from extractor import InvoiceData, format_fecha, invoice_key
+
+XML_BACKEND = "xml"
+
+# Elementos que encierran un documento tributario dentro del DTE
+DOCUMENT_TAGS = {"Documento", "Exportaciones", "Liquidacion"}
+
+# Etiqueta del DTE -> campo de InvoiceData (vale la primera que aparece en el documento)
+FIELD_TAGS = {
+    "RUTEmisor": "emisor_rut",
+    "RznSoc": "emisor_nombre",
+    "RznSocEmisor": "emisor_nombre",  # Boletas
+    "RUTRecep": "deudor_rut",
+    "RznSocRecep": "deudor_nombre",
+    "Folio": "folio",
+    "FchEmis": "fecha_emision",
+    "MntTotal": "monto",
+}
+
+
+def local_name(tag):
+    """'{http://www.sii.cl/SiiDte}Folio' -> 'Folio'"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def format_rut(rut):
+    """'76123456-k' -> '76.123.456-K' (como aparece en el PDF)"""
+    body, _, dv = rut.strip().upper().replace(".", "").partition("-")
+    if not body.isdigit() or not dv:
+        return rut.strip()
+    return f"{int(body):,}".replace(",", ".") + "-" + dv
+
+
+def format_amount(amount):
+    """'1190000' -> '1.190.000' (MntTotal es un entero sin separadores)"""
+    amount = amount.strip()
+    if not amount.isdigit():
+        return amount or "0"
+    return f"{int(amount):,}".replace(",", ".")
+
+
+def build_invoice(found):
+    """InvoiceData desde los valores de las etiquetas de un documento"""
+    data = InvoiceData(
+        emisor_nombre=found.get("emisor_nombre") or "EMISOR DESCONOCIDO",
+        emisor_rut=format_rut(found["emisor_rut"]) if found.get("emisor_rut") else "S/I",
+        deudor_nombre=found.get("deudor_nombre") or "S/I",
+        deudor_rut=format_rut(found["deudor_rut"]) if found.get("deudor_rut") else "S/I",
+        folio=found.get("folio") or "0",
+        monto=format_amount(found.get("monto", "")),
+        fecha_emision=format_fecha(found.get("fecha_emision") or "S/I"),
+        backend=XML_BACKEND,
+    )
+    data.valor_bruto = data.monto
+    return data
+
+
+def iter_dte(source):
+    """Un InvoiceData por cada documento del XML (ruta o archivo abierto).
+
+    Lanza xml.etree.ElementTree.ParseError si el XML está mal formado.
+    """
+    found = {}
+    depth = 0  # > 0 mientras se está dentro de un documento
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        name = local_name(elem.tag)
+        if event == "start":
+            if name in DOCUMENT_TAGS:
+                if depth == 0:
+                    found = {}
+                depth += 1
+            continue
+        if depth and name in FIELD_TAGS:
+            found.setdefault(FIELD_TAGS[name], (elem.text or "").strip())
+        elif name in DOCUMENT_TAGS:
+            depth -= 1
+            if depth == 0:
+                yield build_invoice(found)
+                # Liberar el documento ya leído (detalle, CAF, timbre...)
+                elem.clear()
+        elif depth == 0 and name == "DTE":
+            elem.clear()  # La firma de cada DTE del envío
+
+
+def parse_dte(source):
+    """Lista de dicts (mismo formato que extract_pdf_data), uno por documento"""
+    return [data.to_dict() for data in iter_dte(source)]
+
+
+def is_xml(path):
+    return path.lower().endswith(".xml")
+
+
+def merge_pdf_and_xml(rows):
+    """Une el PDF y el XML de un mismo documento (mismo emisor y folio) en un solo registro.
+
+    Los datos salen del XML (son los oficiales) y 'archivo' del PDF, que es
+    lo que se adjunta al correo. Dos PDFs o dos XML del mismo folio se dejan
+    tal cual. "Mismo documento" es extractor.invoice_key, como en el historial.
+    """
+    merged = []
+    index = {}  # invoice_key -> posición en merged
+    for row in rows:
+        key = invoice_key(row)
+        if key is None:
+            merged.append(row)
+            continue
+        if key not in index:
+            index[key] = len(merged)
+            merged.append(row)
+            continue
+        first = merged[index[key]]
+        kinds = {first.get("backend") == XML_BACKEND, row.get("backend") == XML_BACKEND}
+        if kinds != {True, False}:
+            merged.append(row)
+            continue
+        xml, pdf = (first, row) if first.get("backend") == XML_BACKEND else (row, first)
+        merged[index[key]] = {**xml, "archivo": pdf["archivo"]}
+    return merged
@@ -0,0 +1,241 @@
+"""Armado del correo de confirmación de facturas (HTML para Gmail y texto plano).
+
+No depende de la GUI: lo usan la aplicación Tk y el modo por lotes (cli.py).
+Cada correo va dirigido a un solo deudor: group_by_debtor separa un lote
+mixto en un grupo por RUT de deudor.
+"""
+import io
+import time
+from html import escape
+
+import timings
+from batches import ATTACHMENT_BUDGET, pack_batches
+
+
+def debtor_key(rut):
+    """RUT de deudor normalizado para agrupar ('77.987.654-k' == '77987654-K')"""
+    return rut.replace(".", "").replace(" ", "").upper()
+
+
+def group_by_debtor(parsed_data):
+    """Agrupa los registros por RUT del deudor, en orden de primera aparición.
+
+    Una sola pasada con un dict: sirve igual para miles de facturas repartidas
+    entre cientos de deudores. Las facturas sin RUT de deudor quedan juntas
+    en el grupo 'S/I'.
+    """
+    groups = {}
+    for item in parsed_data:
+        groups.setdefault(debtor_key(item.get('deudor_rut', 'S/I')), []).append(item)
+    return groups
+
+
+def build_debtor_emails(parsed_data, sizes=None, budget=ATTACHMENT_BUDGET):
+    """Lista de (clave del deudor, registros, HTML del correo), un correo por deudor.
+
+    Con `sizes` ({ruta: bytes}, ver batches.file_sizes) las facturas de cada
+    deudor se reparten en varios correos seguidos, con la misma clave, para
+    que los adjuntos de cada uno no pasen de `budget`.
+    """
+    start = time.perf_counter()
+    emails = []
+    for key, items in group_by_debtor(parsed_data).items():
+        for batch in (pack_batches(items, sizes, budget) if sizes is not None else [items]):
+            emails.append((key, batch, build_email_html(batch)))
+    timings.log_event("render", (time.perf_counter() - start) * 1000,
+                      facturas=len(parsed_data), correos=len(emails))
+    return emails
+
+
+# --- Columnas del correo ---
+# Orden: Fecha Emisión, Rut Emisor, Nombre Emisor, N° Factura, Rut Deudor, Nombre Deudor, Valor Bruto
+def row_values(item):
+    """Valores de las columnas del correo para una factura (el mismo para HTML y texto)"""
+    return (
+        item.get('fecha_emision', 'S/I'),
+        item.get('emisor_rut', 'S/I'),
+        item.get('emisor_nombre', 'S/I'),
+        item.get('folio', ''),
+        item.get('deudor_rut', 'S/I'),
+        item.get('deudor_nombre', 'S/I'),
+        item.get('valor_bruto', item.get('monto', '0')),
+    )
+
+
+def debtor_header(parsed_data):
+    """'NOMBRE RUT' del deudor del correo (todas las facturas son del mismo deudor)"""
+    header_data = parsed_data[0]
+    return f"{header_data['deudor_nombre']} {header_data['deudor_rut']}".upper()
+
+
+# --- Plantillas (se arman una vez al importar; cada fila es una sola sustitución) ---
+# La fila HTML usa '%s': con una plantilla tan larga es el doble de rápido que str.format
+# --- FORMATO DE CORREO HTML PARA GMAIL: HTML inline listo para copiar/pegar ---
+_HTML_HEAD = """<div style="font-family: Arial, sans-serif; font-size: 11pt; line-height: 1.5;">
+    <p>Estimado:</p>
+    
+    <p>Junto con saludar, agradeceré a<br>
+    <strong>{deudor}</strong><br>
+    usted que pueda confirmar por este medio, la recepción y conformidad de las siguientes facturas electrónicas adjuntas, emitida por nuestro(s) cliente(s), las cuales están siendo cedidas a nuestro Factoring Punto Base Financiero Spa.</p>
+    
+    <div style="background-color: #e8e8e8; padding: 8px 12px; margin: 12px 0; font-weight: bold; font-size: 11pt;">
+        {deudor}
+    </div>
+    
+    <table style="border-collapse: collapse; margin: 12px 0;">
+        <thead>
+            <tr style="background-color: #4a6fa5;">
+                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: left; color: #ffffff; font-size: 10pt; font-weight: 600;">Fecha Emisión</th>
+                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: left; color: #ffffff; font-size: 10pt; font-weight: 600;">Rut Emisor</th>
+                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: left; color: #ffffff; font-size: 10pt; font-weight: 600;">Nombre Emisor</th>
+                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: center; color: #ffffff; font-size: 10pt; font-weight: 600;">N° Factura</th>
+                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: left; color: #ffffff; font-size: 10pt; font-weight: 600;">Rut Deudor</th>
+                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: left; color: #ffffff; font-size: 10pt; font-weight: 600;">Nombre Deudor</th>
+                <th style="border: 1px solid #cccccc; padding: 5px 8px; text-align: right; color: #ffffff; font-size: 10pt; font-weight: 600;">Valor Bruto</th>
+            </tr>
+        </thead>
+        <tbody>
+"""
+
+_HTML_ROW = """    <tr>
+        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt;">%s</td>
+        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt;">%s</td>
+        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt;">%s</td>
+        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt; text-align: center;">%s</td>
+        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt;">%s</td>
+        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt;">%s</td>
+        <td style="border: 1px solid #cccccc; padding: 4px 6px; font-size: 10pt; text-align: right;">%s</td>
+    </tr>
+"""
+
+_HTML_TAIL = """        </tbody>
+    </table>
+    
+    <p style="font-size: 10pt;">Favor ayudarnos con la siguiente información:<br>
+    -Si mercaderías y/o productos se encuentran recibidos conformes sin observaciones?<br>
+    -Si las facturas se encuentran recibidas?<br>
+    -Existen notas de crédito o algún otro descuento que afecte el pago de estos documentos?<br>
+    -Posible fecha de pago.</p>
+</div>"""
+
+_TEXT_RULE = "━" * 72 + "\n"
+
+_TEXT_HEAD = (
+    "Estimado:\n\n"
+    "Junto con saludar, agradeceré a\n{deudor}\nusted que pueda confirmar por este medio, la recepción y conformidad de las siguientes facturas electrónicas adjuntas, emitida por nuestro(s) cliente(s), las cuales están siendo cedidas a nuestro Factoring Punto Base Financiero Spa.\n\n"
+    + _TEXT_RULE + "  {deudor}\n" + _TEXT_RULE + "\n"
+    + "{:<20} | {:<15} | {:<30} | {:^10} | {:<15} | {:<30} | {:>18}\n".format(
+        'Fecha Emisión', 'Rut Emisor', 'Nombre Emisor', 'N° Factura', 'Rut Deudor', 'Nombre Deudor', 'Valor Bruto Factura'
+    )
+    + "{:-<20}-+-{:-<15}-+-{:-<30}-+-{:-<10}-+-{:-<15}-+-{:-<30}-+-{:-<18}\n".format('', '', '', '', '', '', '')
+)
+
+_text_row = "{0:<20} | {1:<15} | {2:<30} | {3:^10} | {4:<15} | {5:<30} | {6:>18}\n".format
+
+_TEXT_TAIL = (
+    "\n\nFavor ayudarnos con la siguiente información:\n"
+    "-Si mercaderías y/o productos se encuentran recibidos conformes sin observaciones?\n"
+    "-Si las facturas se encuentran recibidas?\n"
+    "-Existen notas de crédito o algún otro descuento que afecte el pago de estos documentos?\n"
+    "-Posible fecha de pago.\n"
+)
+
+
+def render_email_html(parsed_data, out):
+    """Escribe el HTML del correo en `out` (StringIO, archivo...) fila por fila.
+
+    Los valores extraídos del PDF se escapan: un nombre con '&' o '<' no
+    rompe la tabla.
+    """
+    write = out.write
+    write(_HTML_HEAD.format(deudor=escape(debtor_header(parsed_data))))
+    for item in parsed_data:
+        write(_HTML_ROW % tuple(escape(str(value)) for value in row_values(item)))
+    write(_HTML_TAIL)
+
+
+def render_preview_text(parsed_data, out):
+    """Escribe el correo como texto plano (vista previa / portapapeles) en `out`"""
+    write = out.write
+    write(_TEXT_HEAD.format(deudor=debtor_header(parsed_data)))
+    for item in parsed_data:
+        write(_text_row(*row_values(item)))
+    write(_TEXT_TAIL)
+
+
+def build_email_html(parsed_data):
+    """Genera el HTML inline del correo, listo para copiar/pegar en Gmail"""
+    buffer = io.StringIO()
+    render_email_html(parsed_data, buffer)
+    return buffer.getvalue()
+
+
+def build_email_document(html):
+    """Envuelve el HTML del correo en un documento completo (vista previa / archivo .html)"""
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Vista Previa - Correo de Facturas</title>
+    <style>
+        body {{
+            font-family: Arial, sans-serif;
+            padding: 20px;
+            max-width: 900px;
+            margin: 0 auto;
+            background-color: #f5f5f5;
+        }}
+        .email-container {{
+            background-color: white;
+            padding: 30px;
+            border-radius: 8px;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
+        }}
+    </style>
+</head>
+<body>
+    <div class="email-container">
+        {html}
+    </div>
+</body>
+</html>"""
+
+
+def build_preview_text(parsed_data):
+    """Convierte el contenido a texto legible para la vista previa"""
+    if not parsed_data:
+        return ""
+    buffer = io.StringIO()
+    render_preview_text(parsed_data, buffer)
+    return buffer.getvalue()
+
+
+# --- Portapapeles de Windows (CF_HTML) ---
+_CF_HEADER = (
+    "Version:0.9\r\n"
+    "StartHTML:{0:09d}\r\n"
+    "EndHTML:{1:09d}\r\n"
+    "StartFragment:{2:09d}\r\n"
+    "EndFragment:{3:09d}\r\n"
+)
+# Los offsets tienen ancho fijo (9 dígitos), así que el largo del encabezado no depende de ellos
+_CF_HEADER_LEN = len(_CF_HEADER.format(0, 0, 0, 0))
+_CF_PREFIX = b"<html><body>\r\n<!--StartFragment-->"
+_CF_SUFFIX = b"<!--EndFragment-->\r\n</body></html>"
+
+
+def build_cf_html(fragment):
+    """Formato CF_HTML ('HTML Format') en UTF-8, listo para SetClipboardData.
+
+    Los offsets del encabezado son posiciones en bytes: se suman los largos
+    de cada parte en vez de renderizar el documento dos veces. Acepta el
+    fragmento ya codificado (bytes) para no volver a codificarlo.
+    """
+    if isinstance(fragment, str):
+        fragment = fragment.encode("utf-8")
+    start_html = _CF_HEADER_LEN
+    start_frag = start_html + len(_CF_PREFIX)
+    end_frag = start_frag + len(fragment)
+    end_html = end_frag + len(_CF_SUFFIX)
+    header = _CF_HEADER.format(start_html, end_html, start_frag, end_frag).encode("ascii")
+    return b"".join((header, _CF_PREFIX, fragment, _CF_SUFFIX))
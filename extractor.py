@@ -0,0 +1,579 @@
+"""Motor de extracción de facturas (sin GUI).
+
+Se puede usar desde la aplicación Tk, desde scripts o desde workers en
+servidores sin pantalla: no importa tkinter ni win32clipboard.
+"""
+import hashlib
+import importlib
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+
+import timings
+
+# Subir al cambiar la lógica de extracción de forma que los regex no lo reflejen
+EXTRACTOR_VERSION = 3
+
+
+# --- Registro tipado de una factura ---
+@dataclass
+class InvoiceData:
+    emisor_nombre: str = "EMISOR DESCONOCIDO"
+    emisor_rut: str = "S/I"
+    deudor_nombre: str = "S/I"
+    deudor_rut: str = "S/I"
+    folio: str = "0"
+    monto: str = "0"
+    fecha_emision: str = "S/I"
+    valor_bruto: str = "0"
+    backend: str = ""  # Backend de texto que resolvió la factura (ver TEXT_BACKENDS)
+
+    def to_dict(self):
+        """Devuelve el registro como dict (formato usado por la GUI)"""
+        return asdict(self)
+
+
+# --- Patrones precompilados (se compilan una vez al importar el módulo) ---
+FLAGS = re.IGNORECASE | re.DOTALL
+WS_RE = re.compile(r'\s+')
+# RUT con dígito verificador. El prefijo opcional 'R.U.T.:' de los patrones
+# originales no cambia qué RUTs se encuentran, así que se busca solo el número.
+RUT_RE = re.compile(r"(\d{1,3}(?:\.\d{3}){1,2}-\s*[\dkK])")
+
+# Palabras clave que se buscan una vez en el texto en mayúsculas (str.find, en C).
+# Un patrón de campo solo se prueba si su palabra clave aparece en el texto.
+KEYWORDS = {
+    "senor": ("SEÑOR",),
+    "total": ("TOTAL",),
+    "fecha": ("FECHA",),
+    "folio": ("FOLIO",),
+    "electr": ("ELECTR",),
+    "giro": ("GIRO",),
+    "numero": ("N°", "Nº"),
+}
+
+# Tabla de campos: lista ordenada de (patrón, palabra clave requerida o None).
+# El orden es la cadena de respaldo: gana el primer patrón que hace match.
+# Aquí en texto; FIELD_PATTERNS (abajo) es la misma tabla compilada.
+_FIELD_SOURCES = {
+    # Emisor nombre: línea después del primer RUT, antes de Giro
+    "emisor_nombre": [
+        (r"R\.U\.T\.?:?\s*[\d\.\-\s]+[kK]?\s*\n\s*([A-ZÁÉÍÓÚÑ][A-ZÁÉÍÓÚÑ\s\.\-]+?)\s*\n\s*Giro:", "giro"),  # Patrón principal
+        (r"^([A-ZÁÉÍÓÚÑ][A-Z\sÁÉÍÓÚÑ\.\-]+?SPA)\s*\n", None),  # Fallback: línea que termine en SPA
+        (r"^([A-ZÁÉÍÓÚÑ][A-Z\sÁÉÍÓÚÑ\.\-]+?LIMITADA)\s*\n", None),  # Fallback: línea que termine en LIMITADA
+    ],
+    # Deudor nombre: múltiples patrones
+    "deudor_nombre": [
+        (r"Señor\(es\):[^\n]*\n([A-Z][A-ZÁÉÍÓÚÑ\s\.\-]+?SOCIEDAD\s+ANONIMA)", "senor"),  # Formato Factura1550: nombre en línea siguiente
+        (r"Señor\(es\)([A-Z][A-ZÁÉÍÓÚÑ\s\.\-]+?)(?:Direcci[oó]n|RUT\s|R\.U\.T\.?:|\n.*?RUT\s)", "senor"),  # Sin espacio después de ()
+        (r"SEÑOR\(ES\)[:\s]*([A-Z][A-ZÁÉÍÓÚÑ\s\.\-]+?)(?:\s+R\.U\.T\.?:|Direcci[oó]n:|\n.*?R\.U\.T\.?:)", "senor"),
+        (r"Señor\(es\)[:\s]+([A-Z][A-ZÁÉÍÓÚÑ\s\.\-]+?)(?:\s+Giro\s*:|R\.U\.T\.?:|Direcci[oó]n:|\n.*?Giro\s*:)", "senor"),
+    ],
+    # Folio: múltiples formatos
+    "folio": [
+        (r"(?:FACTURA\s+ELECTR[OÓ]NICA|ELECTRONICA)\s*\n\s*N[°º]?\s*(\d+)", "electr"),  # Folio en línea separada
+        (r"(?:N[°º]|Nº)\s*(\d+)", "numero"),
+        (r"Folio[:\s]*(\d+)", "folio"),
+    ],
+    # Monto total (soporta comas y puntos). Con IGNORECASE 'Total Final' y
+    # 'TOTAL FINAL' eran el mismo patrón: queda uno por variante.
+    "monto": [
+        (r"Total\s+Final[\s\$]*:?\s*\$?\s*([\d\.,]+)", "total"),
+        (r"(?<!SUB)TOTAL[\s\$]*:?\s*\$?\s*([\d\.,]+)", "total"),  # No el 'TOTAL' de 'SUBTOTAL'
+    ],
+    # Fecha emisión
+    "fecha_emision": [
+        (r"Fecha\s+(?:de\s+)?Emisi[oó]n[:\s]*([^\n]+)", "fecha"),
+        (r"Fecha:[^\n]*\n(\d{1,2}/\d{1,2}/\d{4})", "fecha"),  # Fecha en línea siguiente (Factura1550)
+        (r"Fecha[:\s]+(\d{1,2}[/-]\d{1,2}[/-]\d{4})", "fecha"),  # Fecha en misma línea
+        (r"Fecha[:\s]*(\d{4}-\d{1,2}-\d{1,2})", "fecha"),
+    ],
+}
+FIELD_PATTERNS = {
+    field: [(re.compile(pattern, FLAGS), keyword) for pattern, keyword in patterns]
+    for field, patterns in _FIELD_SOURCES.items()
+}
+
+FECHA_ISO_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+FECHA_NUM_RE = re.compile(r"(\d{1,2})\s*[/-]\s*(\d{1,2})\s*[/-]\s*(\d{2,4})")
+FECHA_TEXTO_RE = re.compile(r"(\d{1,2})\s+de\s+([A-Za-záéíóúÁÉÍÓÚñÑ]+)\s+(?:del|de)\s+(\d{4})", re.IGNORECASE)
+MESES = {
+    'enero':1,'febrero':2,'marzo':3,'abril':4,'mayo':5,'junio':6,
+    'julio':7,'agosto':8,'septiembre':9,'setiembre':9,'octubre':10,'noviembre':11,'diciembre':12
+}
+
+
+# --- Funciones auxiliares ---
+def clean_match(match):
+    """Texto del grupo 1 (o del match completo) sin saltos de línea múltiples"""
+    result = match.group(1).strip() if match.lastindex >= 1 else match.group(0).strip()
+    return WS_RE.sub(' ', result)
+
+
+def safe_search(patterns, text, default="S/I"):
+    """Intenta múltiples patrones hasta encontrar match"""
+    if not isinstance(patterns, list):
+        patterns = [patterns]
+    for pattern in patterns:
+        match = re.search(pattern, text, FLAGS)
+        if match:
+            return clean_match(match)
+    return default
+
+
+def search_field(field, text, keywords, default="S/I", first=None):
+    """Recorre la cadena de respaldo de un campo de FIELD_PATTERNS.
+
+    Se saltan los patrones cuya palabra clave no apareció en el texto.
+    `first` es el índice del patrón a probar antes que el resto (el que
+    ganó en facturas anteriores del mismo emisor, ver profiles.py).
+    Devuelve (valor, índice del patrón que hizo match) o (default, None).
+    """
+    patterns = FIELD_PATTERNS[field]
+    order = range(len(patterns))
+    if first is not None and 0 <= first < len(patterns):
+        order = [first, *(i for i in order if i != first)]
+    for index in order:
+        pattern, keyword = patterns[index]
+        if keyword is not None and keyword not in keywords:
+            continue
+        match = pattern.search(text)
+        if match:
+            return clean_match(match), index
+    return default, None
+
+
+def scan_text(text):
+    """Pasada única sobre el texto.
+
+    Devuelve la lista de (posición, RUT normalizado), el conjunto de palabras
+    clave presentes y la posición de 'SEÑOR' (-1 si no aparece).
+    """
+    ruts = [(m.start(), norm_rut(m.group(1))) for m in RUT_RE.finditer(text)]
+    upper = text.upper()
+    keywords = {name for name, literals in KEYWORDS.items() if any(lit in upper for lit in literals)}
+    return ruts, keywords, upper.find('SEÑOR')
+
+
+def norm_rut(r):
+    """Normalizar espacios en RUTs"""
+    return "".join(r.split())
+
+
+def invoice_key(item):
+    """Identidad de una factura: (RUT emisor sin puntos, en mayúsculas; folio sin ceros a la izquierda).
+
+    Es la misma para la unión de PDF y XML (dte.py) y para el historial de
+    envíos (history.py). None si falta el emisor o el folio.
+    """
+    rut = norm_rut(item.get("emisor_rut", "S/I")).replace(".", "").upper()
+    folio = str(item.get("folio", "")).strip().lstrip("0")
+    if rut == "S/I" or not folio or folio == "S/I":
+        return None
+    return rut, folio
+
+
+def format_fecha(raw):
+    """Convertir fecha a DD/MM/YYYY"""
+    raw = raw.strip()
+    if raw == "S/I" or not raw:
+        return "S/I"
+
+    # Formato YYYY-MM-DD (ISO)
+    m = FECHA_ISO_RE.search(raw)
+    if m:
+        y, mo, d = m.groups()
+        return f"{int(d):02d}/{int(mo):02d}/{int(y):04d}"
+
+    # Formato DD/MM/YYYY or DD-MM-YYYY
+    m = FECHA_NUM_RE.search(raw)
+    if m:
+        d, mo, y = m.groups()
+        y = y if len(y) == 4 else ("20" + y)
+        return f"{int(d):02d}/{int(mo):02d}/{int(y):04d}"
+
+    # Textual español: '24 de Diciembre del 2025'
+    m2 = FECHA_TEXTO_RE.search(raw)
+    if m2:
+        d, month_name, y = m2.groups()
+        mnum = MESES.get(month_name.lower())
+        if mnum:
+            return f"{int(d):02d}/{mnum:02d}/{int(y):04d}"
+
+    return raw
+
+
+def normalize_amount(amt_str):
+    """Convierte '32,567,147' o '32.567.147' a '32.567.147'"""
+    # Si tiene comas, asumir que son separadores de miles (formato anglosajón)
+    if ',' in amt_str:
+        return amt_str.replace(',', '.')
+    return amt_str
+
+
+# --- Lectura del PDF (backends de texto intercambiables) ---
+class MemoryFile:
+    """Archivo que está solo en memoria (p. ej. un PDF dentro de un ZIP, ver archives.py).
+
+    Se usa en lugar de la ruta en todo el motor. `name` identifica el
+    archivo en mensajes y resultados; `digest` es el SHA-256 del contenido,
+    si ya se calculó al leerlo (la caché lo usa sin volver a recorrer los bytes).
+    """
+
+    def __init__(self, name, data, digest=None):
+        self.name = name
+        self.data = data
+        self.digest = digest
+
+    def open(self):
+        """Archivo nuevo sobre los mismos bytes: cada backend lee desde el principio"""
+        return io.BytesIO(self.data)
+
+
+def pdf_input(pdf_path):
+    """Lo que reciben pdfium/pdfplumber: la ruta tal cual o un buffer del MemoryFile"""
+    return pdf_path.open() if isinstance(pdf_path, MemoryFile) else pdf_path
+
+
+def source_name(pdf_path):
+    """Ruta (o nombre del MemoryFile) para mensajes y resultados"""
+    return pdf_path.name if isinstance(pdf_path, MemoryFile) else pdf_path
+
+
+def pdfium_text(pdf_path):
+    """Texto de la primera página con pypdfium2 (rápido, sin análisis de layout en Python)"""
+    import pypdfium2 as pdfium
+
+    # pdfium lee el archivo bajo demanda: solo se cargan los objetos de la página 0
+    with timings.stage("pdfium.abrir"):
+        pdf = pdfium.PdfDocument(pdf_input(pdf_path))
+    try:
+        with timings.stage("pdfium.texto"):
+            page = pdf[0]
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+    # pdfium separa líneas con \r\n; los patrones esperan \n
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def pdfplumber_text(pdf_path):
+    """Texto de la primera página con pdfplumber (más lento, respeta mejor el layout)"""
+    # Import diferido: pdfplumber (y pdfminer) tarda en cargar
+    import pdfplumber
+
+    # pages=[1]: solo se arma el objeto Page de la primera hoja (los anexos no se tocan)
+    with timings.stage("pdfplumber.abrir"):
+        pdf = pdfplumber.open(pdf_input(pdf_path), pages=[1])
+    with pdf, timings.stage("pdfplumber.texto"):
+        return pdf.pages[0].extract_text()
+
+
+def regions_invoice(pdf_path):
+    """InvoiceData leído por regiones (recuadro SII, receptor, totales) con pdfplumber"""
+    # Import diferido: regions.py importa este módulo
+    from regions import regions_invoice
+
+    return regions_invoice(pdf_path)
+
+
+# Backends en orden de preferencia: se pasa al siguiente si el texto no alcanza
+# o si faltan campos obligatorios. Los de texto pasan por parse_invoice_text;
+# los de layout devuelven directamente el InvoiceData (o None si no hay texto).
+TEXT_BACKENDS = {
+    "pdfium": pdfium_text,
+    "pdfplumber": pdfplumber_text,
+}
+LAYOUT_BACKENDS = {
+    "regions": regions_invoice,
+}
+DEFAULT_BACKENDS = ("pdfium", "regions")
+
+# Campos que deben venir con valor para aceptar el resultado de un backend
+REQUIRED_FIELDS = {
+    "emisor_rut": "S/I",
+    "deudor_rut": "S/I",
+    "monto": "0",
+    "fecha_emision": "S/I",
+}
+
+
+def extract_page_text(pdf_path, backend="pdfplumber"):
+    """Devuelve el texto de la primera página del PDF con el backend indicado"""
+    return TEXT_BACKENDS[backend](pdf_path)
+
+
+def has_text(text):
+    """True si el texto extraído es suficiente para buscar campos"""
+    return bool(text) and len(text.strip()) >= 50
+
+
+NO_TEXT_PREFIX = "[PDF sin texto"
+
+
+def no_text_invoice(filename):
+    """Registro de reemplazo para PDFs sin texto extraíble"""
+    return InvoiceData(
+        emisor_nombre=f"{NO_TEXT_PREFIX}: {filename}]",
+        folio="S/I",
+    )
+
+
+def is_no_text(data):
+    """True si el dict es el registro de reemplazo de un PDF sin texto (candidato a OCR)"""
+    return data["emisor_nombre"].startswith(NO_TEXT_PREFIX)
+
+
+def missing_fields(data):
+    """Campos obligatorios que quedaron sin extraer"""
+    return [field for field, empty in REQUIRED_FIELDS.items() if getattr(data, field) == empty]
+
+
+# --- Extracción de campos (múltiples estrategias) ---
+def parse_invoice_text(text, profiles=None, winners=None):
+    """Extrae los campos de la factura desde el texto de la primera página.
+
+    Con `profiles` (profiles.IssuerProfiles) cada campo prueba primero el
+    patrón que ganó para el mismo emisor. Si se pasa `winners` (dict), queda
+    con el índice del patrón que resolvió cada campo.
+    """
+    # Una sola pasada para todos los RUTs y palabras clave del documento
+    with timings.stage("escaneo"):
+        ruts, keywords, señor_idx = scan_text(text)
+
+    # ESTRATEGIA 1: Detectar emisor RUT (primero en el documento)
+    emisor_rut = ruts[0][1] if ruts else "S/I"
+
+    # ESTRATEGIA 2: Detectar deudor RUT (después de SEÑOR(ES) o segundo RUT)
+    deudor_rut = "S/I"
+    if len(ruts) >= 2:
+        if señor_idx != -1:
+            deudor_rut = next((rut for pos, rut in ruts if pos > señor_idx), "S/I")
+        if deudor_rut == "S/I":
+            deudor_rut = ruts[1][1]
+
+    profile = profiles.get(emisor_rut) if profiles is not None else {}
+    if winners is None:
+        winners = {}
+    trace = timings.current()
+
+    def field(name, default="S/I"):
+        start = time.perf_counter()
+        value, index = search_field(name, text, keywords, default, profile.get(name))
+        if trace is not None:
+            trace.field(name, (time.perf_counter() - start) * 1000, index)
+        if index is not None:
+            winners[name] = index
+        return value
+
+    data = InvoiceData(
+        emisor_nombre=field("emisor_nombre", default="EMISOR DESCONOCIDO"),
+        emisor_rut=emisor_rut,
+        deudor_nombre=field("deudor_nombre"),
+        deudor_rut=deudor_rut,
+        folio=field("folio", default="0"),
+    )
+
+    monto = field("monto", default="0")
+    fecha = field("fecha_emision")
+    with timings.stage("formato"):
+        # Valor bruto (mismo que monto)
+        data.monto = normalize_amount(monto)
+        data.valor_bruto = data.monto
+
+        # Formatear fecha de emisión
+        data.fecha_emision = format_fecha(fecha)
+
+    return data
+
+
+def extractor_fingerprint():
+    """Huella de la versión del extractor y de sus patrones.
+
+    Cambia cuando se edita cualquier regex de la tabla de patrones, así
+    los resultados guardados en caché con patrones antiguos quedan invalidados.
+    """
+    h = hashlib.sha256(f"v{EXTRACTOR_VERSION}".encode())
+    patterns = [RUT_RE, FECHA_ISO_RE, FECHA_NUM_RE, FECHA_TEXTO_RE]
+    for field_patterns in FIELD_PATTERNS.values():
+        patterns.extend(pattern for pattern, _ in field_patterns)
+    for pattern in patterns:
+        h.update(pattern.pattern.encode("utf-8"))
+    h.update(repr(sorted(KEYWORDS.items())).encode("utf-8"))
+    h.update(repr(sorted(MESES.items())).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def extract_invoice(pdf_path, backends=DEFAULT_BACKENDS, profiles=None):
+    """Extrae un InvoiceData del PDF; None si el archivo no se pudo leer.
+
+    Prueba los backends en orden y se queda con el primero cuyo texto trae
+    todos los campos obligatorios; si ninguno lo logra, con el que dejó menos
+    campos sin extraer. El backend usado queda en InvoiceData.backend.
+    Con `profiles` se usan y actualizan los perfiles por emisor (profiles.py).
+    Si la medición de tiempos está activa (timings.py), deja una línea por archivo.
+    """
+    trace = timings.start(source_name(pdf_path))
+    data = None
+    try:
+        data = _extract_invoice(pdf_path, backends, profiles)
+        return data
+    finally:
+        timings.finish(trace, backend=data.backend if data else None,
+                       faltantes=missing_fields(data) if data else None)
+
+
+def _extract_invoice(pdf_path, backends, profiles):
+    filename = os.path.basename(source_name(pdf_path))
+    best = None
+    error = None
+    for backend in backends:
+        winners = {}
+        try:
+            if backend in LAYOUT_BACKENDS:
+                data = LAYOUT_BACKENDS[backend](pdf_path)
+            else:
+                text = extract_page_text(pdf_path, backend)
+                data = parse_invoice_text(text, profiles, winners) if has_text(text) else None
+        except Exception as e:
+            print(f"⚠️  Backend {backend} falló con '{filename}': {type(e).__name__}: {e}")
+            error = e
+            continue
+
+        if data is None:
+            continue
+
+        data.backend = backend
+        missing = missing_fields(data)
+        if not missing:
+            best, best_winners = data, winners
+            break
+        if best is None or len(missing) < len(missing_fields(best)):
+            best, best_winners = data, winners
+
+    if best is not None:
+        if profiles is not None:
+            profiles.record(best.emisor_rut, best_winners)
+        return best
+
+    if error is not None:
+        print(f"❌ Error parsing {filename}: {type(error).__name__}: {error}")
+        import traceback
+        traceback.print_exception(error)
+        return None
+
+    # Si no hay texto, intentar OCR o informar error útil
+    print(f"⚠️  PDF '{filename}' no contiene texto extraíble (puede ser imagen escaneada)")
+    return no_text_invoice(filename)
+
+
+def extract_pdf_data(pdf_path, profiles=None):
+    """Igual que extract_invoice, pero devuelve un dict (o None si falla)"""
+    data = extract_invoice(pdf_path, profiles=profiles)
+    return data.to_dict() if data else None
+
+
+# --- Extracción en lote (pool de procesos) ---
+# Modo de memoria acotada: cada worker tiene un tope de memoria y se recicla cada N archivos
+LOW_MEMORY_MAX_MB = 1024
+LOW_MEMORY_TASKS_PER_CHILD = 50
+
+
+def default_workers(n_files):
+    """Número de procesos para un lote: uno por núcleo, sin pasar del número de archivos"""
+    return max(1, min(os.cpu_count() or 1, n_files))
+
+
+def limit_worker_memory(max_mb):
+    """Initializer del pool: tope de memoria virtual del worker (solo POSIX).
+
+    Un PDF que lo excede falla con MemoryError en su backend y se cuenta
+    como archivo con error, en vez de hacer crecer el proceso sin límite.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows: sin tope por proceso
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = max_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def preload_backends():
+    """Importa los backends de PDF (pdfplumber/pdfminer tarda en cargar)"""
+    for module in ("pdfplumber", "pypdfium2"):
+        importlib.import_module(module)
+
+
+def init_worker(max_mb=None, preload=False):
+    """Initializer del pool: tope de memoria y/o precarga de los backends"""
+    if max_mb:
+        limit_worker_memory(max_mb)
+    if preload:
+        preload_backends()
+
+
+def create_pool(workers=None, low_memory=False, preload=False):
+    """Crea el pool de procesos usado para extraer facturas.
+
+    Con low_memory cada worker arranca con el tope LOW_MEMORY_MAX_MB y se
+    reemplaza por uno nuevo tras LOW_MEMORY_TASKS_PER_CHILD archivos, así la
+    memoria que dejan los PDFs grandes no se acumula durante un lote largo.
+    Con preload cada worker importa los backends al crearse, no con el
+    primer archivo (ver warm_pool).
+    """
+    if not low_memory and not preload:
+        return ProcessPoolExecutor(max_workers=workers)
+    options = {"initializer": init_worker, "initargs": (LOW_MEMORY_MAX_MB if low_memory else None, preload)}
+    if low_memory and sys.version_info >= (3, 11):
+        # Reciclar workers requiere Python 3.11 (usa 'spawn' también en Linux)
+        options["max_tasks_per_child"] = LOW_MEMORY_TASKS_PER_CHILD
+    return ProcessPoolExecutor(max_workers=workers, **options)
+
+
+def warm_pool(pool, workers=None):
+    """Levanta los workers del pool sin esperar al primer archivo.
+
+    El pool crea un proceso por cada tarea enviada mientras no hay workers
+    libres: se envían tantas tareas vacías como workers. Devuelve los futures.
+    """
+    return [pool.submit(os.getpid) for _ in range(workers or default_workers(os.cpu_count() or 1))]
+
+
+def extract_batch(pdf_paths, workers=None, extract=extract_pdf_data, low_memory=False):
+    """Extrae varios PDFs en paralelo.
+
+    Devuelve una lista en el mismo orden que pdf_paths, con el dict de cada
+    factura o None para los archivos que no se pudieron leer. Las entradas
+    pueden ser rutas o MemoryFile (los bytes viajan al worker). `extract` es la
+    función que corre en cada worker (p. ej. cache.extract_pdf_data_cached).
+    low_memory usa el pool de memoria acotada (ver create_pool).
+    """
+    pdf_paths = list(pdf_paths)
+    if workers is None:
+        workers = default_workers(len(pdf_paths))
+
+    # Un solo archivo (o workers=1): no vale la pena levantar procesos
+    if workers <= 1 or len(pdf_paths) <= 1:
+        return [extract(p) for p in pdf_paths]
+
+    results = []
+    with create_pool(workers, low_memory) as pool:
+        futures = [pool.submit(extract, p) for p in pdf_paths]
+        for path, future in zip(pdf_paths, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # El worker murió (p. ej. BrokenProcessPool): se cuenta como error del archivo
+                print(f"❌ Error parsing {os.path.basename(source_name(path))}: {type(e).__name__}: {e}")
+                results.append(None)
+    return results
@@ -0,0 +1,128 @@
+"""Historial de las facturas ya incluidas en un correo de confirmación.
+
+Cada vez que se genera un correo, sus facturas quedan registradas (RUT del
+emisor + folio, deudor, monto y fecha). Antes de armar el siguiente, todo
+el lote se compara contra el historial en una sola consulta: se cargan
+las claves en una tabla temporal y se cruzan con el índice (emisor_rut,
+folio), así la consulta sigue siendo instantánea con cientos de miles de
+facturas registradas.
+
+Cada lote lleva su id: volver a generar el mismo correo (p. ej. tras
+corregir un dato) actualiza sus filas en vez de marcarlas como repetidas.
+El historial vive en su propio archivo junto a la caché: borrar la caché
+no lo borra.
+"""
+import os
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+
+from cache import default_cache_path
+from email_render import debtor_key
+from extractor import invoice_key
+
+HISTORY_FILE = "historial_envios.sqlite3"
+
+
+def default_history_path():
+    return os.path.join(os.path.dirname(default_cache_path()), HISTORY_FILE)
+
+
+def new_batch_id():
+    return uuid.uuid4().hex
+
+
+class SentHistory:
+    def __init__(self, path=None):
+        self.path = path or default_history_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # La clave única (emisor_rut, folio, lote) es también el índice de búsqueda por factura
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS enviadas ("
+            " emisor_rut TEXT NOT NULL,"
+            " folio TEXT NOT NULL,"
+            " lote TEXT NOT NULL,"
+            " deudor_rut TEXT NOT NULL,"
+            " deudor_nombre TEXT NOT NULL,"
+            " monto TEXT NOT NULL,"
+            " archivo TEXT NOT NULL,"
+            " enviado REAL NOT NULL,"
+            " UNIQUE (emisor_rut, folio, lote))"
+        )
+        self.conn.commit()
+
+    def record(self, items, batch_id, when=None):
+        """Registra las facturas de un correo generado (las sin emisor o folio se omiten)"""
+        when = time.time() if when is None else when
+        rows = []
+        for item in items:
+            key = invoice_key(item)
+            if key is not None:
+                rows.append((*key, batch_id, debtor_key(item.get("deudor_rut", "S/I")),
+                             item.get("deudor_nombre", "S/I"), item.get("monto", "0"),
+                             os.path.basename(str(item.get("archivo", ""))), when))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO enviadas (emisor_rut, folio, lote, deudor_rut, deudor_nombre, monto, archivo, enviado)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (emisor_rut, folio, lote) DO UPDATE SET"
+                " deudor_rut = excluded.deudor_rut, deudor_nombre = excluded.deudor_nombre,"
+                " monto = excluded.monto, archivo = excluded.archivo, enviado = excluded.enviado",
+                rows,
+            )
+        return len(rows)
+
+    def find_sent(self, items, exclude_batch=None):
+        """{(emisor, folio): envíos anteriores} de las facturas del lote que ya se enviaron.
+
+        Cada envío es un dict con deudor_rut, deudor_nombre, monto, archivo
+        y enviado (timestamp), del más antiguo al más reciente. Los envíos
+        del lote `exclude_batch` no cuentan.
+        """
+        keys = {key for key in map(invoice_key, items) if key is not None}
+        if not keys:
+            return {}
+        with self.conn:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS lote_actual (emisor_rut TEXT, folio TEXT)")
+            self.conn.execute("DELETE FROM lote_actual")
+            self.conn.executemany("INSERT INTO lote_actual VALUES (?, ?)", keys)
+            rows = self.conn.execute(
+                "SELECT e.emisor_rut, e.folio, e.deudor_rut, e.deudor_nombre, e.monto, e.archivo, e.enviado"
+                " FROM lote_actual l JOIN enviadas e ON e.emisor_rut = l.emisor_rut AND e.folio = l.folio"
+                " WHERE e.lote != ? ORDER BY e.enviado",
+                (exclude_batch or "",),
+            ).fetchall()
+        found = {}
+        for rut, folio, deudor_rut, deudor_nombre, monto, archivo, enviado in rows:
+            found.setdefault((rut, folio), []).append({
+                "deudor_rut": deudor_rut, "deudor_nombre": deudor_nombre,
+                "monto": monto, "archivo": archivo, "enviado": enviado,
+            })
+        return found
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM enviadas").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def format_repeats(items, found, limit=10):
+    """Líneas de aviso (una por factura repetida del lote) para la consola o un messagebox"""
+    lines = []
+    for item in items:
+        sent = found.get(invoice_key(item))
+        if not sent:
+            continue
+        last = sent[-1]
+        times = f" ({len(sent)} veces)" if len(sent) > 1 else ""
+        lines.append(f"Folio {item.get('folio')} de {item.get('emisor_rut')}: enviada el "
+                     f"{datetime.fromtimestamp(last['enviado']):%d/%m/%Y %H:%M} a "
+                     f"{last['deudor_nombre']} ({last['deudor_rut']}){times}")
+    if len(lines) > limit:
+        lines[limit:] = [f"... y {len(lines) - limit} más"]
+    return lines
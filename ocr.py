@@ -0,0 +1,130 @@
+"""OCR opcional para facturas escaneadas (PDF sin texto extraíble).
+
+Renderiza la primera página con pypdfium2, la pasa por Tesseract
+(pytesseract) y aplica los mismos patrones de extractor.parse_invoice_text.
+Requiere `pip install pytesseract` y Tesseract instalado con el idioma
+español; sin ellos ocr_available() devuelve False y los PDFs escaneados
+siguen saliendo como '[PDF sin texto: ...]'.
+
+El OCR es lento (segundos por página): corre en su propio pool, más chico
+que el de extracción, y el resultado queda en la caché por hash del PDF.
+"""
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import get_cache
+from extractor import has_text, parse_invoice_text, pdf_input, source_name
+
+OCR_LANG = "spa"
+OCR_DPI = 300
+# Tesseract usa varios hilos por página: con pocos workers de un hilo no se pisan con la extracción
+OCR_MAX_WORKERS = 2
+
+
+def ocr_available():
+    """True si pytesseract y el ejecutable de Tesseract están disponibles"""
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+    except Exception:  # ImportError o TesseractNotFoundError
+        return False
+    return True
+
+
+def render_first_page(pdf_path, dpi=OCR_DPI):
+    """Imagen PIL (escala de grises) de la primera página"""
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_input(pdf_path))
+    try:
+        page = pdf[0]
+        image = page.render(scale=dpi / 72, grayscale=True).to_pil()
+        page.close()
+    finally:
+        pdf.close()
+    return image
+
+
+def ocr_page_text(pdf_path, lang=OCR_LANG):
+    """Texto de la primera página reconocido por Tesseract"""
+    import pytesseract
+
+    return pytesseract.image_to_string(render_first_page(pdf_path), lang=lang)
+
+
+def ocr_invoice(pdf_path):
+    """Dict de la factura leída por OCR; None si el OCR no encontró texto suficiente"""
+    text = ocr_page_text(pdf_path)
+    if not has_text(text):
+        return None
+    data = parse_invoice_text(text)
+    data.backend = "ocr"
+    return data.to_dict()
+
+
+def ocr_pdf_data_cached(pdf_path, fallback=None, cache_path=None):
+    """OCR con caché por contenido; se envía al pool de OCR.
+
+    Devuelve `fallback` (normalmente el registro '[PDF sin texto: ...]') si
+    el OCR falla o no reconoce texto, para no perder el archivo del lote.
+    """
+    try:
+        cache = get_cache(cache_path)
+        # Misma huella del extractor al final: purge_stale limpia también estas entradas
+        key = f"ocr:{cache.key_for(pdf_path)}"
+        data = cache.get(key)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️  Caché no disponible para OCR: {type(e).__name__}: {e}")
+        cache = key = data = None
+    if data is not None:
+        return data
+
+    try:
+        data = ocr_invoice(pdf_path)
+    except Exception as e:
+        print(f"❌ Error de OCR en {os.path.basename(source_name(pdf_path))}: {type(e).__name__}: {e}")
+        return fallback
+    if data is None:
+        print(f"⚠️  OCR sin texto reconocible en '{os.path.basename(source_name(pdf_path))}'")
+        return fallback
+
+    if cache is not None:
+        try:
+            cache.put(key, data)
+        except sqlite3.Error as e:
+            print(f"⚠️  No se pudo guardar el OCR en caché: {type(e).__name__}: {e}")
+    return data
+
+
+def _single_thread_tesseract():
+    # Initializer del pool: paralelismo por proceso, no por hilos de Tesseract
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def ocr_workers(n_files):
+    """Procesos para el pool de OCR: a lo más OCR_MAX_WORKERS y la mitad de los núcleos"""
+    return max(1, min(OCR_MAX_WORKERS, (os.cpu_count() or 1) // 2, n_files))
+
+
+def create_ocr_pool(workers=None):
+    """Pool de procesos dedicado al OCR, separado del de extracción de texto"""
+    return ProcessPoolExecutor(max_workers=workers or ocr_workers(OCR_MAX_WORKERS),
+                               initializer=_single_thread_tesseract)
+
+
+def ocr_batch(pdf_paths, workers=None):
+    """OCR de varios PDFs en el pool de OCR; lista en el mismo orden (None = sin resultado)"""
+    pdf_paths = list(pdf_paths)
+    if not pdf_paths:
+        return []
+    results = []
+    with create_ocr_pool(workers or ocr_workers(len(pdf_paths))) as pool:
+        futures = [pool.submit(ocr_pdf_data_cached, p) for p in pdf_paths]
+        for path, future in zip(pdf_paths, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"❌ Error de OCR en {os.path.basename(source_name(path))}: {type(e).__name__}: {e}")
+                results.append(None)
+    return results
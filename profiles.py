@@ -0,0 +1,110 @@
+"""Perfiles de extracción aprendidos por emisor.
+
+Para cada RUT de emisor se guarda qué patrón de extractor.FIELD_PATTERNS
+resolvió cada campo. Las facturas siguientes del mismo emisor prueban ese
+patrón primero (ver search_field), y se lleva la cuenta de aciertos y
+fallos para ver qué tan estable es cada perfil.
+
+Los perfiles viven en el mismo archivo SQLite que la caché de facturas, en
+la tabla 'perfiles'. Están atados a la huella del extractor: si cambian
+los patrones, los índices guardados dejan de valer y se descartan.
+"""
+import os
+import sqlite3
+
+from cache import default_cache_path
+from extractor import extractor_fingerprint
+
+
+class IssuerProfiles:
+    def __init__(self, path=None):
+        self.path = path or default_cache_path()
+        self.fingerprint = extractor_fingerprint()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS perfiles ("
+            " emisor_rut TEXT NOT NULL,"
+            " campo TEXT NOT NULL,"
+            " patron INTEGER NOT NULL,"
+            " aciertos INTEGER NOT NULL DEFAULT 0,"
+            " fallos INTEGER NOT NULL DEFAULT 0,"
+            " huella TEXT NOT NULL,"
+            " PRIMARY KEY (emisor_rut, campo))"
+        )
+        with self.conn:
+            self.conn.execute("DELETE FROM perfiles WHERE huella != ?", (self.fingerprint,))
+        # Índice en memoria: emisor -> {campo: patrón}; son pocas decenas de emisores
+        self.index = {}
+        for rut, field, pattern in self.conn.execute("SELECT emisor_rut, campo, patron FROM perfiles"):
+            self.index.setdefault(rut, {})[field] = pattern
+
+    def get(self, emisor_rut):
+        """{campo: índice del patrón ganador} del emisor (vacío si no hay perfil)"""
+        return self.index.get(emisor_rut, {})
+
+    def record(self, emisor_rut, winners):
+        """Registra qué patrón resolvió cada campo en una factura del emisor"""
+        if emisor_rut == "S/I" or not winners:
+            return
+        profile = self.index.setdefault(emisor_rut, {})
+        rows = []
+        for field, pattern in winners.items():
+            previous = profile.get(field)
+            hit = int(previous == pattern)
+            miss = int(previous is not None and previous != pattern)
+            profile[field] = pattern
+            rows.append((emisor_rut, field, pattern, hit, miss, self.fingerprint))
+        try:
+            with self.conn:
+                # Los contadores se suman en SQL: varios workers pueden escribir el mismo perfil
+                self.conn.executemany(
+                    "INSERT INTO perfiles (emisor_rut, campo, patron, aciertos, fallos, huella)"
+                    " VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (emisor_rut, campo) DO UPDATE SET"
+                    " patron = excluded.patron,"
+                    " aciertos = aciertos + excluded.aciertos,"
+                    " fallos = fallos + excluded.fallos",
+                    rows,
+                )
+        except sqlite3.Error as e:
+            print(f"⚠️  No se pudo guardar el perfil de {emisor_rut}: {type(e).__name__}: {e}")
+
+    def stats(self):
+        """Filas (emisor, campo, patrón, aciertos, fallos, tasa de acierto) ordenadas por emisor"""
+        rows = self.conn.execute(
+            "SELECT emisor_rut, campo, patron, aciertos, fallos FROM perfiles ORDER BY emisor_rut, campo"
+        ).fetchall()
+        return [(*row, row[3] / (row[3] + row[4]) if row[3] + row[4] else None) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+# Una conexión por proceso (como la caché)
+_profiles = {}
+
+
+def get_profiles(path=None):
+    path = path or default_cache_path()
+    if path not in _profiles:
+        _profiles[path] = IssuerProfiles(path)
+    return _profiles[path]
+
+
+def format_stats(rows):
+    """Tabla de texto con las estadísticas de perfiles (para la consola)"""
+    if not rows:
+        return "Sin perfiles de emisor todavía."
+    lines = [f"{'emisor':<15}{'campo':<16}{'patrón':>7}{'aciertos':>10}{'fallos':>8}{'tasa':>8}"]
+    for rut, field, pattern, hits, misses, rate in rows:
+        rate_text = "-" if rate is None else f"{rate:.0%}"
+        lines.append(f"{rut:<15}{field:<16}{pattern:>7}{hits:>10}{misses:>8}{rate_text:>8}")
+    total_hits = sum(r[3] for r in rows)
+    total = total_hits + sum(r[4] for r in rows)
+    issuers = len({r[0] for r in rows})
+    summary = f"{total_hits / total:.0%}" if total else "-"
+    lines.append(f"{issuers} emisor(es); tasa de acierto global: {summary}")
+    return "\n".join(lines)
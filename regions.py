@@ -0,0 +1,202 @@
+"""Extracción por regiones de la factura (usa las coordenadas de las palabras).
+
+En vez de correr los patrones sobre todo el texto de la página, se ubican
+los bloques estándar de un DTE a partir de palabras ancla y se leen solo
+esas líneas:
+
+    recuadro SII   'FACTURA ELECTRÓNICA' / 'Folio'  -> RUT emisor y folio
+    emisor         líneas hasta el primer 'Giro'     -> nombre del emisor
+    receptor       'SEÑOR(ES)' y las líneas debajo   -> nombre y RUT del deudor
+    fecha          'Fecha Emisión' (o el primer 'Fecha')
+    totales        el último 'TOTAL' de la página    -> monto, desde la misma línea
+
+Los campos que no se resuelven en su región se completan con
+parse_invoice_text sobre el texto de toda la página (misma página ya
+parseada, sin volver a abrir el PDF).
+"""
+import re
+
+import timings
+from extractor import (
+    RUT_RE, InvoiceData, format_fecha, has_text, norm_rut, normalize_amount,
+    parse_invoice_text, pdf_input, scan_text, search_field,
+)
+
+LINE_TOLERANCE = 3     # Diferencia máxima de 'top' (pt) para considerar dos palabras en la misma línea
+SII_BOX_MARGIN = 40    # Margen a la izquierda del ancla para incluir el RUT del recuadro SII
+COLUMN_GAP = 15        # Espacio horizontal (pt) entre palabras que separa dos columnas
+
+# (líneas antes, líneas después) del ancla que forman cada región
+SII_BOX_LINES = (3, 1)
+RECEPTOR_LINES = (0, 4)
+FECHA_LINES = (0, 1)
+EMISOR_LINES = (2, 0)
+
+AMOUNT_RE = re.compile(r"\d[\d\.,]*\d|\d")
+FOLIO_RE = re.compile(r"(?:N[°º]|FOLIO:?)\s*(\d+)", re.IGNORECASE)
+
+
+# --- Líneas a partir de las palabras de pdfplumber ---
+def group_lines(words):
+    """Agrupa las palabras en líneas (de arriba a abajo, cada una de izquierda a derecha)"""
+    lines = []
+    for word in sorted(words, key=lambda w: (round(w["top"]), w["x0"])):
+        if lines and abs(word["top"] - lines[-1][0]["top"]) <= LINE_TOLERANCE:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    for line in lines:
+        line.sort(key=lambda w: w["x0"])
+    return lines
+
+
+def find_anchor(lines, test, last=False):
+    """(línea, palabra) de la primera (o última) palabra que cumple `test`; None si no hay"""
+    order = range(len(lines) - 1, -1, -1) if last else range(len(lines))
+    for i in order:
+        for word in lines[i]:
+            if test(word["text"].upper()):
+                return i, word
+    return None
+
+
+def region_text(lines, index, around, x0=0.0, x1=float("inf")):
+    """Texto de las líneas alrededor de `index` (antes, después), solo palabras entre x0 y x1"""
+    before, after = around
+    rows = lines[max(0, index - before):index + after + 1]
+    return "\n".join(" ".join(w["text"] for w in row if x0 <= w["x0"] < x1) for row in rows)
+
+
+def column_end(line, word):
+    """x0 donde empieza la columna siguiente a la de `word` en su línea (inf si no hay)"""
+    right = word["x1"]
+    for other in line:
+        if other["x0"] <= word["x0"]:
+            continue
+        if other["x0"] - right > COLUMN_GAP:
+            return other["x0"]
+        right = other["x1"]
+    return float("inf")
+
+
+def fecha_anchor(lines):
+    """Palabra 'Fecha' de la fecha de emisión; si no hay 'Fecha Emisión', el primer 'Fecha'"""
+    first = None
+    for i, line in enumerate(lines):
+        for j, word in enumerate(line):
+            text = word["text"].upper()
+            if not text.startswith("FECHA"):
+                continue
+            following = " ".join(w["text"] for w in line[j + 1:j + 3]).upper()
+            if "EMISI" in text or "EMISI" in following:
+                return i, word
+            if first is None:
+                first = (i, word)
+    return first
+
+
+def first_rut(text):
+    match = RUT_RE.search(text)
+    return norm_rut(match.group(1)) if match else "S/I"
+
+
+# --- Campos por región ---
+def parse_regions(lines):
+    """Campos que se pudieron leer de las regiones; dict solo con los encontrados"""
+    found = {}
+    box_x0 = float("inf")  # Borde izquierdo del recuadro SII: lo que está a su izquierda es del emisor
+
+    # Recuadro SII: ancla en 'ELECTRÓNICA' (de 'FACTURA ELECTRÓNICA') o en 'Folio'
+    anchor = find_anchor(lines, lambda t: t.startswith("ELECTR") or t.startswith("FOLIO"))
+    if anchor is not None:
+        index, word = anchor
+        # El recuadro empieza en 'FACTURA' si está en la misma línea, antes del ancla
+        start = min((w["x0"] for w in lines[index] if w["text"].upper() == "FACTURA"), default=word["x0"])
+        text = region_text(lines, index, SII_BOX_LINES, start - SII_BOX_MARGIN)
+        rut = first_rut(text)
+        if rut != "S/I":
+            found["emisor_rut"] = rut
+        match = FOLIO_RE.search(region_text(lines, index, (0, SII_BOX_LINES[1]), start - SII_BOX_MARGIN))
+        if match:
+            found["folio"] = match.group(1)
+        # Recuadro al costado (DTE a dos columnas): el emisor queda a su izquierda
+        if start - SII_BOX_MARGIN > min(line[0]["x0"] for line in lines):
+            box_x0 = start - SII_BOX_MARGIN
+
+    # Emisor: el nombre va sobre el primer 'Giro' (o en las primeras líneas de la página),
+    # a la izquierda del recuadro SII cuando está al lado
+    anchor = find_anchor(lines, lambda t: t.startswith("GIRO"))
+    if anchor is not None:
+        text = region_text(lines, anchor[0], EMISOR_LINES, x1=box_x0)
+    else:
+        text = region_text(lines, 0, (0, 2), x1=box_x0)
+    name, _ = search_field("emisor_nombre", text, scan_text(text)[1], default=None)
+    if name:
+        found["emisor_nombre"] = name
+
+    # Receptor: 'SEÑOR(ES)' y las líneas siguientes (nombre, RUT, dirección)
+    anchor = find_anchor(lines, lambda t: t.startswith("SEÑOR"))
+    if anchor is not None:
+        index, word = anchor
+        # Solo la columna del receptor: a la derecha suele ir la fecha u otros datos
+        text = region_text(lines, index, RECEPTOR_LINES, x1=column_end(lines[index], word))
+        name, _ = search_field("deudor_nombre", text, scan_text(text)[1], default=None)
+        if name:
+            found["deudor_nombre"] = name
+        rut = first_rut(text)
+        if rut != "S/I":
+            found["deudor_rut"] = rut
+
+    # Fecha de emisión: se prefiere la línea 'Fecha Emisión' a otras fechas (vencimiento, etc.)
+    anchor = fecha_anchor(lines)
+    if anchor is not None:
+        index, word = anchor
+        text = region_text(lines, index, FECHA_LINES, x0=word["x0"])
+        fecha, _ = search_field("fecha_emision", text, scan_text(text)[1], default=None)
+        if fecha:
+            found["fecha_emision"] = format_fecha(fecha)
+
+    # Totales: el último 'TOTAL' de la página; el monto es el primer número a su derecha
+    anchor = find_anchor(lines, lambda t: t.startswith("TOTAL"), last=True)
+    if anchor is not None:
+        index, word = anchor
+        text = " ".join(w["text"] for w in lines[index] if w["x0"] > word["x0"])
+        match = AMOUNT_RE.search(text)
+        if match:
+            found["monto"] = normalize_amount(match.group(0))
+
+    return found
+
+
+def parse_words(words, page_text=None):
+    """InvoiceData desde las palabras de la página.
+
+    `page_text` es una función sin argumentos que devuelve el texto completo;
+    solo se llama si alguna región no entregó su campo.
+    """
+    found = parse_regions(group_lines(words))
+    data = InvoiceData(**found)
+    fields = ("emisor_nombre", "emisor_rut", "deudor_nombre", "deudor_rut", "folio", "monto", "fecha_emision")
+    missing = [f for f in fields if f not in found]
+    if missing and page_text is not None:
+        fallback = parse_invoice_text(page_text())
+        for field in missing:
+            setattr(data, field, getattr(fallback, field))
+    data.valor_bruto = data.monto
+    return data
+
+
+def regions_invoice(pdf_path):
+    """InvoiceData de la primera página por regiones; None si la página no tiene texto"""
+    import pdfplumber
+
+    with timings.stage("regions.abrir"):
+        pdf = pdfplumber.open(pdf_input(pdf_path), pages=[1])
+    with pdf:
+        with timings.stage("regions.palabras"):
+            page = pdf.pages[0]
+            words = page.extract_words()
+        if not has_text(" ".join(w["text"] for w in words)):
+            return None
+        with timings.stage("regions.campos"):
+            return parse_words(words, page.extract_text)
@@ -0,0 +1,95 @@
+import time
+import zipfile
+
+import pytest
+
+# La ventana necesita tkinterdnd2 y una pantalla (en CI sin display se omite)
+pytest.importorskip("tkinterdnd2")
+
+import tkinter as tk  # noqa: E402
+
+import app_facturas  # noqa: E402
+from benchmarks.corpus import generate_corpus  # noqa: E402
+
+DTE = """<DTE version="1.0"><Documento ID="F{folio}T33"><Encabezado>
+  <IdDoc><TipoDTE>33</TipoDTE><Folio>{folio}</Folio><FchEmis>2023-08-04</FchEmis></IdDoc>
+  <Emisor><RUTEmisor>{emisor}</RUTEmisor><RznSoc>EMISOR</RznSoc></Emisor>
+  <Receptor><RUTRecep>{deudor}</RUTRecep><RznSocRecep>DEUDOR OFICIAL</RznSocRecep></Receptor>
+  <Totales><MntTotal>1190000</MntTotal></Totales>
+</Encabezado></Documento></DTE>"""
+
+
+@pytest.fixture
+def app(monkeypatch):
+    try:
+        window = app_facturas.NativeInvoiceApp()
+    except tk.TclError as e:
+        pytest.skip(f"Sin pantalla: {e}")
+    window.withdraw()
+    window.history = False  # Sin historial de envíos: no hay askyesno
+    for name in ("showinfo", "showwarning", "showerror"):
+        monkeypatch.setattr(app_facturas.messagebox, name, lambda *args, **kwargs: None)
+    yield window
+    window._on_close()
+
+
+def run_until(window, condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "la ventana no terminó a tiempo"
+        window.update()
+        time.sleep(0.02)
+
+
+def test_pdf_attachments_match_the_email(app, tmp_path):
+    pdf_path, expected = generate_corpus(str(tmp_path), n=1)[0]
+    xml_path = tmp_path / "factura.xml"
+    xml_path.write_text(DTE.format(folio=expected["folio"], emisor=expected["emisor_rut"].replace(".", ""),
+                                   deudor=expected["deudor_rut"].replace(".", "")), encoding="utf-8")
+    broken = tmp_path / "roto.pdf"
+    broken.write_bytes(b"no es un pdf")
+    for path in (pdf_path, str(xml_path), str(broken)):
+        app.add_file(path)
+
+    app.generate_email()
+    run_until(app, lambda: app.current_records)
+    # PDF y XML de la misma factura: un registro, con la ruta del PDF
+    assert [item["archivo"] for item in app.current_records] == [pdf_path]
+
+    copied = []
+
+    class Backend:
+        def set_files(self, paths):
+            copied.extend(paths)
+
+    app.clipboard_backend = Backend()
+    app._clipboard_job = lambda job, on_done: on_done(job(), None)
+    app.copy_pdfs_to_clipboard()
+    # Ni el XML ya unido con su PDF ni el archivo que no se pudo leer
+    assert copied == [pdf_path]
+
+
+def test_zip_read_in_background_and_readded_after_removal(app, tmp_path):
+    pdf_path, _ = generate_corpus(str(tmp_path / "pdfs"), n=1)[0]
+    archive = tmp_path / "proveedor.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.write(pdf_path, "f.pdf")
+        zf.write(pdf_path, "copia/f.pdf")  # Mismo contenido: se salta
+    key = f"{archive}::f.pdf"
+
+    app.add_file(str(archive))
+    run_until(app, lambda: not app.archive_reads)
+    assert app.pdf_files == [key]
+
+    app.remove_file(key)
+    app.add_file(str(archive))
+    run_until(app, lambda: not app.archive_reads)
+    assert app.pdf_files == [key]
+
+
+def test_sort_key_groups_unparseable_values_first():
+    dates = ["05/03/2024", "S/I", "24/12/2023", "2024-01-01", "01/01/2025", ""]
+    assert sorted(dates, key=lambda v: app_facturas.sort_key("fecha_emision", v)) == [
+        "S/I", "2024-01-01", "", "24/12/2023", "05/03/2024", "01/01/2025"]
+    amounts = ["1.190.000", "S/I", "32.000", "0"]
+    assert sorted(amounts, key=lambda v: app_facturas.sort_key("valor_bruto", v)) == ["S/I", "0", "32.000", "1.190.000"]
@@ -0,0 +1,101 @@
+import json
+import os
+import zipfile
+
+from archives import is_member, iter_members, materialize
+from benchmarks.corpus import generate_corpus
+from cache import extract_pdf_data_cached
+from cli import main
+from extractor import MemoryFile, extract_batch, extract_pdf_data
+
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    return str(path)
+
+
+def test_members_streamed_with_duplicates_skipped(tmp_path):
+    corpus = generate_corpus(str(tmp_path / "in"), n=2)
+    pdfs = [open(path, "rb").read() for path, _ in corpus]
+    first = make_zip(tmp_path / "a.zip", [
+        ("marzo/f1.pdf", pdfs[0]), ("notas.txt", b"x"), ("__MACOSX/marzo/._f1.pdf", b"meta"),
+        ("copia/f1.pdf", pdfs[0]), ("f2.PDF", pdfs[1]),
+    ])
+    second = make_zip(tmp_path / "b.zip", [("otra_vez.pdf", pdfs[1])])
+
+    seen = set()
+    members = list(iter_members(first, seen)) + list(iter_members(second, seen))
+    assert [m.name for m in members] == [f"{first}::marzo/f1.pdf", f"{first}::f2.PDF"]
+    assert all(is_member(m.name) for m in members) and not is_member(corpus[0][0])
+    assert members[0].data == pdfs[0] and len(seen) == 2
+
+    # Los bytes se extraen igual que el archivo en el disco, también en el pool
+    results = extract_batch(members, workers=2)
+    for data, (_, expected) in zip(results, corpus):
+        assert {k: data[k] for k in expected} == expected
+    assert extract_pdf_data(members[1]) == extract_pdf_data(corpus[1][0])
+
+
+def test_cache_uses_streamed_digest(tmp_path):
+    path = generate_corpus(str(tmp_path / "in"), n=1)[0][0]
+    member = next(iter_members(make_zip(tmp_path / "a.zip", [("f.pdf", open(path, "rb").read())])))
+    cache_path = str(tmp_path / "cache.sqlite3")
+    # El PDF en el disco y el miembro del ZIP comparten la entrada de caché
+    assert extract_pdf_data_cached(path, cache_path) == extract_pdf_data_cached(member, cache_path)
+    assert extract_pdf_data_cached(MemoryFile("x.pdf", member.data), cache_path)["folio"]
+
+
+def test_materialize_only_writes_requested_members(tmp_path):
+    archive = make_zip(tmp_path / "a.zip", [("a/f.pdf", b"%PDF 1"), ("b\\f.pdf", b"%PDF 2"), ("g.pdf", b"%PDF 3")])
+    members = list(iter_members(archive))
+    out = tmp_path / "adjuntos"
+    paths = materialize(members[:2], str(out))
+    assert [os.path.basename(p) for p in paths] == ["f.pdf", "f (2).pdf"]
+    assert open(paths[1], "rb").read() == b"%PDF 2"
+    assert sorted(os.listdir(out)) == ["f (2).pdf", "f.pdf"]
+
+
+def test_cli_reads_zip_inputs(tmp_path):
+    corpus = generate_corpus(str(tmp_path / "pdfs"), n=3)
+    (tmp_path / "in").mkdir()
+    make_zip(tmp_path / "in" / "proveedor.zip", [(os.path.basename(p), open(p, "rb").read()) for p, _ in corpus])
+    (tmp_path / "in" / "roto.zip").write_bytes(b"no es un zip")
+    out = tmp_path / "out"
+    assert main([str(tmp_path / "in"), "-o", str(out), "-f", "json,html", "-w", "1", "--no-cache"]) == 1
+    data = json.loads((out / "facturas.json").read_text(encoding="utf-8"))
+    assert [row["folio"] for row in data["facturas"]] == [e["folio"] for _, e in corpus]
+    assert data["errores"] == [str(tmp_path / "in" / "roto.zip")]
+    assert not any(name.endswith(".pdf") for name in os.listdir(out))
+
+
+def test_damaged_members_skipped_and_rest_read(tmp_path):
+    pdf = open(generate_corpus(str(tmp_path / "in"), n=1)[0][0], "rb").read()
+    archive = make_zip(tmp_path / "a.zip", [("corrupto.pdf", pdf), ("deflate64.pdf", pdf + b"x"),
+                                            ("truncado.pdf", pdf + b"y"), ("buena.pdf", pdf + b"z")])
+    raw = bytearray(open(archive, "rb").read())
+    with zipfile.ZipFile(archive) as zf:
+        infos = {info.filename: info for info in zf.infolist()}
+
+    def data_start(info):
+        # Encabezado local: 30 bytes + nombre + extra
+        h = info.header_offset
+        return h + 30 + int.from_bytes(raw[h + 26:h + 28], "little") + int.from_bytes(raw[h + 28:h + 30], "little")
+
+    # Deflate corrupto: el primer bloque dice ser de un tipo reservado (zlib.error)
+    raw[data_start(infos["corrupto.pdf"])] = 0xFF
+    # Flujo truncado: el final de los datos comprimidos queda en ceros
+    info = infos["truncado.pdf"]
+    end = data_start(info) + info.compress_size
+    raw[end - 40:end] = bytes(40)
+    # Método de compresión no soportado (9 = Deflate64), en el encabezado local y en el directorio central
+    info = infos["deflate64.pdf"]
+    raw[info.header_offset + 8:info.header_offset + 10] = (9).to_bytes(2, "little")
+    entry = raw.rindex(b"deflate64.pdf") - 46  # Última aparición del nombre: entrada del directorio central
+    raw[entry + 10:entry + 12] = (9).to_bytes(2, "little")
+    open(archive, "wb").write(bytes(raw))
+
+    members = list(iter_members(archive))
+    assert [m.name.split("::")[1] for m in members] == ["buena.pdf"]
+    assert members[0].data == pdf + b"z"
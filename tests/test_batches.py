@@ -0,0 +1,49 @@
+from batches import batch_size, file_sizes, format_size, pack_batches
+from email_render import build_debtor_emails
+
+MB = 1024 * 1024
+
+
+def records(sizes_mb, deudor="77.987.654-3"):
+    items = [{"archivo": f"{deudor}_{i}.pdf", "folio": str(i), "deudor_rut": deudor, "deudor_nombre": "SUR"}
+             for i in range(len(sizes_mb))]
+    return items, {item["archivo"]: int(mb * MB) for item, mb in zip(items, sizes_mb)}
+
+
+def test_pack_batches_respects_budget_and_order():
+    items, sizes = records([10, 3, 12, 8, 5, 2])
+    batches = pack_batches(items, sizes, budget=20 * MB)
+    # First-fit decreasing: 40 MB en lotes de 20 MB caben en 2
+    assert len(batches) == 2
+    assert all(batch_size(batch, sizes) <= 20 * MB for batch in batches)
+    assert sorted(item["folio"] for batch in batches for item in batch) == [str(i) for i in range(6)]
+    for batch in batches:
+        assert batch == sorted(batch, key=lambda item: int(item["folio"]))
+    assert batches[0][0]["folio"] == "0"
+
+
+def test_oversized_file_gets_its_own_batch():
+    items, sizes = records([30, 1, 1])
+    batches = pack_batches(items, sizes, budget=24 * MB)
+    assert [[item["folio"] for item in batch] for batch in batches] == [["0"], ["1", "2"]]
+
+
+def test_debtor_emails_split_by_size_without_mixing_debtors():
+    sur, sur_sizes = records([15, 15, 1], deudor="77.987.654-3")
+    norte, norte_sizes = records([1], deudor="76.111.222-3")
+    emails = build_debtor_emails(sur + norte, {**sur_sizes, **norte_sizes}, budget=20 * MB)
+    assert [(key, len(items)) for key, items, _ in emails] == [
+        ("77987654-3", 2), ("77987654-3", 1), ("76111222-3", 1),
+    ]
+    # Sin tamaños, un correo por deudor como siempre
+    assert len(build_debtor_emails(sur + norte)) == 2
+
+
+def test_file_sizes_and_format(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"x" * 2048)
+    assert file_sizes([str(path), str(tmp_path / "no_existe.pdf")]) == {
+        str(path): 2048, str(tmp_path / "no_existe.pdf"): 0,
+    }
+    assert format_size(2048) == "2 KB"
+    assert format_size(int(12.4 * MB)) == "12.4 MB"
@@ -0,0 +1,72 @@
+import cache as cache_module
+from cache import InvoiceCache, extract_pdf_data_cached, file_digest
+
+DATA = {
+    "emisor_nombre": "COMERCIAL LOS ANDES SPA", "emisor_rut": "76.123.456-7",
+    "deudor_nombre": "DISTRIBUIDORA SUR LIMITADA", "deudor_rut": "77.987.654-K",
+    "folio": "1550", "monto": "1.190.000", "fecha_emision": "24/12/2025", "valor_bruto": "1.190.000",
+}
+
+
+def test_roundtrip_and_content_key(tmp_path):
+    a = tmp_path / "a.pdf"
+    b = tmp_path / "copia con otro nombre.pdf"
+    a.write_bytes(b"%PDF-1.4 mismo contenido")
+    b.write_bytes(b"%PDF-1.4 mismo contenido")
+    assert file_digest(a) == file_digest(b)
+
+    cache = InvoiceCache(str(tmp_path / "cache.sqlite3"))
+    assert cache.key_for(a) == cache.key_for(b)
+    assert cache.get(cache.key_for(a)) is None
+    cache.put(cache.key_for(a), DATA)
+    assert cache.get(cache.key_for(b)) == DATA
+
+
+def test_lru_eviction(tmp_path):
+    cache = InvoiceCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put("k1", DATA)
+    cache.put("k2", DATA)
+    cache.get("k1")  # k1 pasa a ser el más reciente
+    cache.put("k3", DATA)
+    assert len(cache) == 2
+    assert cache.get("k2") is None
+    assert cache.get("k1") == DATA
+
+
+def test_stale_fingerprint_is_purged(tmp_path):
+    cache = InvoiceCache(str(tmp_path / "cache.sqlite3"))
+    cache.put("abc:version-vieja", DATA)
+    cache.put(f"abc:{cache.fingerprint}", DATA)
+    cache.purge_stale()
+    assert len(cache) == 1
+
+
+def test_errors_are_not_cached(tmp_path):
+    broken = tmp_path / "roto.pdf"
+    broken.write_bytes(b"no es un pdf")
+    cache_path = str(tmp_path / "cache.sqlite3")
+    assert extract_pdf_data_cached(str(broken), cache_path) is None
+    assert len(InvoiceCache(cache_path)) == 0
+
+
+def test_hits_written_in_batches_and_eviction_leaves_room(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "TOUCH_BATCH", 3)
+    cache = InvoiceCache(str(tmp_path / "cache.sqlite3"), max_entries=20)
+    for i in range(20):
+        cache.put(f"k{i}", DATA)
+    last_used = dict(cache.conn.execute("SELECT key, last_used FROM facturas"))
+
+    cache.get("k0")
+    cache.get("k1")
+    # Dos aciertos: todavía no se escriben
+    assert dict(cache.conn.execute("SELECT key, last_used FROM facturas")) == last_used
+    cache.get("k2")
+    assert all(used > last_used[key] for key, used in cache.conn.execute(
+        "SELECT key, last_used FROM facturas WHERE key IN ('k0', 'k1', 'k2')"))
+
+    cache.get("k3")  # Pendiente: la limpieza lo escribe antes de elegir qué borrar
+    cache.put("k20", DATA)
+    # Sobra 1 y se borra además el 5% del tope (1): las dos menos usadas, sin tocar k0-k3
+    assert len(cache) == cache.count == 19
+    assert cache.get("k4") is None and cache.get("k5") is None
+    assert cache.get("k3") == DATA
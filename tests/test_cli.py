@@ -0,0 +1,95 @@
+import csv
+import json
+import os
+import shutil
+import time
+from types import SimpleNamespace
+
+import cli
+from benchmarks.corpus import generate_corpus
+from cli import EXIT_NO_DATA, EXIT_OK, EXIT_PARTIAL, build_parser, collect_inputs, main, watch_folders
+from extractor import extract_pdf_data
+
+
+def test_collect_inputs_dirs_globs_and_duplicates(tmp_path):
+    corpus = generate_corpus(str(tmp_path / "in"), n=3)
+    (tmp_path / "in" / "notas.txt").write_text("no es pdf")
+    found = collect_inputs([str(tmp_path / "in"), str(tmp_path / "in" / "*.pdf"), corpus[0][0]])
+    assert found == [p for p, _ in corpus]
+
+
+def test_batch_writes_outputs(tmp_path):
+    corpus = generate_corpus(str(tmp_path / "in"), n=4)
+    out = tmp_path / "out"
+    code = main([str(tmp_path / "in"), "-o", str(out), "-w", "1", "--no-cache"])
+    assert code == EXIT_OK
+
+    # Un correo por deudor (el corpus usa un RUT de deudor distinto por factura)
+    for _, expected in corpus:
+        html_file = out / f"correo_{expected['deudor_rut'].replace('.', '')}.html"
+        assert expected["folio"] in html_file.read_text(encoding="utf-8")
+
+    with open(out / "facturas.csv", encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["folio"] for r in rows] == [e["folio"] for _, e in corpus]
+
+    data = json.loads((out / "facturas.json").read_text(encoding="utf-8"))
+    assert len(data["facturas"]) == 4 and data["errores"] == []
+
+
+def test_exit_codes(tmp_path):
+    generate_corpus(str(tmp_path / "in"), n=1)
+    (tmp_path / "in" / "roto.pdf").write_bytes(b"no es un pdf")
+    assert main([str(tmp_path / "in"), "-o", str(tmp_path / "out"), "-w", "1", "--no-cache"]) == EXIT_PARTIAL
+    assert main([str(tmp_path / "vacio"), "-o", str(tmp_path / "out")]) == EXIT_NO_DATA
+
+
+def test_group_by_debtor_normalizes_rut():
+    from email_render import build_debtor_emails, group_by_debtor
+    rows = [
+        {"deudor_rut": "77.987.654-k", "deudor_nombre": "A", "folio": "1"},
+        {"deudor_rut": "90.222.111-5", "deudor_nombre": "B", "folio": "2"},
+        {"deudor_rut": "77987654-K", "deudor_nombre": "A", "folio": "3"},
+    ]
+    groups = group_by_debtor(rows)
+    assert list(groups) == ["77987654-K", "90222111-5"]
+    assert [r["folio"] for r in groups["77987654-K"]] == ["1", "3"]
+    emails = build_debtor_emails(rows)
+    assert len(emails) == 2 and "90.222.111-5" in emails[1][2]
+
+
+def extract_or_die(path):
+    # Corre en el worker: 'muere*.pdf' mata el proceso (BrokenProcessPool en el padre)
+    if os.path.basename(path).startswith("muere"):
+        os._exit(1)
+    return extract_pdf_data(path)
+
+
+def test_watch_survives_a_dead_worker(tmp_path, monkeypatch):
+    pdf, expected = generate_corpus(str(tmp_path / "pdfs"), n=1)[0]
+    (tmp_path / "in").mkdir()
+    out = tmp_path / "out"
+    args = build_parser().parse_args([str(tmp_path / "in"), "-o", str(out), "-w", "1", "--watch", "--debounce", "0.1"])
+
+    restarts = []
+    restart = cli.restart_watch_pool
+    monkeypatch.setattr(cli, "restart_watch_pool", lambda *a: restarts.append(1) or restart(*a))
+    deadline = time.monotonic() + 30
+
+    def tick(seconds):
+        # Guion de la vigilancia, una vuelta del ciclo por llamada
+        time.sleep(seconds)
+        if not os.listdir(tmp_path / "in"):
+            shutil.copy(pdf, tmp_path / "in" / "muere.pdf")
+        elif restarts and len(os.listdir(tmp_path / "in")) == 1:
+            shutil.copy(pdf, tmp_path / "in" / "buena.pdf")
+        lotes = os.listdir(out) if out.exists() else []
+        if lotes or time.monotonic() > deadline:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(cli, "time", SimpleNamespace(sleep=tick))
+    assert watch_folders(args, {"json"}, extract_or_die) == EXIT_OK
+    (lote,) = os.listdir(out)
+    data = json.loads((out / lote / "facturas.json").read_text(encoding="utf-8"))
+    assert [row["folio"] for row in data["facturas"]] == [expected["folio"]]
+    assert restarts == [1]
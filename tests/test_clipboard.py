@@ -0,0 +1,45 @@
+import os
+import struct
+
+import pytest
+
+import clipboard
+from email_render import build_cf_html, build_email_html, build_preview_text
+
+ROW = {
+    "fecha_emision": "05/03/2024", "emisor_rut": "76.123.456-K", "emisor_nombre": "PEÑA & HIJOS",
+    "folio": "1550", "deudor_rut": "77.987.654-3", "deudor_nombre": "ÑUÑOA LIMITADA",
+    "monto": "1.190.000", "valor_bruto": "1.190.000",
+}
+
+
+def test_html_payload_encodes_once_and_matches_cf_html():
+    html = build_email_html([ROW])
+    fragment, cf_html, text = clipboard.html_payload(html, build_preview_text([ROW]))
+    assert fragment == html.encode("utf-8")
+    assert cf_html == build_cf_html(html)
+    assert "ÑUÑOA LIMITADA" in text
+
+
+def test_dropfiles_lists_absolute_paths(tmp_path):
+    paths = [str(tmp_path / "a.pdf"), str(tmp_path / "ñ.pdf")]
+    data = clipboard.build_dropfiles(paths)
+    assert struct.unpack("IIIIi", data[:20]) == (20, 0, 0, 0, 1)
+    assert data[20:].decode("utf-16-le") == "\0".join(paths) + "\0\0"
+
+
+def test_memory_backend_from_env(monkeypatch):
+    monkeypatch.setenv(clipboard.BACKEND_ENV, "memoria")
+    backend = clipboard.get_backend()
+    assert isinstance(backend, clipboard.MemoryClipboard)
+
+    payload = clipboard.html_payload(build_email_html([ROW]), "texto")
+    backend.set_html(*payload)
+    assert (backend.fragment, backend.cf_html, backend.text) == payload
+    backend.set_files(["factura.pdf"])
+    assert backend.files == [os.path.abspath("factura.pdf")]
+
+
+def test_unknown_backend_name():
+    with pytest.raises(KeyError):
+        clipboard.get_backend("otro")
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from xml.etree.ElementTree import ParseError
+
+from benchmarks.corpus import generate_corpus
+from cli import main
+from dte import format_amount, format_rut, merge_pdf_and_xml, parse_dte
+from extractor import extract_pdf_data
+
+DOCUMENTO = """<DTE version="1.0"><Documento ID="F{folio}T33">
+  <Encabezado>
+    <IdDoc><TipoDTE>33</TipoDTE><Folio>{folio}</Folio><FchEmis>2024-03-05</FchEmis></IdDoc>
+    <Emisor><RUTEmisor>76123456-7</RUTEmisor><RznSoc>COMERCIAL LOS ANDES SPA</RznSoc></Emisor>
+    <Receptor><RUTRecep>{receptor}</RUTRecep><RznSocRecep>DISTRIBUIDORA SUR LIMITADA</RznSocRecep></Receptor>
+    <Totales><MntNeto>1000000</MntNeto><IVA>190000</IVA><MntTotal>1190000</MntTotal></Totales>
+  </Encabezado>
+  <Referencia><FolioRef>99</FolioRef><FchRef>2024-01-01</FchRef></Referencia>
+</Documento><Signature>firma</Signature></DTE>"""
+
+ENVIO = """<?xml version="1.0" encoding="ISO-8859-1"?>
+<EnvioDTE xmlns="http://www.sii.cl/SiiDte" version="1.0"><SetDTE ID="SetDoc">
+  <Caratula><RutEmisor>76123456-7</RutEmisor><RutReceptor>60803000-K</RutReceptor></Caratula>
+  {documentos}
+</SetDTE></EnvioDTE>"""
+
+
+def test_envio_dte_with_namespace_and_several_documents(tmp_path):
+    path = tmp_path / "envio.xml"
+    docs = "".join(DOCUMENTO.format(folio=f, receptor=r) for f, r in [(1550, "77987654-k"), (1551, "9876543-2")])
+    path.write_bytes(ENVIO.format(documentos=docs).encode("iso-8859-1"))
+
+    first, second = parse_dte(str(path))
+    assert first == {
+        "emisor_nombre": "COMERCIAL LOS ANDES SPA", "emisor_rut": "76.123.456-7",
+        "deudor_nombre": "DISTRIBUIDORA SUR LIMITADA", "deudor_rut": "77.987.654-K",
+        "folio": "1550", "monto": "1.190.000", "fecha_emision": "05/03/2024",
+        "valor_bruto": "1.190.000", "backend": "xml",
+    }
+    assert second["folio"] == "1551" and second["deudor_rut"] == "9.876.543-2"
+
+
+def test_single_dte_without_namespace_and_bad_xml(tmp_path):
+    path = tmp_path / "dte.xml"
+    path.write_text(DOCUMENTO.format(folio=7, receptor="77987654-3"), encoding="utf-8")
+    (data,) = parse_dte(str(path))
+    assert data["folio"] == "7"
+
+    (tmp_path / "roto.xml").write_text("<DTE><Documento>", encoding="utf-8")
+    with pytest.raises(ParseError):
+        parse_dte(str(tmp_path / "roto.xml"))
+    (tmp_path / "otro.xml").write_text("<config><a>1</a></config>", encoding="utf-8")
+    assert parse_dte(str(tmp_path / "otro.xml")) == []
+
+
+def test_formatters():
+    assert format_rut("76123456-k") == "76.123.456-K"
+    assert format_rut("basura") == "basura"
+    assert format_amount("1190000") == "1.190.000"
+    assert format_amount("") == "0"
+
+
+def test_pdf_and_xml_of_same_invoice_are_merged(tmp_path):
+    pdf_path, expected = generate_corpus(str(tmp_path), n=1)[0]
+    pdf = {"archivo": pdf_path, **extract_pdf_data(pdf_path)}
+    xml = {**pdf, "archivo": "factura.xml", "backend": "xml", "deudor_nombre": "NOMBRE OFICIAL"}
+    other = {**pdf, "archivo": "otra.pdf", "folio": "1"}
+
+    assert merge_pdf_and_xml([pdf, other, xml]) == [{**xml, "archivo": pdf_path}, other]
+    # Dos PDFs del mismo folio no se tocan
+    assert merge_pdf_and_xml([pdf, dict(pdf)]) == [pdf, pdf]
+
+
+def test_merge_normalizes_folio_and_rut():
+    pdf = {"archivo": "f.pdf", "backend": "pdfium", "emisor_rut": "76.123.456-k", "folio": "0001550"}
+    xml = {"archivo": "f.xml", "backend": "xml", "emisor_rut": "76123456-K", "folio": "1550", "monto": "1.190.000"}
+    assert merge_pdf_and_xml([pdf, xml]) == [{**xml, "archivo": "f.pdf"}]
+
+
+def test_cli_reads_xml_inputs(tmp_path):
+    (tmp_path / "in").mkdir()
+    docs = "".join(DOCUMENTO.format(folio=f, receptor="77987654-3") for f in (10, 11))
+    (tmp_path / "in" / "envio.xml").write_text(ENVIO.format(documentos=docs), encoding="utf-8")
+    out = tmp_path / "out"
+    assert main([str(tmp_path / "in"), "-o", str(out), "-f", "json", "-w", "1", "--no-cache"]) == 0
+    data = json.loads((out / "facturas.json").read_text(encoding="utf-8"))
+    assert [row["folio"] for row in data["facturas"]] == ["10", "11"]
@@ -0,0 +1,48 @@
+import io
+
+from email_render import build_cf_html, build_email_html, build_preview_text, render_email_html
+
+ROW = {
+    "fecha_emision": "05/03/2024", "emisor_rut": "76.123.456-K", "emisor_nombre": "PEÑA & HIJOS <SPA>",
+    "folio": "1550", "deudor_rut": "77.987.654-3", "deudor_nombre": "ÑUÑOA LIMITADA",
+    "monto": "1.190.000", "valor_bruto": "1.190.000",
+}
+
+
+def test_html_escapes_extracted_values():
+    html = build_email_html([ROW])
+    assert "PEÑA &amp; HIJOS &lt;SPA&gt;" in html
+    assert "<SPA>" not in html
+    assert html.count("<tr>") == 1 and "1.190.000" in html
+
+
+def test_html_row_with_nul_and_non_str_values():
+    # pdfium puede dejar NUL en el texto; un folio corregido a mano puede no ser str
+    html = build_email_html([{**ROW, "emisor_nombre": "PEÑA\0HIJOS", "folio": 1550}])
+    assert "PEÑA\0HIJOS" in html and ">1550<" in html
+
+
+def test_render_streams_into_buffer():
+    buffer = io.StringIO()
+    render_email_html([ROW] * 3, buffer)
+    assert buffer.getvalue() == build_email_html([ROW] * 3)
+    assert buffer.getvalue().count("1550") == 3
+
+
+def test_preview_text_uses_same_columns():
+    text = build_preview_text([ROW, {**ROW, "valor_bruto": "S/I"}])
+    assert "ÑUÑOA LIMITADA 77.987.654-3" in text
+    assert "PEÑA & HIJOS <SPA>" in text
+    assert build_preview_text([]) == ""
+
+
+def test_cf_html_offsets_are_utf8_byte_positions():
+    fragment = build_email_html([ROW])
+    data = build_cf_html(fragment)
+    header = dict(line.split(":", 1) for line in data[:data.index(b"<html>")].decode("ascii").split("\r\n") if line)
+    start_html, end_html = int(header["StartHTML"]), int(header["EndHTML"])
+    start_frag, end_frag = int(header["StartFragment"]), int(header["EndFragment"])
+    assert data[start_html:].startswith(b"<html>")
+    assert end_html == len(data) and data[:end_html].endswith(b"</html>")
+    # Con Ñ y É los offsets en caracteres no coincidirían con los bytes
+    assert data[start_frag:end_frag].decode("utf-8") == fragment
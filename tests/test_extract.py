@@ -1,15 +1,61 @@
+import json
+import os
+import subprocess
 import sys
-from app_facturas import NativeInvoiceApp
 
-PDF_PATH = r"N:\bastian\Desktop\Facturas\Factura N°855 - DVC (1).pdf"
+import pytest
 
-def main():
-    app = NativeInvoiceApp()
-    try:
-        app.withdraw()
-    except Exception:
-        pass
-    data = app.extract_pdf_data(PDF_PATH)
+# Permite correrlo como script desde cualquier directorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import LAYOUTS, generate_corpus  # noqa: E402
+from extractor import extract_invoice, extract_pdf_data  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    # Dos facturas por layout, con montos y fechas en distintos formatos
+    return generate_corpus(str(tmp_path_factory.mktemp("corpus")), n=len(LAYOUTS) * 2)
+
+
+@pytest.mark.parametrize("backend", ["pdfium", "pdfplumber", "regions"])
+def test_synthetic_corpus(corpus, backend):
+    for path, expected in corpus:
+        data = extract_invoice(path, backends=(backend,))
+        assert data is not None, f"No se extrajeron datos de {path}"
+        assert {k: getattr(data, k) for k in expected} == expected, path
+
+
+# Corre en un proceso nuevo: ru_maxrss es el pico de todo el proceso y no se puede reiniciar
+RSS_SCRIPT = """
+import json, resource, sys
+sys.path.insert(0, sys.argv[1])
+import pdfplumber, pypdfium2
+from extractor import extract_invoice
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+data = extract_invoice(sys.argv[2], backends=tuple(sys.argv[3].split(",")))
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"base": base, "peak": peak, "folio": data.folio}))
+"""
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="ru_maxrss en KB solo en Linux")
+@pytest.mark.parametrize("backend", ["pdfium", "pdfplumber"])
+def test_peak_rss_long_invoice(tmp_path, backend):
+    # Factura de 40 páginas (39 anexos con imagen): solo la primera página debe pesar en memoria
+    [(path, expected)] = generate_corpus(str(tmp_path), n=1, annex_pages=39)
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", RSS_SCRIPT, repo, path, backend],
+                         check=True, capture_output=True, text=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    assert result["folio"] == expected["folio"]
+    growth_mb = (result["peak"] - result["base"]) / 1024
+    assert growth_mb < 32, f"El pico de RSS creció {growth_mb:.1f} MB"
+
+
+def check_file(pdf_path):
+    """Chequeo manual de una factura real: python tests/test_extract.py <factura.pdf>"""
+    data = extract_pdf_data(pdf_path)
     try:
         assert data is not None, "No se extrajeron datos"
         assert data.get('deudor_rut') and data['deudor_rut'] != 'S/I', "Deudor RUT no extraído"
@@ -23,10 +69,8 @@ def main():
 
     print('TEST PASSED')
     print('Datos extraídos:', data)
-    try:
-        app.destroy()
-    except Exception:
-        pass
 
 if __name__ == '__main__':
-    main()
+    if len(sys.argv) != 2:
+        sys.exit("Uso: python tests/test_extract.py <factura.pdf>")
+    check_file(sys.argv[1])
@@ -0,0 +1,111 @@
+import os
+import sys
+
+import pytest
+
+from extractor import InvoiceData, format_fecha, normalize_amount, parse_invoice_text
+
+SAMPLE_TEXT = """COMERCIAL LOS ANDES SPA R.U.T.: 76.123.456-7
+R.U.T.: 76.123.456-7
+COMERCIAL LOS ANDES SPA
+Giro: VENTA AL POR MAYOR
+FACTURA ELECTRONICA
+N° 1550
+Fecha Emision: 24 de Diciembre del 2025
+SEÑOR(ES): DISTRIBUIDORA SUR LIMITADA R.U.T.: 77.987.654-K
+Dirección: AV. SIEMPRE VIVA 123
+Total Final $: 1,190,000
+"""
+
+
+def test_parse_invoice_text_fields():
+    data = parse_invoice_text(SAMPLE_TEXT)
+    assert isinstance(data, InvoiceData)
+    assert data.emisor_rut == "76.123.456-7"
+    assert data.emisor_nombre == "COMERCIAL LOS ANDES SPA"
+    assert data.deudor_rut == "77.987.654-K"
+    assert data.deudor_nombre == "DISTRIBUIDORA SUR LIMITADA"
+    assert data.folio == "1550"
+    assert data.monto == "1.190.000"
+    assert data.valor_bruto == data.monto
+    assert data.fecha_emision == "24/12/2025"
+
+
+def test_to_dict_keeps_gui_keys():
+    keys = set(parse_invoice_text(SAMPLE_TEXT).to_dict())
+    assert keys == {
+        "emisor_nombre", "emisor_rut", "deudor_nombre", "deudor_rut",
+        "folio", "monto", "fecha_emision", "valor_bruto", "backend",
+    }
+
+
+def test_format_helpers():
+    assert format_fecha("2025-3-7") == "07/03/2025"
+    assert format_fecha("7/3/25") == "07/03/2025"
+    assert format_fecha("S/I") == "S/I"
+    assert normalize_amount("32,567,147") == "32.567.147"
+
+
+def test_extract_batch_reports_failures_in_order(tmp_path):
+    from extractor import extract_batch
+    broken = tmp_path / "roto.pdf"
+    broken.write_bytes(b"no es un pdf")
+    missing = tmp_path / "no_existe.pdf"
+    assert extract_batch([broken, missing], workers=2) == [None, None]
+
+
+def test_search_field_skips_patterns_without_keyword():
+    from extractor import scan_text, search_field
+    ruts, keywords, señor_idx = scan_text(SAMPLE_TEXT)
+    assert [rut for _, rut in ruts][:2] == ["76.123.456-7", "76.123.456-7"]
+    assert señor_idx == SAMPLE_TEXT.upper().find("SEÑOR")
+    assert search_field("monto", SAMPLE_TEXT, keywords, default="0") == ("1,190,000", 0)
+    # Sin la palabra 'Fecha' en el texto no se prueba ningún patrón de fecha
+    assert search_field("fecha_emision", "sin datos", set()) == ("S/I", None)
+
+
+def test_backend_fallback_when_fields_missing(monkeypatch):
+    import extractor
+    monkeypatch.setitem(extractor.TEXT_BACKENDS, "pdfium", lambda path: "texto sin campos " * 10)
+    monkeypatch.setitem(extractor.TEXT_BACKENDS, "pdfplumber", lambda path: SAMPLE_TEXT)
+    data = extractor.extract_invoice("factura.pdf", backends=("pdfium", "pdfplumber"))
+    assert data.backend == "pdfplumber"
+    assert data.deudor_rut == "77.987.654-K"
+
+
+def test_fast_backend_used_when_complete(monkeypatch):
+    import extractor
+
+    def no_debe_llamarse(path):
+        raise AssertionError("pdfplumber no debía usarse")
+
+    monkeypatch.setitem(extractor.TEXT_BACKENDS, "pdfium", lambda path: SAMPLE_TEXT)
+    monkeypatch.setitem(extractor.TEXT_BACKENDS, "pdfplumber", no_debe_llamarse)
+    assert extractor.extract_invoice("factura.pdf").backend == "pdfium"
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11) or sys.platform == "win32",
+                    reason="reciclado de workers desde 3.11; tope de memoria solo POSIX")
+def test_low_memory_pool_caps_and_recycles_workers(monkeypatch):
+    import resource
+
+    import extractor
+    monkeypatch.setattr(extractor, "LOW_MEMORY_TASKS_PER_CHILD", 2)
+    with extractor.create_pool(1, low_memory=True) as pool:
+        soft, _ = pool.submit(resource.getrlimit, resource.RLIMIT_AS).result()
+        pids = [pool.submit(os.getpid).result() for _ in range(4)]
+    assert soft == extractor.LOW_MEMORY_MAX_MB * 1024 * 1024
+    assert len(set(pids)) >= 2
+
+
+def test_preloaded_pool_imports_backends_in_workers():
+    import extractor
+    with extractor.create_pool(1, preload=True) as pool:
+        pids = {f.result() for f in extractor.warm_pool(pool, 1)}
+        loaded = pool.submit(_backends_loaded).result()
+    assert len(pids) == 1
+    assert loaded == (True, True)
+
+
+def _backends_loaded():
+    return "pdfplumber" in sys.modules, "pypdfium2" in sys.modules
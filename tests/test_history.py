@@ -0,0 +1,47 @@
+from benchmarks.corpus import generate_corpus
+from cli import main
+from extractor import invoice_key
+from history import SentHistory, format_repeats
+
+
+def invoice(folio, emisor="76.123.456-7", deudor="77.987.654-3"):
+    return {"emisor_rut": emisor, "folio": folio, "deudor_rut": deudor,
+            "deudor_nombre": "DISTRIBUIDORA SUR", "monto": "1.190.000", "archivo": f"/tmp/{folio}.pdf"}
+
+
+def test_invoice_key_normalizes_rut_and_folio():
+    assert invoice_key(invoice("0001550", emisor="76123456-k")) == invoice_key(invoice("1550", emisor="76.123.456-K"))
+    assert invoice_key(invoice("S/I")) is None
+    assert invoice_key(invoice("1", emisor="S/I")) is None
+
+
+def test_repeats_found_in_one_query_and_current_batch_ignored(tmp_path):
+    path = str(tmp_path / "historial.sqlite3")
+    history = SentHistory(path)
+    assert history.record([invoice("10"), invoice("11"), invoice("0")], "lote-1", when=1_700_000_000) == 2
+    history.record([invoice("10", deudor="99.999.999-9")], "lote-2", when=1_700_100_000)
+    # Regenerar el mismo lote actualiza sus filas, no las duplica
+    history.record([invoice("12")], "lote-3")
+    history.record([invoice("12")], "lote-3")
+    assert len(history) == 4
+
+    batch = [invoice("10"), invoice("12"), invoice("13"), invoice("11", emisor="1.111.111-1")]
+    found = SentHistory(path).find_sent(batch, exclude_batch="lote-3")
+    assert set(found) == {("76123456-7", "10")}
+    assert [sent["deudor_rut"] for sent in found[("76123456-7", "10")]] == ["77987654-3", "99999999-9"]
+    (line,) = format_repeats(batch, found)
+    assert line.startswith("Folio 10 de 76.123.456-7") and "(2 veces)" in line
+
+    assert set(history.find_sent(batch)) == {("76123456-7", "10"), ("76123456-7", "12")}
+    assert history.find_sent([invoice("S/I")]) == {}
+
+
+def test_cli_warns_about_invoices_sent_before(tmp_path, capsys):
+    generate_corpus(str(tmp_path / "in"), n=2)
+    args = [str(tmp_path / "in"), "-o", str(tmp_path / "out"), "-f", "json", "-w", "1", "--no-cache",
+            "--history", str(tmp_path / "historial.sqlite3")]
+    assert main(args) == 0
+    assert "Ya enviada" not in capsys.readouterr().err
+    assert main(args) == 0
+    assert capsys.readouterr().err.count("Ya enviada") == 2
+    assert len(SentHistory(str(tmp_path / "historial.sqlite3"))) == 4
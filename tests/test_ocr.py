@@ -0,0 +1,59 @@
+import pytest
+
+import ocr
+from benchmarks.corpus import generate_corpus
+from extractor import extract_invoice, no_text_invoice
+
+# Texto como lo devuelve Tesseract de una factura escaneada
+OCR_TEXT = """R.U.T.: 76.123.456-7
+COMERCIAL LOS ANDES SPA
+Giro: VENTA AL POR MAYOR
+FACTURA ELECTRONICA N° 1550
+Fecha Emision: 05/03/2024
+SEÑOR(ES): DISTRIBUIDORA SUR LIMITADA R.U.T.: 77.987.654-K
+Total: 1.190.000
+"""
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    return generate_corpus(str(tmp_path / "in"), n=1)[0][0]
+
+
+def test_render_first_page(pdf_path):
+    image = ocr.render_first_page(pdf_path, dpi=72)
+    assert image.size == (595, 842)
+    assert image.mode == "L"
+
+
+def test_ocr_result_is_cached_by_file_hash(tmp_path, pdf_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(ocr, "ocr_page_text", lambda path: calls.append(path) or OCR_TEXT)
+    cache_path = str(tmp_path / "cache.sqlite3")
+
+    first = ocr.ocr_pdf_data_cached(pdf_path, cache_path=cache_path)
+    second = ocr.ocr_pdf_data_cached(pdf_path, cache_path=cache_path)
+    assert first == second
+    assert first["backend"] == "ocr" and first["deudor_rut"] == "77.987.654-K"
+    assert len(calls) == 1
+
+
+def test_ocr_failure_returns_fallback(tmp_path, pdf_path, monkeypatch):
+    def falla(path):
+        raise RuntimeError("tesseract no responde")
+
+    monkeypatch.setattr(ocr, "ocr_page_text", falla)
+    placeholder = no_text_invoice("escaneada.pdf").to_dict()
+    cache_path = str(tmp_path / "cache.sqlite3")
+    assert ocr.ocr_pdf_data_cached(pdf_path, placeholder, cache_path) == placeholder
+
+    monkeypatch.setattr(ocr, "ocr_page_text", lambda path: "   ")
+    assert ocr.ocr_pdf_data_cached(pdf_path, placeholder, cache_path) == placeholder
+
+
+@pytest.mark.skipif(not ocr.ocr_available(), reason="Tesseract no instalado")
+def test_ocr_reads_rendered_invoice(pdf_path):
+    # El PDF sintético tiene texto, pero el OCR lo lee desde la imagen renderizada
+    data = ocr.ocr_invoice(pdf_path)
+    assert data is not None
+    assert data["folio"] == extract_invoice(pdf_path).folio
@@ -0,0 +1,48 @@
+from benchmarks.corpus import generate_corpus
+from extractor import FIELD_PATTERNS, extract_invoice, scan_text, search_field
+from profiles import IssuerProfiles, format_stats
+
+# 'N° 1550' y 'Folio: 77' hacen match con patrones distintos de la cadena del folio
+TEXT = "FACTURA N° 1550\nFolio: 77\n"
+
+
+def test_search_field_tries_preferred_pattern_first():
+    keywords = scan_text(TEXT)[1]
+    assert search_field("folio", TEXT, keywords) == ("1550", 1)
+    assert search_field("folio", TEXT, keywords, first=2) == ("77", 2)
+    # Un índice fuera de rango se ignora
+    assert search_field("folio", TEXT, keywords, first=len(FIELD_PATTERNS["folio"])) == ("1550", 1)
+
+
+def test_record_counts_hits_and_misses(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    profiles = IssuerProfiles(path)
+    profiles.record("76.123.456-7", {"folio": 1, "monto": 0})
+    profiles.record("76.123.456-7", {"folio": 1, "monto": 1})
+    profiles.record("S/I", {"folio": 2})
+    assert profiles.get("76.123.456-7") == {"folio": 1, "monto": 1}
+
+    # Persiste entre procesos: otra instancia lee el mismo índice
+    stats = {row[1]: row[2:] for row in IssuerProfiles(path).stats()}
+    assert stats["folio"] == (1, 1, 0, 1.0)
+    assert stats["monto"] == (1, 0, 1, 0.0)
+    assert "1 emisor(es)" in format_stats(IssuerProfiles(path).stats())
+
+
+def test_profiles_dropped_when_extractor_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite3")
+    IssuerProfiles(path).record("76.123.456-7", {"folio": 1})
+    monkeypatch.setattr("profiles.extractor_fingerprint", lambda: "otra-version")
+    assert IssuerProfiles(path).get("76.123.456-7") == {}
+
+
+def test_extract_invoice_learns_profile(tmp_path):
+    corpus = generate_corpus(str(tmp_path / "in"), n=2)
+    profiles = IssuerProfiles(str(tmp_path / "cache.sqlite3"))
+    for path, expected in corpus * 2:
+        data = extract_invoice(path, backends=("pdfium",), profiles=profiles)
+        assert {k: getattr(data, k) for k in expected} == expected
+    # Segunda pasada: cada campo acertó con el patrón aprendido en la primera
+    rows = profiles.stats()
+    assert {row[0] for row in rows} == {e["emisor_rut"] for _, e in corpus}
+    assert all(row[3] == 1 and row[4] == 0 for row in rows)
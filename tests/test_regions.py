@@ -0,0 +1,74 @@
+from benchmarks.corpus import write_pdf
+from extractor import extract_invoice, parse_invoice_text
+from regions import group_lines, parse_words
+
+
+def make_words(rows):
+    """Palabras al estilo de pdfplumber.extract_words desde [(top, [(x0, 'texto'), ...])]"""
+    words = []
+    for top, chunks in rows:
+        for x0, chunk in chunks:
+            for text in chunk.split():
+                words.append({"text": text, "x0": x0, "x1": x0 + 5 * len(text), "top": top, "bottom": top + 9})
+                x0 += 5 * len(text) + 3
+    return words
+
+
+# DTE a dos columnas: emisor a la izquierda, recuadro SII a la derecha; subtotal antes del total
+ROWS = [
+    (40, [(40, "COMERCIAL LOS ANDES SPA"), (380, "R.U.T.: 76.123.456-7")]),
+    (52, [(40, "Giro: VENTA AL POR MAYOR"), (380, "FACTURA ELECTRONICA")]),
+    (64, [(40, "Casa Matriz: CALLE UNO N° 200"), (380, "N° 1550")]),
+    (76, [(380, "S.I.I. - SANTIAGO")]),
+    (100, [(40, "SEÑOR(ES): DISTRIBUIDORA SUR LIMITADA"), (380, "Fecha Emision: 05/03/2024")]),
+    (112, [(40, "R.U.T.: 77.987.654-K")]),
+    (124, [(40, "1 PRODUCTO CODIGO 1001 UN 10 5.000 50.000")]),
+    (300, [(380, "SUBTOTAL $ 1.000.000")]),
+    (312, [(380, "I.V.A. 19% $ 190.000")]),
+    (324, [(380, "TOTAL $ 1.190.000")]),
+]
+
+
+def test_group_lines_orders_columns():
+    lines = group_lines(make_words(ROWS))
+    assert len(lines) == len(ROWS)
+    assert [w["text"] for w in lines[0]][-2:] == ["R.U.T.:", "76.123.456-7"]
+
+
+def test_regions_read_each_block():
+    def no_debe_llamarse():
+        raise AssertionError("todas las regiones tenían su campo")
+
+    data = parse_words(make_words(ROWS), no_debe_llamarse)
+    assert data.emisor_rut == "76.123.456-7"
+    assert data.folio == "1550"
+    assert data.deudor_rut == "77.987.654-K"
+    assert data.deudor_nombre == "DISTRIBUIDORA SUR LIMITADA"
+    assert data.fecha_emision == "05/03/2024"
+    assert data.monto == data.valor_bruto == "1.190.000"
+
+
+def test_total_not_taken_from_subtotal(tmp_path):
+    text = "\n".join(" ".join(chunk for _, chunk in chunks) for _, chunks in ROWS)
+    assert parse_invoice_text(text).monto == "1.190.000"
+    assert parse_words(make_words(ROWS), lambda: text).monto == "1.190.000"
+
+    # De punta a punta con los backends por defecto (gana pdfium con el texto completo)
+    path = str(tmp_path / "subtotal.pdf")
+    write_pdf(path, [
+        "R.U.T.: 76.123.456-7", "COMERCIAL LOS ANDES SPA", "Giro: VENTA AL POR MAYOR", "FACTURA ELECTRONICA",
+        "N° 1550", "Fecha Emision: 05/03/2024", "SEÑOR(ES): DISTRIBUIDORA SUR LIMITADA R.U.T.: 77.987.654-K",
+        "SUBTOTAL $ 1.000.000", "I.V.A. 19% $ 190.000", "TOTAL $ 1.190.000",
+    ])
+    data = extract_invoice(path)
+    assert data.backend == "pdfium"
+    assert data.monto == "1.190.000"
+
+
+def test_missing_regions_fall_back_to_page_text():
+    rows = [(40, [(40, "SIN ANCLAS CONOCIDAS EN ESTA PAGINA")])]
+    text = "R.U.T.: 76.123.456-7\nFecha: 05/03/2024\nFolio: 77\n"
+    data = parse_words(make_words(rows), lambda: text)
+    assert data.emisor_rut == "76.123.456-7"
+    assert data.folio == "77"
+    assert data.fecha_emision == "05/03/2024"
@@ -0,0 +1,86 @@
+import builtins
+import sys
+
+import timings
+from benchmarks.corpus import generate_corpus
+from cache import extract_pdf_data_cached
+from email_render import build_debtor_emails
+from extractor import extract_invoice
+
+
+def test_disabled_without_env(tmp_path, monkeypatch):
+    monkeypatch.delenv(timings.LOG_ENV, raising=False)
+    pdf_path = generate_corpus(str(tmp_path / "in"), n=1)[0][0]
+    assert extract_invoice(pdf_path) is not None
+    assert timings.current() is None
+    assert timings.read_log() == []
+
+
+def test_extraction_writes_stage_and_field_timings(tmp_path, monkeypatch):
+    log = str(tmp_path / "tiempos.jsonl")
+    monkeypatch.setenv(timings.LOG_ENV, log)
+    pdf_path = generate_corpus(str(tmp_path / "in"), n=1)[0][0]
+    cache_path = str(tmp_path / "cache.sqlite3")
+
+    data = extract_pdf_data_cached(pdf_path, cache_path)
+    extract_pdf_data_cached(pdf_path, cache_path)
+    build_debtor_emails([data])
+
+    factura, cache, render = timings.read_log(log)
+    assert factura["tipo"] == "factura" and factura["backend"] == data["backend"] == "pdfium"
+    assert factura["faltantes"] == []
+    assert {"pdfium.abrir", "pdfium.texto", "escaneo", "formato"} <= set(factura["etapas"])
+    assert factura["campos"]["folio"]["patron"] is not None
+    assert set(factura["campos"]) == {"emisor_nombre", "deudor_nombre", "folio", "monto", "fecha_emision"}
+    assert cache["tipo"] == "cache" and cache["archivo"] == factura["archivo"]
+    assert render["tipo"] == "render" and render["facturas"] == 1 and render["correos"] == 1
+
+    summary = timings.summarize(timings.read_log(log))
+    assert summary["facturas"] == 1 and summary["cache"] == 1
+    assert summary["lentas"][0][1] == factura["archivo"]
+    assert "Facturas más lentas" in timings.format_summary(summary)
+
+
+def test_read_log_from_offset_skips_partial_lines(tmp_path, monkeypatch):
+    log = tmp_path / "tiempos.jsonl"
+    monkeypatch.setenv(timings.LOG_ENV, str(log))
+    timings.log_event("render", 1.0, facturas=1, correos=1)
+    offset = timings.log_size()
+    timings.log_event("render", 2.0, facturas=2, correos=1)
+    with open(log, "a", encoding="utf-8") as f:
+        f.write('{"tipo": "fact')  # Línea a medio escribir por otro proceso
+    assert [r["total_ms"] for r in timings.read_log(offset=offset)] == [2.0]
+    # Offset mayor que el archivo (log rotado): se lee desde el principio
+    assert len(timings.read_log(offset=10 ** 9)) == 2
+
+
+def test_startup_profile_times_imports_and_restores_hook(tmp_path, monkeypatch):
+    monkeypatch.setenv(timings.LOG_ENV, str(tmp_path / "tiempos.jsonl"))
+    original = builtins.__import__
+    monkeypatch.delitem(sys.modules, "wave", raising=False)
+    startup = timings.StartupProfile()
+    # Por builtins.__import__ (como una sentencia import): un módulo de la stdlib que el resto no carga
+    __import__("wave")
+    startup.imports_done()
+    assert builtins.__import__ is original
+    startup.mark("primer_dibujo")
+    startup.log()
+
+    (record,) = timings.read_log()
+    assert record["tipo"] == "arranque" and "wave" in record["modulos"]
+    assert list(record["etapas"]) == ["imports", "primer_dibujo"]
+    assert "Arranque" in timings.format_summary(timings.summarize([record]))
+
+
+def test_summary_with_failed_extraction(tmp_path, monkeypatch):
+    log = str(tmp_path / "tiempos.jsonl")
+    monkeypatch.setenv(timings.LOG_ENV, log)
+    broken = tmp_path / "roto.pdf"
+    broken.write_bytes(b"no es un pdf")
+    assert extract_invoice(str(broken)) is None
+
+    (record,) = timings.read_log(log)
+    assert record["backend"] is None
+    summary = timings.summarize([record])
+    assert summary["lentas"][0][1:] == ("roto.pdf", "-")
+    assert "roto.pdf" in timings.format_summary(summary)
@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from watch import FolderWatcher, inotify_available
+
+METHODS = ["polling", pytest.param("inotify", marks=pytest.mark.skipif(
+    not inotify_available(), reason="inotify solo en Linux"))]
+
+
+def poll_until(watcher, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        ready = watcher.poll()
+        if ready:
+            return ready
+        time.sleep(0.02)
+    return []
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_new_pdf_delivered_after_debounce(tmp_path, method):
+    (tmp_path / "viejo.pdf").write_bytes(b"%PDF ya estaba")
+    watcher = FolderWatcher([str(tmp_path)], debounce=0.2, interval=0.05, method=method)
+    try:
+        assert watcher.method == method
+        path = tmp_path / "nuevo.pdf"
+        with open(path, "wb") as f:
+            f.write(b"%PDF primera parte")
+            f.flush()
+            assert watcher.poll() == []  # Todavía se está escribiendo
+            f.write(b" y el resto")
+        (tmp_path / "notas.txt").write_text("no es pdf")
+
+        assert poll_until(watcher) == [str(path)]
+        assert not watcher.busy()
+        # Ya entregado: no vuelve a salir mientras no cambie
+        time.sleep(0.3)
+        assert watcher.poll() == []
+    finally:
+        watcher.close()
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_burst_and_existing_files(tmp_path, method):
+    (tmp_path / "a.pdf").write_bytes(b"%PDF a")
+    (tmp_path / "sub").mkdir()
+    watcher = FolderWatcher([str(tmp_path)], debounce=0.1, interval=0.05, method=method,
+                            recursive=True, include_existing=True)
+    try:
+        for name in ("b.pdf", "c.pdf"):
+            (tmp_path / name).write_bytes(b"%PDF")
+        (tmp_path / "sub" / "d.PDF").write_bytes(b"%PDF")
+        ready = set()
+        deadline = time.monotonic() + 3
+        while len(ready) < 4 and time.monotonic() < deadline:
+            ready.update(watcher.poll())
+            time.sleep(0.02)
+        assert ready == {str(tmp_path / n) for n in ("a.pdf", "b.pdf", "c.pdf", "sub/d.PDF")}
+    finally:
+        watcher.close()
@@ -0,0 +1,265 @@
+"""Tiempos por etapa de cada factura, en un log JSON lines.
+
+Se activa con la variable de entorno FACTURAS_TIMINGS_LOG (ruta del log);
+los workers del pool la heredan, así que cada proceso escribe sus propias
+líneas. Sin la variable, las mediciones no hacen nada.
+
+Cada línea es un objeto JSON con 'tipo':
+
+    factura  archivo, backend, total_ms, etapas {etapa: ms},
+             campos {campo: {ms, patron}} y faltantes
+    cache    archivo encontrado en la caché (total_ms = lectura + hash)
+    render   armado de los correos (facturas, correos, total_ms)
+    arranque inicio de la app: import de cada módulo y etapas hasta la
+             primera pintura de la ventana (ver StartupProfile)
+    precarga workers y portapapeles listos en segundo plano tras el arranque
+
+summarize() y format_summary() resumen un log para la consola y la app.
+"""
+import builtins
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+LOG_ENV = "FACTURAS_TIMINGS_LOG"
+MAX_LOG_BYTES = 20 * 1024 * 1024  # Al pasar este tamaño el log se rota a .1
+
+
+def log_path():
+    """Ruta del log activo, o None si la medición está desactivada"""
+    return os.environ.get(LOG_ENV) or None
+
+
+class Trace:
+    """Tiempos de una factura: etapas (acumuladas por nombre) y búsqueda de cada campo"""
+
+    def __init__(self, pdf_path):
+        self.archivo = os.path.basename(pdf_path)
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.fields = {}
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+    def field(self, name, elapsed_ms, pattern):
+        self.fields[name] = {"ms": round(elapsed_ms, 3), "patron": pattern}
+
+    def to_record(self, **extra):
+        return {
+            "tipo": "factura",
+            "archivo": self.archivo,
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "etapas": {name: round(ms, 3) for name, ms in self.stages.items()},
+            "campos": self.fields,
+            **extra,
+        }
+
+
+# Traza de la factura que se está extrayendo en este proceso (una a la vez por worker)
+_current = None
+
+
+def start(pdf_path):
+    """Empieza la traza de un archivo; None si la medición está desactivada"""
+    global _current
+    _current = Trace(pdf_path) if log_path() else None
+    return _current
+
+
+def current():
+    return _current
+
+
+def finish(trace, **extra):
+    """Cierra la traza y escribe su línea en el log"""
+    global _current
+    _current = None
+    if trace is not None:
+        write_record(trace.to_record(**extra))
+
+
+@contextmanager
+def stage(name):
+    """Mide una etapa de la factura en curso (no hace nada sin traza activa)"""
+    if _current is None:
+        yield
+    else:
+        with _current.stage(name):
+            yield
+
+
+def log_event(tipo, elapsed_ms, **fields):
+    """Escribe una línea suelta (p. ej. 'render' o 'cache') si la medición está activa"""
+    if log_path():
+        write_record({"tipo": tipo, "total_ms": round(elapsed_ms, 3), **fields})
+
+
+def write_record(record):
+    path = log_path()
+    if not path:
+        return
+    record = {"ts": datetime.now().isoformat(timespec="milliseconds"), "pid": os.getpid(), **record}
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    try:
+        if os.path.exists(path) and os.path.getsize(path) > MAX_LOG_BYTES:
+            os.replace(path, path + ".1")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Una línea por write en modo append: los workers no se mezclan a mitad de línea
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+    except OSError as e:
+        print(f"⚠️  No se pudo escribir el log de tiempos: {type(e).__name__}: {e}")
+
+
+# --- Arranque de la aplicación ---
+class StartupProfile:
+    """Tiempos de arranque: import de cada módulo de primer nivel y etapas marcadas.
+
+    Al crearse reemplaza __import__ para medir los imports que siguen (cada
+    uno con lo que importa a su vez); imports_done() lo restaura.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.imports = {}
+        self.steps = {}
+        self._depth = 0
+        self._import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def _timed_import(self, name, *args, **kwargs):
+        if self._depth:
+            return self._import(name, *args, **kwargs)
+        self._depth += 1
+        t0 = time.perf_counter()
+        try:
+            return self._import(name, *args, **kwargs)
+        finally:
+            self._depth -= 1
+            self.imports[name] = self.imports.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+    def imports_done(self):
+        builtins.__import__ = self._import
+        self.mark("imports")
+
+    def mark(self, name):
+        """Registra el tiempo transcurrido desde el inicio hasta este punto"""
+        self.steps[name] = (time.perf_counter() - self.start) * 1000
+
+    def to_record(self):
+        # Los módulos ya cargados (o casi gratis) no aportan al informe
+        imports = {name: round(ms, 2) for name, ms in sorted(self.imports.items(), key=lambda i: -i[1]) if ms >= 0.1}
+        return {"modulos": imports, "etapas": {name: round(ms, 1) for name, ms in self.steps.items()}}
+
+    def log(self):
+        """Muestra el informe en la consola y lo escribe en el log de tiempos"""
+        record = self.to_record()
+        print(format_startup(record))
+        log_event("arranque", max(self.steps.values(), default=0.0), **record)
+
+
+def format_startup(record, top=8):
+    """Texto del informe de arranque"""
+    lines = ["Arranque (ms desde el inicio): " + "  ·  ".join(f"{name} {ms:.0f}" for name, ms in record["etapas"].items())]
+    lines.extend(f"  import {name:<20}{ms:>9.1f} ms" for name, ms in list(record["modulos"].items())[:top])
+    return "\n".join(lines)
+
+
+# --- Resumen ---
+def log_size(path=None):
+    """Tamaño actual del log (para leer después solo lo nuevo)"""
+    path = path or log_path()
+    try:
+        return os.path.getsize(path) if path else 0
+    except OSError:
+        return 0
+
+
+def read_log(path=None, offset=0):
+    """Registros del log desde `offset` (bytes); ignora líneas incompletas"""
+    path = path or log_path()
+    if not path or not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "rb") as f:
+        # Si el log se rotó desde que se tomó el offset, se lee el archivo nuevo completo
+        f.seek(offset if offset <= os.path.getsize(path) else 0)
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+
+def _p95(values):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))] if values else 0.0
+
+
+def summarize(records, slowest=5):
+    """Resumen: totales por factura, promedio por etapa y por campo, patrones usados"""
+    invoices = [r for r in records if r.get("tipo") == "factura"]
+    startups = [r for r in records if r.get("tipo") == "arranque"]
+    warmups = [r for r in records if r.get("tipo") == "precarga"]
+    totals = [r["total_ms"] for r in invoices]
+    stages, fields, patterns = {}, {}, {}
+    for r in invoices:
+        for name, ms in r.get("etapas", {}).items():
+            stages.setdefault(name, []).append(ms)
+        for name, info in r.get("campos", {}).items():
+            fields.setdefault(name, []).append(info["ms"])
+            key = (name, info["patron"])
+            patterns[key] = patterns.get(key, 0) + 1
+    return {
+        "facturas": len(invoices),
+        "cache": sum(1 for r in records if r.get("tipo") == "cache"),
+        "media_ms": _mean(totals),
+        "p95_ms": _p95(totals),
+        "render_ms": sum(r["total_ms"] for r in records if r.get("tipo") == "render"),
+        "etapas": {name: _mean(values) for name, values in sorted(stages.items())},
+        "campos": {name: _mean(values) for name, values in sorted(fields.items())},
+        "patrones": dict(sorted(patterns.items(), key=lambda item: (item[0][0], str(item[0][1])))),
+        "arranque": startups[-1] if startups else None,
+        "precarga_ms": warmups[-1]["total_ms"] if warmups else None,
+        # backend es None en las facturas que no se pudieron leer
+        "lentas": sorted(((r["total_ms"], r["archivo"], r.get("backend") or "-") for r in invoices),
+                         reverse=True)[:slowest],
+    }
+
+
+def format_summary(summary):
+    """Texto del resumen (panel de la app y salida de la consola)"""
+    lines = [
+        f"Facturas extraídas: {summary['facturas']}  ·  desde caché: {summary['cache']}",
+        f"Por factura: media {summary['media_ms']:.1f} ms  ·  p95 {summary['p95_ms']:.1f} ms",
+        f"Armado de correos: {summary['render_ms']:.1f} ms",
+    ]
+    if summary["arranque"]:
+        lines.append("\n" + format_startup(summary["arranque"], top=5))
+    if summary["precarga_ms"] is not None:
+        lines.append(f"Precarga en segundo plano (workers y portapapeles): {summary['precarga_ms']:.0f} ms")
+    if summary["etapas"]:
+        lines.append("\nEtapas (ms promedio):")
+        lines.extend(f"  {name:<22}{ms:>9.2f}" for name, ms in summary["etapas"].items())
+    if summary["campos"]:
+        lines.append("\nBúsqueda por campo (ms promedio):")
+        lines.extend(f"  {name:<22}{ms:>9.3f}" for name, ms in summary["campos"].items())
+        lines.append("\nPatrón que resolvió cada campo (veces):")
+        lines.extend(f"  {name:<22}#{pattern!s:<4}{count:>6}" for (name, pattern), count in summary["patrones"].items())
+    if summary["lentas"]:
+        lines.append("\nFacturas más lentas:")
+        lines.extend(f"  {ms:>9.1f} ms  {backend:<11}{name}" for ms, name, backend in summary["lentas"])
+    return "\n".join(lines)
@@ -0,0 +1,216 @@
+"""Vigilancia de carpetas: detecta PDFs nuevos y los entrega en tandas.
+
+Los escáneres y el ERP dejan los PDFs de a poco (varias escrituras por
+archivo, muchos archivos seguidos). Cada cambio reinicia la espera del
+archivo; poll() lo entrega recién cuando pasó `debounce` segundos sin
+cambios y su tamaño sigue igual, así no se lee un PDF a medio escribir.
+
+En Linux los cambios llegan por inotify (ctypes, sin dependencias); en
+otros sistemas, o si inotify no está disponible, se recorre la carpeta
+cada `interval` segundos.
+"""
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import time
+
+DEBOUNCE = 2.0        # Segundos sin cambios para dar un archivo por terminado
+POLL_INTERVAL = 1.0   # Segundos entre recorridos de la carpeta (modo polling)
+SUFFIXES = (".pdf",)
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len (+ nombre de `len` bytes)
+
+
+def _libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, "inotify_init1") else None
+
+
+class Inotify:
+    """Eventos de inotify sin bloquear: read() devuelve [(carpeta, nombre, máscara)]"""
+
+    def __init__(self, libc):
+        self.libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.dirs = {}  # wd -> carpeta
+
+    def add(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch: {directory}")
+        self.dirs[wd] = directory
+
+    def read(self):
+        events = []
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((self.dirs.get(wd), name, mask))
+
+    def close(self):
+        os.close(self.fd)
+
+
+def inotify_available():
+    return _libc() is not None
+
+
+class FolderWatcher:
+    """Vigila carpetas y entrega los PDFs nuevos cuando terminan de escribirse.
+
+    method: 'auto' (inotify si hay, si no polling), 'inotify' o 'polling'.
+    Con include_existing los PDFs que ya estaban también se entregan; si no,
+    solo los que aparecen o cambian después.
+    """
+
+    def __init__(self, directories, recursive=False, debounce=DEBOUNCE, interval=POLL_INTERVAL,
+                 method="auto", include_existing=False, suffixes=SUFFIXES):
+        self.directories = [os.path.abspath(d) for d in directories]
+        self.recursive = recursive
+        self.debounce = debounce
+        self.interval = interval
+        self.suffixes = suffixes
+        self.pending = {}  # ruta -> (firma (tamaño, mtime), momento del último cambio)
+        self.seen = {}     # ruta -> firma con la que ya se entregó
+        self.last_scan = 0.0
+
+        libc = _libc() if method in ("auto", "inotify") else None
+        if method == "inotify" and libc is None:
+            raise OSError("inotify no está disponible en este sistema")
+        self.inotify = Inotify(libc) if libc is not None else None
+        self.method = "inotify" if self.inotify else "polling"
+
+        for directory in self._walk_dirs():
+            if self.inotify:
+                self.inotify.add(directory)
+        for path in self._scan():
+            if include_existing:
+                self._touch(path)
+            else:
+                self.seen[path] = self._signature(path)
+
+    # --- Recorrido de carpetas ---
+    def _walk_dirs(self):
+        for top in self.directories:
+            if not self.recursive:
+                yield top
+                continue
+            for root, dirs, _ in os.walk(top):
+                dirs.sort()
+                yield root
+
+    def _wanted(self, name):
+        return name.lower().endswith(self.suffixes)
+
+    def _scan(self):
+        for directory in self._walk_dirs():
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.is_file() and self._wanted(entry.name):
+                    yield entry.path
+
+    @staticmethod
+    def _signature(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _touch(self, path):
+        """Registra un cambio en `path`: reinicia su espera si la firma cambió"""
+        signature = self._signature(path)
+        if signature is None:
+            self.pending.pop(path, None)
+            return
+        if self.seen.get(path) == signature:
+            return
+        previous = self.pending.get(path)
+        if previous is None or previous[0] != signature:
+            self.pending[path] = (signature, time.monotonic())
+
+    # --- Eventos ---
+    def _collect(self):
+        if self.inotify:
+            for directory, name, mask in self.inotify.read():
+                if mask & IN_Q_OVERFLOW:
+                    # Se perdieron eventos: se recorre todo otra vez
+                    for path in self._scan():
+                        self._touch(path)
+                    continue
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                if mask & IN_ISDIR:
+                    if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                        # Carpeta nueva (o movida con contenido): vigilarla y tomar lo que ya trae
+                        for root, _, files in os.walk(path):
+                            self.inotify.add(root)
+                            for f in files:
+                                if self._wanted(f):
+                                    self._touch(os.path.join(root, f))
+                elif self._wanted(name):
+                    self._touch(path)
+        elif time.monotonic() - self.last_scan >= self.interval:
+            self.last_scan = time.monotonic()
+            for path in self._scan():
+                self._touch(path)
+
+    def poll(self):
+        """PDFs que terminaron de escribirse desde la última llamada (no bloquea)"""
+        self._collect()
+        now = time.monotonic()
+        ready = []
+        for path, (signature, changed) in list(self.pending.items()):
+            if now - changed < self.debounce:
+                continue
+            current = self._signature(path)
+            if current != signature:
+                # Siguió creciendo sin avisar (p. ej. carpeta de red): se espera de nuevo
+                self.pending.pop(path)
+                if current is not None:
+                    self.pending[path] = (current, now)
+                continue
+            del self.pending[path]
+            self.seen[path] = signature
+            ready.append(path)
+        return sorted(ready)
+
+    def busy(self):
+        """True si hay archivos esperando a que terminen de escribirse"""
+        return bool(self.pending)
+
+    def close(self):
+        if self.inotify:
+            self.inotify.close()
+            self.inotify = None